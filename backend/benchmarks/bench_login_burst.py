@@ -0,0 +1,115 @@
+# MGSCompSciHub/backend/benchmarks/bench_login_burst.py
+'''
+Simulates a class of students logging in at the same moment, with AuthContext firing several
+/auth/firebase/verify_session calls per student, and reports DB commits/writes and failures with
+verify_session single-flight coalescing off and on.
+
+Firebase is replaced by an in-process fake verifier with a configurable delay, so this runs offline.
+Usage (from the backend folder): python benchmarks/bench_login_burst.py [--students 30] [--calls-per-student 3]
+'''
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import Config
+from project import create_app, db
+import project.auth.routes as auth_routes
+
+
+def run_burst(single_flight, students, calls_per_student, verify_delay):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_login_burst.db')
+
+    class BenchConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        VERIFY_SESSION_SINGLE_FLIGHT = single_flight
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+
+    counters = {"verifications": 0, "commits": 0, "writes": 0}
+    lock = threading.Lock()
+
+    def bump(name):
+        with lock:
+            counters[name] += 1
+
+    def fake_verify(token):
+        bump("verifications")
+        time.sleep(verify_delay) # Stand-in for the Firebase round trip
+        uid = token.split(':', 1)[0]
+        return {"uid": uid, "email": f"{uid}@students.example", "name": uid,
+                "firebase": {"sign_in_provider": "password"}, "exp": time.time() + 3600}
+
+    def count_commit(session):
+        bump("commits")
+
+    def count_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            bump("writes")
+
+    original_verify = auth_routes.verify_firebase_id_token
+    auth_routes.verify_firebase_id_token = fake_verify
+    event.listen(Session, 'after_commit', count_commit)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_write)
+    try:
+        client = app.test_client()
+
+        def login(uid):
+            response = client.post('/auth/firebase/verify_session', json={"firebase_token": f"{uid}:token"})
+            return response.status_code
+
+        requests_to_send = [f"student{i:03d}" for i in range(students) for _ in range(calls_per_student)]
+        # verify_session prints debug lines and tracebacks; keep the report readable
+        logging.disable(logging.CRITICAL)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(requests_to_send)) as pool:
+                statuses = list(pool.map(login, requests_to_send))
+            elapsed = time.perf_counter() - started
+        logging.disable(logging.NOTSET)
+    finally:
+        auth_routes.verify_firebase_id_token = original_verify
+        event.remove(Session, 'after_commit', count_commit)
+        event.remove(engine, 'before_cursor_execute', count_write)
+
+    counters["requests"] = len(statuses)
+    counters["failures"] = sum(1 for status in statuses if status != 200)
+    counters["elapsed_s"] = round(elapsed, 3)
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=30)
+    parser.add_argument('--calls-per-student', type=int, default=3)
+    parser.add_argument('--verify-delay-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.students} students x {args.calls_per_student} concurrent verify_session calls, "
+          f"{args.verify_delay_ms:.0f} ms simulated verification\n")
+    print(f"{'single-flight':<14}{'requests':>10}{'failures':>10}{'verifies':>10}{'commits':>10}{'writes':>10}{'seconds':>10}")
+    for single_flight in (False, True):
+        result = run_burst(single_flight, args.students, args.calls_per_student, args.verify_delay_ms / 1000)
+        print(f"{'on' if single_flight else 'off':<14}{result['requests']:>10}{result['failures']:>10}"
+              f"{result['verifications']:>10}{result['commits']:>10}{result['writes']:>10}{result['elapsed_s']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# MGSCompSciHub/backend/benchmarks/bench_parallel_provisioning.py
+'''
+Compares sequential and thread-pool student provisioning (create_student_accounts_parallel) against
+a local fake of firebase_admin.auth.create_user that sleeps to simulate network latency and rejects
+every Nth email as a duplicate, checking that every failure is reported and every success
+committed.
+
+Usage (from the backend folder): python benchmarks/bench_parallel_provisioning.py [--students 50] [--workers 8]
+'''
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth_admin
+
+from config import Config
+from project import create_app, db
+from project.models import User, Class, RoleEnum
+from project.teacher.provisioning import plan_student_accounts, create_student_accounts_parallel
+from tests.helpers import FakeFirebaseAuth
+
+
+def run(workers, students, latency, fail_every):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_provisioning.db')
+
+    class BenchConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        app = create_app(BenchConfig)
+    fake = FakeFirebaseAuth(latency=latency)
+    originals = (firebase_auth_admin.create_user, firebase_auth_admin.delete_users, firebase_admin.get_app)
+    fake.install(setattr)
+    try:
+        with app.app_context():
+            db.create_all()
+            teacher = User(firebase_uid='bench-teacher', username='bench_teacher', role=RoleEnum.TEACHER)
+            db.session.add(teacher)
+            db.session.flush()
+            target_class = Class(name='Bench Class', teacher_id=teacher.id)
+            db.session.add(target_class)
+            db.session.commit()
+
+            specs = plan_student_accounts(students)
+            if fail_every:
+                fake.rejected_emails = {spec.firebase_email for spec in specs[::fail_every]}
+            started = time.perf_counter()
+            report = create_student_accounts_parallel(specs, target_class.id, workers)
+            elapsed = time.perf_counter() - started
+            committed = User.query.filter_by(student_class_id=target_class.id).count()
+    finally:
+        firebase_auth_admin.create_user, firebase_auth_admin.delete_users, firebase_admin.get_app = originals
+
+    succeeded = sum(1 for row in report if row["success"])
+    return {"elapsed_s": round(elapsed, 3), "succeeded": succeeded, "failed": len(report) - succeeded,
+            "committed": committed, "calls": fake.calls}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--fail-every', type=int, default=7, help='Reject 1 in N emails as duplicates (0 = never)')
+    args = parser.parse_args()
+
+    print(f"{args.students} students, {args.latency_ms:.0f} ms simulated create_user latency\n")
+    print(f"{'workers':<10}{'seconds':>10}{'created':>10}{'failed':>10}{'committed':>11}")
+    for workers in (1, args.workers):
+        result = run(workers, args.students, args.latency_ms / 1000, args.fail_every)
+        assert result["committed"] == result["succeeded"], "every reported success must be committed"
+        assert result["calls"] == args.students, "every student must be attempted exactly once"
+        print(f"{workers:<10}{result['elapsed_s']:>10}{result['succeeded']:>10}{result['failed']:>10}{result['committed']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# MGSCompSciHub/backend/benchmarks/bench_password_hashing.py
+'''
+Compares hashing a batch of generated student passwords inline on one thread (what
+create_firebase_student_account_route used to do via User.set_password) with
+PasswordHashingService.hash_many on a process pool. The speed-up is bounded by the number of cores.
+
+Usage (from the backend folder): python benchmarks/bench_password_hashing.py [--students 200] [--workers N] [--rounds 29000]
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from passlib.hash import pbkdf2_sha256
+
+from project.auth.utils import generate_random_password
+from project.hashing import PasswordHashingService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rounds', type=int, default=pbkdf2_sha256.default_rounds)
+    args = parser.parse_args()
+
+    passwords = [generate_random_password(10) for _ in range(args.students)]
+    print(f"{args.students} passwords, pbkdf2_sha256 at {args.rounds} rounds, {os.cpu_count()} CPU core(s)\n")
+
+    started = time.perf_counter()
+    inline_hashes = [pbkdf2_sha256.using(rounds=args.rounds).hash(password) for password in passwords]
+    inline_elapsed = time.perf_counter() - started
+
+    service = PasswordHashingService(rounds=args.rounds, max_workers=args.workers)
+    service.hash_many(passwords[:args.workers]) # Start the worker processes outside the timing
+    started = time.perf_counter()
+    pooled_hashes = service.hash_many(passwords)
+    pooled_elapsed = time.perf_counter() - started
+    service.shutdown()
+
+    assert len(pooled_hashes) == len(inline_hashes)
+    assert all(pbkdf2_sha256.verify(password, hashed) for password, hashed in zip(passwords[:10], pooled_hashes[:10]))
+    print(f"{'mode':<22}{'seconds':>10}{'ms/password':>14}")
+    print(f"{'inline (before)':<22}{inline_elapsed:>10.3f}{inline_elapsed * 1000 / args.students:>14.2f}")
+    print(f"{f'pool x{args.workers} (after)':<22}{pooled_elapsed:>10.3f}{pooled_elapsed * 1000 / args.students:>14.2f}")
+    print(f"\nspeed-up: {inline_elapsed / pooled_elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# MGSCompSciHub/backend/benchmarks/bench_progress_queries.py
+'''
+Counts the SQL statements issued by GET /api/teacher/classes/<id>/assignments/<id>/progress for
+classes of increasing size, and exits non-zero if the count changes with class size (an N+1
+regression). Also reports response time per class size.
+
+Firebase is replaced by an in-process fake verifier, so this runs offline.
+Usage (from the backend folder): python benchmarks/bench_progress_queries.py [--sizes 5 50 500] [--tasks 8]
+'''
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+
+from config import Config
+from project import create_app, db
+from project.models import User, RoleEnum, Worksheet
+import project.auth.utils as auth_utils
+from tests.helpers import seed_class_progress
+
+
+def measure(class_size, tasks):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_progress_queries.db')
+
+    class BenchConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        JOB_WORKER_THREADS = 0
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        teacher = User(firebase_uid='teacher-uid', username='bench_teacher', role=RoleEnum.TEACHER)
+        worksheet = Worksheet(title='Bench', component_identifier='BenchWorksheet', task_count=tasks)
+        db.session.add_all([teacher, worksheet])
+        db.session.commit()
+        # Same data as tests/test_progress_queries.py; answer_data is deliberately bulky here
+        url = seed_class_progress(teacher.id, worksheet.id, class_size, tasks, answer_size=2000)
+        engine = db.engine
+
+    original_verify = auth_utils.verify_firebase_id_token
+    auth_utils.verify_firebase_id_token = lambda token: {"uid": "teacher-uid", "exp": time.time() + 3600}
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = app.test_client()
+    headers = {"Authorization": "Bearer bench"}
+    logging.disable(logging.CRITICAL)
+    try:
+        client.get(url, headers=headers) # Warm the principal cache, as on a real dashboard
+        event.listen(engine, 'before_cursor_execute', count)
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+        auth_utils.verify_firebase_id_token = original_verify
+        logging.disable(logging.NOTSET)
+    if response.status_code != 200 or len(response.json["assignment_progress"]) != class_size:
+        raise SystemExit(f"Unexpected response for class size {class_size}: {response.status_code}")
+    return len(statements), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 50, 500])
+    parser.add_argument('--tasks', type=int, default=8)
+    args = parser.parse_args()
+
+    counts = set()
+    print(f"{'students':>8}  {'queries':>7}  {'time (ms)':>9}")
+    for size in args.sizes:
+        queries, elapsed = measure(size, args.tasks)
+        counts.add(queries)
+        print(f"{size:>8}  {queries:>7}  {elapsed * 1000:>9.1f}")
+    if len(counts) != 1:
+        print("FAIL: query count depends on class size")
+        sys.exit(1)
+    print("OK: constant query count")
+
+
+if __name__ == '__main__':
+    main()
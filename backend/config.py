@@ -17,4 +17,85 @@ class Config:
     MS_SCOPE = ["User.Read"]
 
     APP_BASE_URL = os.environ.get('APP_BASE_URL') or 'http://localhost:5000'
-    FIREBASE_ADMIN_SDK_JSON_PATH = os.environ.get('FIREBASE_ADMIN_SDK_JSON_PATH')
\ No newline at end of file
+    FIREBASE_ADMIN_SDK_JSON_PATH = os.environ.get('FIREBASE_ADMIN_SDK_JSON_PATH')
+    # Verified Firebase ID token cache (see project/auth/token_cache.py).
+    # Entries never outlive the token's own 'exp'; the TTL can only shorten that.
+    TOKEN_CACHE_ENABLED = os.environ.get('TOKEN_CACHE_ENABLED', 'true').lower() == 'true'
+    TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 2048))
+    TOKEN_CACHE_TTL_SECONDS = int(os.environ.get('TOKEN_CACHE_TTL_SECONDS', 300))
+
+    # How Firebase ID tokens are verified: 'admin_sdk' (firebase_admin.auth.verify_id_token, with a
+    # remote revocation check) or 'local' (RS256 check against background-refreshed signing keys,
+    # see project/auth/local_verify.py). Revocation and disabled accounts are checked in both modes, see below.
+    FIREBASE_TOKEN_VERIFICATION = os.environ.get('FIREBASE_TOKEN_VERIFICATION', 'admin_sdk')
+    FIREBASE_PROJECT_ID = os.environ.get('FIREBASE_PROJECT_ID') # Defaults to the Admin SDK app's project
+    FIREBASE_SIGNING_KEYS_URL = os.environ.get('FIREBASE_SIGNING_KEYS_URL') # Defaults to Google's x509 endpoint
+    FIREBASE_SIGNING_KEYS_FILE = os.environ.get('FIREBASE_SIGNING_KEYS_FILE') # Takes precedence over the URL
+    FIREBASE_TOKEN_CLOCK_SKEW_SECONDS = int(os.environ.get('FIREBASE_TOKEN_CLOCK_SKEW_SECONDS', 5))
+
+    # How token revocation is checked: 'remote' (a Firebase lookup on every token cache miss:
+    # check_revoked=True in admin_sdk mode, get_user in local mode) or
+    # 'index' (in-memory firebase_uid -> tokens_valid_after map, see project/auth/revocation.py).
+    # In 'index' mode a revocation made outside this app is enforced within the refresh interval;
+    # if the index goes stale beyond REVOCATION_INDEX_MAX_STALENESS_SECONDS, requests fall back to a
+    # remote lookup.
+    FIREBASE_REVOCATION_CHECK = os.environ.get('FIREBASE_REVOCATION_CHECK', 'remote')
+    REVOCATION_INDEX_REFRESH_SECONDS = int(os.environ.get('REVOCATION_INDEX_REFRESH_SECONDS', 300))
+    REVOCATION_INDEX_MAX_STALENESS_SECONDS = int(os.environ.get('REVOCATION_INDEX_MAX_STALENESS_SECONDS', 900))
+
+    # firebase_uid -> Principal identity map used by token_required (see project/auth/principal_cache.py).
+    # The TTL bounds staleness for user changes made by other worker processes.
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 4096))
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 60))
+
+    # Coalesce concurrent /auth/firebase/verify_session calls for the same user (see project/auth/singleflight.py)
+    VERIFY_SESSION_SINGLE_FLIGHT = os.environ.get('VERIFY_SESSION_SINGLE_FLIGHT', 'true').lower() == 'true'
+
+    # Upper bound on students per /api/teacher/create_firebase_students/bulk request
+    BULK_PROVISION_MAX_STUDENTS = int(os.environ.get('BULK_PROVISION_MAX_STUDENTS', 1000))
+
+    # Parallel per-user provisioning in /api/teacher/create_firebase_student ({"parallel": true} per request)
+    PROVISION_PARALLEL_DEFAULT = os.environ.get('PROVISION_PARALLEL_DEFAULT', 'false').lower() == 'true'
+    PROVISION_MAX_WORKERS = int(os.environ.get('PROVISION_MAX_WORKERS', 8))
+
+    # Student usernames are "adj_noun", then "adj_noun2".."adj_noun<USERNAME_MAX_SUFFIX>" once those run out
+    USERNAME_MAX_SUFFIX = int(os.environ.get('USERNAME_MAX_SUFFIX', 99))
+
+    # pbkdf2_sha256 settings for generated student passwords (see project/hashing.py).
+    # Existing hashes keep verifying whatever rounds they were created with.
+    PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 29000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None # None = one per CPU core
+
+    # Background jobs (see project/jobs.py) run in a separate `flask jobs-worker` process with
+    # JOB_WORKER_THREADS workers. JOB_RUN_IN_WEB_PROCESS=true makes every web process start its own
+    # workers instead (only for single-process deployments without a jobs-worker).
+    JOB_RUN_IN_WEB_PROCESS = os.environ.get('JOB_RUN_IN_WEB_PROCESS', 'false').lower() == 'true'
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 2))
+    JOB_POLL_INTERVAL_SECONDS = float(os.environ.get('JOB_POLL_INTERVAL_SECONDS', 5))
+    JOB_STALE_AFTER_SECONDS = int(os.environ.get('JOB_STALE_AFTER_SECONDS', 900)) # Running jobs without a heartbeat for this long are failed
+    PROVISION_JOB_MAX_STUDENTS = int(os.environ.get('PROVISION_JOB_MAX_STUDENTS', 10000))
+    PROVISION_JOB_CHUNK_SIZE = int(os.environ.get('PROVISION_JOB_CHUNK_SIZE', 100))
+
+    # CSV roster uploads (/api/teacher/classes/<id>/roster_import) are parsed and provisioned in chunks
+    ROSTER_IMPORT_CHUNK_SIZE = int(os.environ.get('ROSTER_IMPORT_CHUNK_SIZE', 200))
+    ROSTER_IMPORT_MAX_ROWS = int(os.environ.get('ROSTER_IMPORT_MAX_ROWS', 2000))
+
+    # Initial passwords from provisioning are kept this long for CSV / login-slip export (see project/teacher/credentials.py)
+    CREDENTIAL_BATCH_TTL_SECONDS = int(os.environ.get('CREDENTIAL_BATCH_TTL_SECONDS', 3600))
+
+    # Upper bound on task updates per /api/student/assignments/<id>/progress/batch request
+    PROGRESS_BATCH_MAX_TASKS = int(os.environ.get('PROGRESS_BATCH_MAX_TASKS', 200))
+
+    # Write-behind buffering of single progress saves (see project/student/write_behind.py). Saves are
+    # acknowledged at once and flushed in bulk; the last interval's saves are lost if a worker is killed.
+    PROGRESS_WRITE_BEHIND = os.environ.get('PROGRESS_WRITE_BEHIND', 'false').lower() == 'true'
+    PROGRESS_WRITE_BEHIND_INTERVAL_MS = int(os.environ.get('PROGRESS_WRITE_BEHIND_INTERVAL_MS', 500))
+    PROGRESS_WRITE_BEHIND_MAX_ENTRIES = int(os.environ.get('PROGRESS_WRITE_BEHIND_MAX_ENTRIES', 500)) # Flush early at this many buffered tasks
+
+    # Live progress stream for teachers (GET /api/teacher/classes/<id>/assignments/<id>/events, see project/pubsub.py).
+    # 'memory' only reaches teachers connected to the same process; use 'redis' with several web workers.
+    PUBSUB_BACKEND = os.environ.get('PUBSUB_BACKEND', 'memory')
+    PUBSUB_REDIS_URL = os.environ.get('PUBSUB_REDIS_URL', 'redis://localhost:6379/0')
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100)) # Undelivered events per connection before it is told to resync
+    SSE_MAX_STREAM_SECONDS = int(os.environ.get('SSE_MAX_STREAM_SECONDS', 300)) # Streams then close and the browser reconnects
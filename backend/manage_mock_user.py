@@ -2,6 +2,7 @@
 
 from project import create_app, db
 from project.models import User, RoleEnum # Make sure RoleEnum is imported
+from project.hashing import password_hasher
 
 app = create_app()
 
@@ -11,6 +12,7 @@ with app.app_context():
     target_password = "safepassword123"  # This password will be hashed by pbkdf2_sha256
     target_role = RoleEnum.TEACHER
     target_is_mock = True
+    target_password_hash = password_hasher.hash(target_password) # Configured PASSWORD_HASH_ROUNDS
 
     user = User.query.filter_by(username=target_username).first()
 
@@ -20,7 +22,7 @@ with app.app_context():
         user.email = target_email
         user.role = target_role
         user.is_mock_teacher = target_is_mock
-        user.set_password(target_password) # This will use pbkdf2_sha256 from your models.py
+        user.password_hash = target_password_hash # pbkdf2_sha256 via the hashing service
         
         try:
             db.session.commit()
@@ -37,7 +39,7 @@ with app.app_context():
             role=target_role,
             is_mock_teacher=target_is_mock
         )
-        new_user.set_password(target_password) # This will use pbkdf2_sha256
+        new_user.password_hash = target_password_hash # pbkdf2_sha256 via the hashing service
         db.session.add(new_user)
         try:
             db.session.commit()
@@ -1,6 +1,7 @@
 # MGSCompSciHub/backend/manage_mock_user_lite.py
 from project import create_app, db
 from project.models import User, RoleEnum, Class # Make sure RoleEnum and Class are imported
+from project.hashing import password_hasher
 
 app = create_app()
 
@@ -8,11 +9,14 @@ with app.app_context():
     # --- Mock Teacher Setup ---
     target_teacher_username = "mockteacher@mgs.com"
     target_teacher_email = "mockteacher@mgs.com"
-    # Password will be hashed by pbkdf2_sha256 by set_password, 
+    # Password will be hashed by pbkdf2_sha256 via the hashing service, 
     # but not checked by the "trust mode" teacher_mock_login route
     target_teacher_password = "safepassword123" 
     target_teacher_role = RoleEnum.TEACHER
     target_teacher_is_mock = True
+    target_student_password = "studentpass123" # See the test student setup below
+    # Hash both passwords up front in one batch through the hashing service
+    target_teacher_password_hash, target_student_password_hash = password_hasher.hash_many([target_teacher_password, target_student_password])
 
     teacher_user = User.query.filter_by(username=target_teacher_username).first()
 
@@ -22,7 +26,7 @@ with app.app_context():
         teacher_user.role = target_teacher_role
         teacher_user.is_mock_teacher = target_teacher_is_mock
         # Always set/reset password to ensure it's hashed with current models.py method (pbkdf2_sha256)
-        teacher_user.set_password(target_teacher_password) 
+        teacher_user.password_hash = target_teacher_password_hash
         try:
             db.session.commit()
             print(f"SUCCESS: User '{target_teacher_username}' updated/confirmed. Password re-hashed. Role: {teacher_user.role}, is_mock_teacher: {teacher_user.is_mock_teacher}.")
@@ -37,7 +41,7 @@ with app.app_context():
             role=target_teacher_role,
             is_mock_teacher=target_teacher_is_mock
         )
-        teacher_user.set_password(target_teacher_password)
+        teacher_user.password_hash = target_teacher_password_hash
         db.session.add(teacher_user)
         try:
             db.session.commit()
@@ -66,14 +70,14 @@ with app.app_context():
             target_student_username = "test_student_01"
             target_student_role = RoleEnum.STUDENT
             # Password will be hashed by pbkdf2_sha256, but not checked by the "trust mode" student login route
-            target_student_password = "studentpass123" 
+            # (target_student_password is defined and hashed at the top of the script)
 
             student_user = User.query.filter_by(username=target_student_username).first()
             if student_user:
                 print(f"Student '{target_student_username}' found. Updating attributes and re-setting password...")
                 student_user.role = target_student_role
                 student_user.student_class_id = test_class.id # Assign to the test class
-                student_user.set_password(target_student_password)
+                student_user.password_hash = target_student_password_hash
                 try:
                     db.session.commit()
                     print(f"SUCCESS: Student '{target_student_username}' updated. Role: {student_user.role}, Class ID: {student_user.student_class_id}.")
@@ -87,7 +91,7 @@ with app.app_context():
                     role=target_student_role,
                     student_class_id=test_class.id # Assign to the test class
                 )
-                student_user.set_password(target_student_password)
+                student_user.password_hash = target_student_password_hash
                 db.session.add(student_user)
                 try:
                     db.session.commit()
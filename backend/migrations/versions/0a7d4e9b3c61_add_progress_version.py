@@ -0,0 +1,26 @@
+"""Add version to worksheet_progress
+
+Revision ID: 0a7d4e9b3c61
+Revises: f3c9a5e21b76
+Create Date: 2026-10-18 01:02:45.336820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7d4e9b3c61'
+down_revision = 'f3c9a5e21b76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('worksheet_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('worksheet_progress', schema=None) as batch_op:
+        batch_op.drop_column('version')
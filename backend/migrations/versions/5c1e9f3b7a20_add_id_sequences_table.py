@@ -0,0 +1,32 @@
+"""Add id_sequences table for block-allocated identifiers
+
+Revision ID: 5c1e9f3b7a20
+Revises: 2a2ec7f2fbb7
+Create Date: 2026-10-17 22:05:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from project.db_utils import SEQUENCE_START_MARGIN
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9f3b7a20'
+down_revision = '2a2ec7f2fbb7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('id_sequences',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Start above every number the old COUNT(*) + position scheme could have used (see SEQUENCE_START_MARGIN)
+    op.execute(f"INSERT INTO id_sequences (name, next_value) SELECT 'student_email', COALESCE(MAX(id), 0) + {SEQUENCE_START_MARGIN} FROM users")
+
+
+def downgrade():
+    op.drop_table('id_sequences')
@@ -0,0 +1,56 @@
+"""Add credential batch tables for provisioning exports
+
+Revision ID: b7e3f91d2c48
+Revises: 8d4a2c6e1f57
+Create Date: 2026-10-17 22:48:12.417305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f91d2c48'
+down_revision = '8d4a2c6e1f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('credential_batches',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('created_by_id', sa.Integer(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('credential_batches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_credential_batches_expires_at'), ['expires_at'], unique=False)
+
+    op.create_table('credential_batch_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.String(length=64), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('app_username', sa.String(length=80), nullable=False),
+    sa.Column('login_email', sa.String(length=120), nullable=False),
+    sa.Column('initial_password', sa.String(length=128), nullable=False),
+    sa.ForeignKeyConstraint(['batch_id'], ['credential_batches.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('credential_batch_entries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_credential_batch_entries_batch_id'), ['batch_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('credential_batch_entries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_credential_batch_entries_batch_id'))
+
+    op.drop_table('credential_batch_entries')
+    with op.batch_alter_table('credential_batches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_credential_batches_expires_at'))
+
+    op.drop_table('credential_batches')
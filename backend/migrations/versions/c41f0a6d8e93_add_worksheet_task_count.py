@@ -0,0 +1,26 @@
+"""Add task_count to worksheets
+
+Revision ID: c41f0a6d8e93
+Revises: b7e3f91d2c48
+Create Date: 2026-10-17 23:12:05.118240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f0a6d8e93'
+down_revision = 'b7e3f91d2c48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('worksheets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('task_count', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('worksheets', schema=None) as batch_op:
+        batch_op.drop_column('task_count')
@@ -0,0 +1,60 @@
+"""Add assignment_stats summary table
+
+Revision ID: d92b5e0c7a14
+Revises: c41f0a6d8e93
+Create Date: 2026-10-17 23:41:27.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd92b5e0c7a14'
+down_revision = 'c41f0a6d8e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('assignment_stats',
+    sa.Column('assignment_id', sa.Integer(), nullable=False),
+    sa.Column('started_count', sa.Integer(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('progress_rows', sa.Integer(), nullable=False),
+    sa.Column('distinct_tasks', sa.Integer(), nullable=False),
+    sa.Column('scored_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('score_sq_sum', sa.Float(), nullable=False),
+    sa.Column('last_activity', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('assignment_id')
+    )
+    # Backfill from existing progress (same definitions as `flask assignment-stats rebuild`)
+    op.execute("""
+        INSERT INTO assignment_stats (assignment_id, started_count, completed_count, progress_rows, distinct_tasks,
+                                      scored_count, score_sum, score_sq_sum, last_activity)
+        SELECT a.id,
+               COALESCE(p.started, 0), COALESCE(c.completed, 0), COALESCE(p.progress_rows, 0), COALESCE(p.distinct_tasks, 0),
+               COALESCE(p.scored, 0), COALESCE(p.score_sum, 0), COALESCE(p.score_sq_sum, 0), p.last_activity
+        FROM assignments a
+        LEFT JOIN (
+            SELECT assignment_id, COUNT(DISTINCT student_id) AS started, COUNT(*) AS progress_rows,
+                   COUNT(DISTINCT task_identifier) AS distinct_tasks, COUNT(score) AS scored,
+                   SUM(score) AS score_sum, SUM(score * score) AS score_sq_sum, MAX(last_updated) AS last_activity
+            FROM worksheet_progress GROUP BY assignment_id
+        ) p ON p.assignment_id = a.id
+        LEFT JOIN (
+            SELECT per_student.assignment_id, COUNT(*) AS completed
+            FROM (SELECT assignment_id, student_id, COUNT(*) AS tasks_done
+                  FROM worksheet_progress GROUP BY assignment_id, student_id) per_student
+            JOIN assignments sa ON sa.id = per_student.assignment_id
+            JOIN worksheets w ON w.id = sa.worksheet_id
+            WHERE w.task_count IS NOT NULL AND per_student.tasks_done >= w.task_count
+            GROUP BY per_student.assignment_id
+        ) c ON c.assignment_id = a.id
+    """)
+
+
+def downgrade():
+    op.drop_table('assignment_stats')
@@ -0,0 +1,26 @@
+"""Add version counter to classes
+
+Revision ID: e6b1d47a3f05
+Revises: d92b5e0c7a14
+Create Date: 2026-10-18 00:07:52.214633
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b1d47a3f05'
+down_revision = 'd92b5e0c7a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,56 @@
+"""Add content_hash to worksheet_progress
+
+Revision ID: f3c9a5e21b76
+Revises: e6b1d47a3f05
+Create Date: 2026-10-18 00:38:14.902157
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a5e21b76'
+down_revision = 'e6b1d47a3f05'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _content_hash(answer_data, score):
+    # Frozen copy of project.student.progress.progress_content_hash at the time of this migration
+    canonical = json.dumps([answer_data, None if score is None else float(score)],
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('worksheet_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=32), nullable=True))
+
+    progress = sa.table('worksheet_progress',
+                        sa.column('id', sa.Integer), sa.column('answer_data', sa.JSON),
+                        sa.column('score', sa.Float), sa.column('content_hash', sa.String))
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(progress.c.id, progress.c.answer_data, progress.c.score)
+            .where(progress.c.id > last_id).order_by(progress.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            progress.update().where(progress.c.id == sa.bindparam('row_id')).values(content_hash=sa.bindparam('hash')),
+            [{"row_id": row.id, "hash": _content_hash(row.answer_data, row.score)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('worksheet_progress', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
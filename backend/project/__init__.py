@@ -2,6 +2,15 @@
 from flask import Flask, jsonify
 from .extensions import db, migrate, login_manager, oauth, cors # login_manager kept for now, but less used
 from .models import User, Worksheet 
+from .auth.token_cache import verified_token_cache
+from .auth.local_verify import signing_key_store, local_token_verifier
+from .auth.revocation import revocation_index
+from .auth.principal_cache import principal_cache
+from .auth.usernames import username_pool
+from .hashing import password_hasher
+from .jobs import job_runner
+from .pubsub import pubsub_hub
+from .db_utils import check_upsert_support
 from config import Config
 import logging
 import os
@@ -21,10 +30,17 @@ def create_app(config_class=Config):
     
     app.logger.info("Flask app created. Initializing extensions...")
 
+    check_upsert_support(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     oauth.init_app(app) 
+    verified_token_cache.init_app(app)
+    principal_cache.init_app(app)
+    username_pool.init_app(app)
+    password_hasher.init_app(app)
+    job_runner.init_app(app) # Workers run in `flask jobs-worker` unless JOB_RUN_IN_WEB_PROCESS, see project/jobs.py
+    pubsub_hub.init_app(app)
     
     frontend_url_from_env = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
     allowed_origins_list = list(set([
@@ -75,6 +91,14 @@ def create_app(config_class=Config):
         app.logger.error("Firebase Admin features WILL LIKELY FAIL due to this error.")
     # --- End Firebase Admin SDK Init ---
 
+    if app.config.get('FIREBASE_TOKEN_VERIFICATION') == 'local':
+        app.logger.info("Firebase ID tokens will be verified locally against cached signing keys.")
+        local_token_verifier.init_app(app)
+        signing_key_store.init_app(app) # Loads keys now and starts the background refresh thread
+    if app.config.get('FIREBASE_REVOCATION_CHECK') == 'index':
+        app.logger.info("Token revocation will be checked against the periodically refreshed revocation index.")
+        revocation_index.init_app(app) # Loads the index now and starts the background refresh thread
+
     @login_manager.user_loader
     def load_user(user_id):
         return User.query.get(int(user_id))
@@ -88,6 +112,13 @@ def create_app(config_class=Config):
     from .worksheets import worksheets_bp
     app.register_blueprint(worksheets_bp)
 
+    from .student.progress import assignment_stats_cli
+    app.cli.add_command(assignment_stats_cli)
+    from .teacher.credentials import credential_batches_cli
+    app.cli.add_command(credential_batches_cli)
+    from .student.write_behind import progress_buffer
+    progress_buffer.init_app(app) # Flusher starts with the first buffered save
+
     @app.route('/ping_firebase_mode')
     def ping_firebase_mode():
         return jsonify(message="Pong from MGSCompSciHub Backend (Firebase Auth Mode Active)!")
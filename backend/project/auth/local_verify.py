@@ -0,0 +1,206 @@
+# MGSCompSciHub/backend/project/auth/local_verify.py
+'''
+Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed by keys published as X.509 certificates. Instead of
+letting the Admin SDK fetch those on demand inside a request, SigningKeyStore loads them once at
+startup and a background thread refreshes them according to the source's cache-control max-age,
+so request threads only ever read an in-memory dict.
+'''
+import json
+import logging
+import re
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth_admin
+import jwt
+import requests
+from cryptography.x509 import load_pem_x509_certificate
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_SIGNING_KEYS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+FIREBASE_ISSUER_PREFIX = 'https://securetoken.google.com/'
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+# --- Key sources ---
+# A key source returns (certificates, max_age_seconds) where certificates maps key id -> PEM string.
+class HttpKeySource:
+    '''Fetches signing certificates over HTTP (Google's endpoint, or a local stand-in for offline use).'''
+
+    def __init__(self, url=GOOGLE_SIGNING_KEYS_URL, timeout=10, default_max_age=3600):
+        self.url = url
+        self.timeout = timeout
+        self.default_max_age = default_max_age
+
+    def fetch(self):
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else self.default_max_age
+        return response.json(), max_age
+
+    def __repr__(self):
+        return f'<HttpKeySource {self.url}>'
+
+
+class FileKeySource:
+    '''Reads signing certificates from a JSON file in the same {kid: pem} shape Google serves.'''
+
+    def __init__(self, path, max_age=3600):
+        self.path = path
+        self.max_age = max_age
+
+    def fetch(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f), self.max_age
+
+    def __repr__(self):
+        return f'<FileKeySource {self.path}>'
+
+
+# --- Key store ---
+class SigningKeyStore:
+    '''Holds parsed public keys by key id, refreshed off the request path by a daemon thread.'''
+
+    def __init__(self, source=None, min_refresh_seconds=60, retry_seconds=30):
+        self.source = source
+        self.min_refresh_seconds = min_refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._keys = {} # kid -> public key object; replaced wholesale, never mutated
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refreshed = None
+        self.refresh_count = 0
+        self.refresh_failures = 0
+
+    def init_app(self, app):
+        keys_file = app.config.get('FIREBASE_SIGNING_KEYS_FILE')
+        if keys_file:
+            self.source = FileKeySource(keys_file)
+        else:
+            self.source = HttpKeySource(app.config.get('FIREBASE_SIGNING_KEYS_URL') or GOOGLE_SIGNING_KEYS_URL)
+        self.start()
+
+    def get_key(self, kid):
+        return self._keys.get(kid)
+
+    def has_keys(self):
+        return bool(self._keys)
+
+    def refresh(self):
+        '''Fetches and parses certificates. Returns the max-age to wait before the next refresh.'''
+        certificates, max_age = self.source.fetch()
+        parsed = {kid: load_pem_x509_certificate(pem.encode('utf-8')).public_key() for kid, pem in certificates.items()}
+        with self._lock:
+            self._keys = parsed
+            self.last_refreshed = time.time()
+            self.refresh_count += 1
+        logger.info(f"Loaded {len(parsed)} Firebase signing key(s) from {self.source!r}; next refresh in {max_age}s.")
+        return max_age
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # The first load happens here, at startup, so requests never wait on it.
+        try:
+            delay = self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Initial load of Firebase signing keys from {self.source!r} failed: {e}")
+            delay = self.retry_seconds
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(delay,), name='firebase-signing-keys', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, delay):
+        while not self._stop.wait(max(delay, 1)):
+            try:
+                delay = max(self.refresh(), self.min_refresh_seconds)
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Refreshing Firebase signing keys from {self.source!r} failed, keeping current keys: {e}")
+                delay = self.retry_seconds
+
+    def stats(self):
+        return {
+            "source": repr(self.source),
+            "key_count": len(self._keys),
+            "last_refreshed": self.last_refreshed,
+            "refresh_count": self.refresh_count,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+# --- Verifier ---
+class LocalTokenVerifier:
+    '''
+    Verifies Firebase ID tokens against the key store: RS256 signature plus the aud, iss, exp, iat,
+    sub and auth_time claims. Raises the same firebase_admin.auth errors as verify_id_token so
+    callers handle both modes identically. Revocation is not checked here.
+    '''
+
+    def __init__(self, key_store, project_id=None, clock_skew_seconds=0):
+        self.key_store = key_store
+        self.project_id = project_id
+        self.clock_skew_seconds = clock_skew_seconds
+
+    def init_app(self, app):
+        self.project_id = app.config.get('FIREBASE_PROJECT_ID') or self.project_id
+        self.clock_skew_seconds = app.config.get('FIREBASE_TOKEN_CLOCK_SKEW_SECONDS', self.clock_skew_seconds)
+
+    def _get_project_id(self):
+        if not self.project_id:
+            # Fall back to the project of the initialized Admin SDK app (from the service account key).
+            self.project_id = firebase_admin.get_app().project_id
+        return self.project_id
+
+    def verify(self, id_token):
+        if not isinstance(id_token, str) or not id_token:
+            raise firebase_auth_admin.InvalidIdTokenError('ID token must be a non-empty string.')
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise firebase_auth_admin.InvalidIdTokenError(f'Malformed ID token: {e}', cause=e)
+        if header.get('alg') != 'RS256':
+            raise firebase_auth_admin.InvalidIdTokenError(f'ID token has incorrect algorithm "{header.get("alg")}". Expected "RS256".')
+
+        if not self.key_store.has_keys():
+            raise firebase_auth_admin.CertificateFetchError('No Firebase signing keys are loaded yet.', None)
+        public_key = self.key_store.get_key(header.get('kid'))
+        if public_key is None:
+            raise firebase_auth_admin.InvalidIdTokenError('ID token has "kid" claim which does not correspond to a known public key.')
+
+        project_id = self._get_project_id()
+        try:
+            claims = jwt.decode(
+                id_token, key=public_key, algorithms=['RS256'],
+                audience=project_id, issuer=FIREBASE_ISSUER_PREFIX + project_id,
+                leeway=self.clock_skew_seconds,
+                options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']}
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise firebase_auth_admin.ExpiredIdTokenError('Token expired.', e)
+        except jwt.PyJWTError as e:
+            raise firebase_auth_admin.InvalidIdTokenError(f'Invalid ID token: {e}', cause=e)
+
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise firebase_auth_admin.InvalidIdTokenError('ID token has an invalid "sub" (subject) claim.')
+        auth_time = claims.get('auth_time')
+        if auth_time is not None and auth_time > time.time() + self.clock_skew_seconds:
+            raise firebase_auth_admin.InvalidIdTokenError('ID token has an "auth_time" claim in the future.')
+        claims['uid'] = subject
+        return claims
+
+
+signing_key_store = SigningKeyStore()
+local_token_verifier = LocalTokenVerifier(signing_key_store)
@@ -0,0 +1,136 @@
+# MGSCompSciHub/backend/project/auth/principal_cache.py
+'''
+Process-wide identity map from firebase_uid to a small immutable Principal.
+
+token_required used to load the full User row on every request just so the role decorators could
+read g.current_user.role. The principal cache answers that from memory. Entries are invalidated
+whenever a User row is inserted, updated or deleted through the ORM (at flush and again after
+commit, so a concurrent request can't re-cache the pre-commit row), and expire after a TTL to bound
+staleness for changes made by other worker processes.
+
+Bulk `Query.update()`/core statements bypass ORM events; code using them must call
+principal_cache.invalidate() itself.
+'''
+from collections import OrderedDict
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..models import User, RoleEnum, db
+
+
+class Principal(NamedTuple):
+    '''The parts of a User that authorization and most handlers need. Exposed as g.current_user.'''
+    id: int
+    firebase_uid: str
+    username: str
+    role: RoleEnum
+    student_class_id: Optional[int]
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.firebase_uid, user.username, user.role, user.student_class_id)
+
+    def load_user(self):
+        '''Loads the full User row for handlers that need more than the principal.'''
+        return db.session.get(User, self.id)
+
+
+class PrincipalCache:
+
+    def __init__(self, max_entries=4096, ttl_seconds=60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # firebase_uid -> (expires_at, Principal)
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('PRINCIPAL_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl_seconds = app.config.get('PRINCIPAL_CACHE_TTL_SECONDS', self.ttl_seconds)
+        self.clear()
+
+    def get(self, firebase_uid):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(firebase_uid)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(firebase_uid)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[firebase_uid]
+            self.misses += 1
+            return None
+
+    def load(self, firebase_uid):
+        '''Returns the Principal for a firebase_uid, querying the DB only on a miss. None if no local user.'''
+        principal = self.get(firebase_uid)
+        if principal is not None:
+            return principal
+        user = User.query.filter_by(firebase_uid=firebase_uid).first()
+        if user is None:
+            return None # Not cached: verify_session may create the user at any moment
+        principal = Principal.from_user(user)
+        self.put(principal)
+        return principal
+
+    def put(self, principal):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.firebase_uid] = (time.time() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.firebase_uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, firebase_uid):
+        if not firebase_uid:
+            return
+        with self._lock:
+            self._entries.pop(firebase_uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds,
+                    "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache()
+
+
+# --- Invalidation hooks ---
+def _changed_uids(target):
+    uids = {target.firebase_uid}
+    uids.update(inspect(target).attrs.firebase_uid.history.deleted or ()) # Old UID if it was changed
+    return {uid for uid in uids if uid}
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_on_user_write(mapper, connection, target):
+    session = Session.object_session(target)
+    for uid in _changed_uids(target):
+        principal_cache.invalidate(uid)
+        if session is not None:
+            session.info.setdefault('principal_cache_dirty_uids', set()).add(uid)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for uid in session.info.pop('principal_cache_dirty_uids', ()):
+        principal_cache.invalidate(uid)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _invalidate_after_rollback(session, previous_transaction):
+    # The session may have re-cached its own uncommitted view of the user before rolling back
+    _invalidate_after_commit(session)
@@ -0,0 +1,162 @@
+# MGSCompSciHub/backend/project/auth/revocation.py
+'''
+In-memory revocation index for Firebase users.
+
+verify_id_token(check_revoked=True) costs a get_user round trip per call. Instead, this index maps
+firebase_uid -> (tokens_valid_after in ms, disabled) for every user, rebuilt in bulk from
+list_users() by a background thread and patched immediately when this app revokes or disables a
+user itself. Patches made while a listing is in flight are replayed over it, since the listing may
+predate them. A token is rejected if it was authenticated before the user's tokens_valid_after.
+
+If the index has not been refreshed within the configured staleness window (e.g. Firebase has been
+unreachable), check() falls back to a per-request get_user lookup, so revocations are never missed
+for longer than that window.
+'''
+import logging
+import threading
+import time
+
+from firebase_admin import auth as firebase_auth_admin
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationIndex:
+
+    def __init__(self, refresh_seconds=300, max_staleness_seconds=900, retry_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.retry_seconds = retry_seconds
+        self._entries = {} # firebase_uid -> (tokens_valid_after_ms, disabled)
+        self._pending = None # firebase_uid -> entry, for app-side updates made during a refresh
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refreshed = None
+        self.refresh_failures = 0
+        self.fallback_lookups = 0
+        self.revoked_rejections = 0
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('REVOCATION_INDEX_REFRESH_SECONDS', self.refresh_seconds)
+        self.max_staleness_seconds = app.config.get('REVOCATION_INDEX_MAX_STALENESS_SECONDS', self.max_staleness_seconds)
+        self.start()
+
+    # --- Bulk refresh ---
+    def refresh(self):
+        with self._lock:
+            self._pending = {}
+        try:
+            entries = {}
+            for user in firebase_auth_admin.list_users().iterate_all():
+                entries[user.uid] = (user.tokens_valid_after_timestamp or 0, bool(user.disabled))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            # Revocations recorded before the listing started are kept if the listing lags behind them
+            for uid, (valid_after_ms, disabled) in self._entries.items():
+                listed = entries.get(uid)
+                if listed is None:
+                    entries[uid] = (valid_after_ms, disabled)
+                elif listed[0] < valid_after_ms:
+                    entries[uid] = (valid_after_ms, listed[1])
+            # Updates made while it was in flight win outright, disabled flag included
+            entries.update(self._pending)
+            self._pending = None
+            self._entries = entries
+            self.last_refreshed = time.time()
+        logger.info(f"Revocation index refreshed with {len(entries)} Firebase user(s).")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        try:
+            self.refresh()
+            delay = self.refresh_seconds
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Initial revocation index load failed; falling back to per-request checks until it succeeds: {e}")
+            delay = self.retry_seconds
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(delay,), name='firebase-revocation-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, delay):
+        while not self._stop.wait(max(delay, 1)):
+            try:
+                self.refresh()
+                delay = self.refresh_seconds
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Revocation index refresh failed, keeping current index: {e}")
+                delay = self.retry_seconds
+
+    def is_fresh(self):
+        return self.last_refreshed is not None and (time.time() - self.last_refreshed) <= self.max_staleness_seconds
+
+    # --- App-side updates ---
+    def _record(self, firebase_uid, entry):
+        # Caller holds self._lock
+        self._entries[firebase_uid] = entry
+        if self._pending is not None:
+            self._pending[firebase_uid] = entry
+
+    def record_revocation(self, firebase_uid, valid_after_ms=None):
+        if valid_after_ms is None:
+            valid_after_ms = int(time.time()) * 1000 # Firebase stores validSince with second precision
+        with self._lock:
+            _, disabled = self._entries.get(firebase_uid, (0, False))
+            self._record(firebase_uid, (valid_after_ms, disabled))
+
+    def record_disabled(self, firebase_uid, disabled=True):
+        with self._lock:
+            valid_after_ms, _ = self._entries.get(firebase_uid, (0, False))
+            self._record(firebase_uid, (valid_after_ms, disabled))
+
+    # --- Per-request check ---
+    def check(self, decoded_token):
+        '''Raises RevokedIdTokenError / UserDisabledError like verify_id_token(check_revoked=True).'''
+        if not self.is_fresh():
+            self.fallback_lookups += 1
+            entry = self.check_remote(decoded_token)
+            with self._lock:
+                self._record(decoded_token['uid'], entry)
+            return
+        entry = self._entries.get(decoded_token['uid'])
+        if entry is None:
+            return # Not revoked or disabled as of the last refresh
+        self._enforce(decoded_token, entry)
+
+    def check_remote(self, decoded_token):
+        '''The same check against a get_user lookup; also used by local verification without the index.'''
+        user = firebase_auth_admin.get_user(decoded_token['uid'])
+        entry = (user.tokens_valid_after_timestamp or 0, bool(user.disabled))
+        self._enforce(decoded_token, entry)
+        return entry
+
+    def _enforce(self, decoded_token, entry):
+        valid_after_ms, disabled = entry
+        if disabled:
+            raise firebase_auth_admin.UserDisabledError('The user record is disabled.')
+        auth_time = decoded_token.get('auth_time', decoded_token.get('iat', 0))
+        if auth_time * 1000 < valid_after_ms:
+            self.revoked_rejections += 1
+            raise firebase_auth_admin.RevokedIdTokenError('The Firebase ID token has been revoked.')
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "last_refreshed": self.last_refreshed,
+            "fresh": self.is_fresh(),
+            "refresh_failures": self.refresh_failures,
+            "fallback_lookups": self.fallback_lookups,
+            "revoked_rejections": self.revoked_rejections,
+        }
+
+
+revocation_index = RevocationIndex()
@@ -2,13 +2,141 @@
 from flask import request, jsonify, current_app, g
 from . import auth_bp
 from ..models import User, RoleEnum, db
+from .utils import verify_firebase_id_token
+from .principal_cache import principal_cache
+from .token_cache import hash_id_token
+from .singleflight import SingleFlight
+from ..db_utils import dialect_insert
+from ..metrics import counters
+from ..etags import bump_class_version
 import firebase_admin
-from firebase_admin import auth as firebase_auth_admin # Alias for clarity
 import logging
 import traceback # For detailed exception printing
 
 logger = logging.getLogger(__name__)
 
+# When a class logs in together, AuthContext can fire several verify_session calls for the same
+# user at once. Coalesce them so only one verifies the token and upserts the User row; the rest
+# share its result instead of racing on the unique username/firebase_uid constraints.
+verify_session_flights = SingleFlight()
+
+def _coalesce(key, fn, *args):
+    if not current_app.config.get('VERIFY_SESSION_SINGLE_FLIGHT', True):
+        return fn(*args)
+    result, _ = verify_session_flights.do(key, fn, *args)
+    return result
+
+def _frontend_user(user, name_from_token):
+    user_data_for_frontend = {
+        "id": user.id, 
+        "firebase_uid": user.firebase_uid,
+        "username": user.username, 
+        "email": user.email,
+        "displayName": name_from_token or user.username,
+        "role": user.role.value
+    }
+    if user.role == RoleEnum.STUDENT:
+        user_data_for_frontend["class_id"] = user.student_class_id
+        if user.assigned_class:
+             user_data_for_frontend["class_name"] = user.assigned_class.name
+    return user_data_for_frontend
+
+def _sync_local_user(decoded_token):
+    '''
+    Ensures a local User exists and is up to date for a verified Firebase token.
+    Returns (response_body, status_code) as plain data so concurrent logins can share it.
+    '''
+    firebase_uid = decoded_token['uid']
+    email_from_token = decoded_token.get('email')
+    name_from_token = decoded_token.get('name') 
+    sign_in_provider = decoded_token.get('firebase', {}).get('sign_in_provider', 'unknown')
+
+    logger.info(f"verify_session: Token processed for Firebase UID: {firebase_uid}, Email: {email_from_token}, Name: {name_from_token}, Provider: {sign_in_provider}")
+
+    user = User.query.filter_by(firebase_uid=firebase_uid).first()
+
+    if not user:
+        logger.info(f"verify_session: No local user found for Firebase UID {firebase_uid}. Creating new local user.")
+        user_role = RoleEnum.STUDENT 
+        app_username = None
+
+        is_teacher_email = False
+        if email_from_token:
+            if email_from_token.lower() == "dannymill@hotmail.co.uk":
+                is_teacher_email = True
+                logger.info(f"verify_session: Email {email_from_token} matches configured teacher email.")
+
+        if sign_in_provider == 'microsoft.com' or (sign_in_provider == 'password' and is_teacher_email):
+            user_role = RoleEnum.TEACHER
+            app_username = email_from_token or firebase_uid 
+            logger.info(f"verify_session: Assigning TEACHER role to {app_username}.")
+        else:
+            user_role = RoleEnum.STUDENT
+            app_username = name_from_token or firebase_uid 
+            logger.info(f"verify_session: Assigning STUDENT role to {app_username} (Firebase UID: {firebase_uid}).")
+
+        # One INSERT ... ON CONFLICT DO NOTHING instead of check-then-insert: a concurrent login
+        # (e.g. from another worker) that already created the row simply makes this a no-op.
+        insert_stmt = dialect_insert(User).values(
+            firebase_uid=firebase_uid,
+            username=app_username,
+            email=email_from_token,
+            role=user_role,
+            is_mock_teacher=False
+        ).on_conflict_do_nothing().returning(User)
+        user = db.session.scalars(insert_stmt).first() # The new row itself, so no second SELECT
+        if user is None:
+            db.session.rollback()
+            # Nothing inserted: either a concurrent login created this user, or the username/email
+            # belongs to a different account
+            user = User.query.filter_by(firebase_uid=firebase_uid).first()
+        else:
+            user_data_for_frontend = _frontend_user(user, name_from_token) # Read before the commit expires it
+            db.session.commit()
+            counters.incr('verify_session.writes')
+            principal_cache.invalidate(firebase_uid)
+            logger.info(f"verify_session: Local user '{user_data_for_frontend['username']}' (Role: {user_data_for_frontend['role']}) created for Firebase UID {firebase_uid}.")
+            return {"success": True, "isLoggedIn": True, "user": user_data_for_frontend}, 200
+        if not user:
+            if email_from_token and User.query.filter(User.email == email_from_token).first():
+                logger.warning(f"verify_session: Email {email_from_token} for new Firebase user {firebase_uid} already exists for another local user. Account conflict.")
+                return {"success": False, "isLoggedIn": False, "message": "Email already associated with a different account."}, 409
+            logger.warning(f"verify_session: Username {app_username} for new Firebase user {firebase_uid} already exists for another local user. Account conflict.")
+            return {"success": False, "isLoggedIn": False, "message": "Username already associated with a different account."}, 409
+        logger.info(f"verify_session: Local user '{user.username}' (Role: {user.role.value}) was created by a concurrent login for Firebase UID {firebase_uid}.")
+    else:
+        logger.info(f"verify_session: Local user '{user.username}' found for Firebase UID {firebase_uid}. Current role: {user.role.value}.")
+        user_changed = False
+        if email_from_token and user.email != email_from_token:
+            user.email = email_from_token
+            user_changed = True
+            logger.info(f"verify_session: Updated email for user {user.username} to {email_from_token}.")
+        
+        is_recognized_teacher_email_for_existing = False
+        if email_from_token and email_from_token.lower() == "dannymill@hotmail.co.uk":
+             is_recognized_teacher_email_for_existing = True
+
+        if (sign_in_provider == 'microsoft.com' or (sign_in_provider == 'password' and is_recognized_teacher_email_for_existing)) and user.role != RoleEnum.TEACHER:
+            logger.warning(f"verify_session: Existing user {user.username} (UID: {user.firebase_uid}, Role: {user.role.value}) is now being recognized as a TEACHER. Updating role.")
+            user.role = RoleEnum.TEACHER
+            user_changed = True
+        
+        if user_changed:
+            if user.student_class_id: # The class details list students' emails
+                bump_class_version(user.student_class_id)
+            db.session.commit()
+            counters.incr('verify_session.writes')
+            principal_cache.invalidate(firebase_uid) # Email/role changed
+            logger.info(f"verify_session: Updates for existing user '{user.username}' committed.")
+        else:
+            # Nothing changed: no UPDATE, no commit, so routine logins never queue for the write lock
+            counters.incr('verify_session.writes_skipped')
+
+    user_data_for_frontend = _frontend_user(user, name_from_token)
+    
+    logger.info(f"verify_session: Success for Firebase UID {firebase_uid}. Returning user data: {user_data_for_frontend}")
+    return {"success": True, "isLoggedIn": True, "user": user_data_for_frontend}, 200
+
 @auth_bp.route('/firebase/verify_session', methods=['POST'])
 def firebase_verify_session():
     '''
@@ -38,102 +166,14 @@ def firebase_verify_session():
 
     try:
         logger.debug("Attempting to verify Firebase ID token...")
-        print("--- DEBUG: Attempting firebase_auth_admin.verify_id_token ---")
-        decoded_token = firebase_auth_admin.verify_id_token(
-            firebase_token, 
-            app=firebase_admin.get_app(), 
-            check_revoked=True
-        )
+        # Admin SDK or local verification, per config; identical tokens in flight share one verification
+        decoded_token = _coalesce(('verify', hash_id_token(firebase_token)), verify_firebase_id_token, firebase_token)
         print(f"--- DEBUG: Token verified. UID: {decoded_token.get('uid')} ---")
         logger.debug(f"Firebase ID token verified successfully. UID: {decoded_token.get('uid')}")
         
         firebase_uid = decoded_token['uid']
-        email_from_token = decoded_token.get('email')
-        name_from_token = decoded_token.get('name') 
-        sign_in_provider = decoded_token.get('firebase', {}).get('sign_in_provider', 'unknown')
-
-        logger.info(f"verify_session: Token processed for Firebase UID: {firebase_uid}, Email: {email_from_token}, Name: {name_from_token}, Provider: {sign_in_provider}")
-        print(f"--- DEBUG: Processing user with UID: {firebase_uid}, Email: {email_from_token} ---")
-
-        user = User.query.filter_by(firebase_uid=firebase_uid).first()
-
-        if not user:
-            logger.info(f"verify_session: No local user found for Firebase UID {firebase_uid}. Creating new local user.")
-            print(f"--- DEBUG: No local user for UID {firebase_uid}. Creating new. ---")
-            user_role = RoleEnum.STUDENT 
-            app_username = None
-
-            is_teacher_email = False
-            if email_from_token:
-                if email_from_token.lower() == "dannymill@hotmail.co.uk":
-                    is_teacher_email = True
-                    logger.info(f"verify_session: Email {email_from_token} matches configured teacher email.")
-                    print(f"--- DEBUG: Email {email_from_token} matches teacher email. ---")
-
-            if sign_in_provider == 'microsoft.com' or (sign_in_provider == 'password' and is_teacher_email):
-                user_role = RoleEnum.TEACHER
-                app_username = email_from_token or firebase_uid 
-                logger.info(f"verify_session: Assigning TEACHER role to {app_username}.")
-                print(f"--- DEBUG: Assigning TEACHER role to {app_username}. ---")
-                if email_from_token: 
-                    existing_user_by_email = User.query.filter(User.email == email_from_token, User.firebase_uid != firebase_uid).first()
-                    if existing_user_by_email:
-                        logger.warning(f"verify_session: Email {email_from_token} for new Firebase user {firebase_uid} already exists for local user {existing_user_by_email.username} (UID: {existing_user_by_email.firebase_uid}). Account conflict.")
-                        print(f"--- DEBUG: Email conflict for {email_from_token}. ---")
-                        return jsonify({"success": False, "isLoggedIn": False, "message": "Email already associated with a different account."}), 409
-            else:
-                user_role = RoleEnum.STUDENT
-                app_username = name_from_token or firebase_uid 
-                logger.info(f"verify_session: Assigning STUDENT role to {app_username} (Firebase UID: {firebase_uid}).")
-                print(f"--- DEBUG: Assigning STUDENT role to {app_username}. ---")
-            
-            user = User(
-                firebase_uid=firebase_uid,
-                username=app_username,
-                email=email_from_token,
-                role=user_role,
-                is_mock_teacher=False 
-            )
-            db.session.add(user)
-            db.session.commit()
-            logger.info(f"verify_session: New local user '{user.username}' (Role: {user_role.value}) created and committed for Firebase UID {firebase_uid}.")
-            print(f"--- DEBUG: New local user '{user.username}' created. ---")
-        else:
-            logger.info(f"verify_session: Local user '{user.username}' found for Firebase UID {firebase_uid}. Current role: {user.role.value}.")
-            print(f"--- DEBUG: Local user '{user.username}' found. Role: {user.role.value} ---")
-            if email_from_token and user.email != email_from_token:
-                user.email = email_from_token
-                logger.info(f"verify_session: Updated email for user {user.username} to {email_from_token}.")
-            
-            is_recognized_teacher_email_for_existing = False
-            if email_from_token and email_from_token.lower() == "dannymill@hotmail.co.uk":
-                 is_recognized_teacher_email_for_existing = True
-
-            if (sign_in_provider == 'microsoft.com' or (sign_in_provider == 'password' and is_recognized_teacher_email_for_existing)) and user.role != RoleEnum.TEACHER:
-                logger.warning(f"verify_session: Existing user {user.username} (UID: {user.firebase_uid}, Role: {user.role.value}) is now being recognized as a TEACHER. Updating role.")
-                print(f"--- DEBUG: Updating role to TEACHER for existing user {user.username}. ---")
-                user.role = RoleEnum.TEACHER
-            
-            db.session.commit()
-            logger.info(f"verify_session: Updates for existing user '{user.username}' committed.")
-            print(f"--- DEBUG: Updates for user '{user.username}' committed. ---")
-
-        user_data_for_frontend = {
-            "id": user.id, 
-            "firebase_uid": user.firebase_uid,
-            "username": user.username, 
-            "email": user.email,
-            "displayName": name_from_token or user.username,
-            "role": user.role.value
-        }
-        if user.role == RoleEnum.STUDENT:
-            user_data_for_frontend["class_id"] = user.student_class_id
-            if user.assigned_class:
-                 user_data_for_frontend["class_name"] = user.assigned_class.name
-        
-        logger.info(f"verify_session: Success for Firebase UID {firebase_uid}. Returning user data: {user_data_for_frontend}")
-        print(f"--- DEBUG: Successfully processed user {firebase_uid}. Returning success. ---")
-        return jsonify({"success": True, "isLoggedIn": True, "user": user_data_for_frontend})
+        response_body, status_code = _coalesce(('sync_user', firebase_uid), _sync_local_user, decoded_token)
+        return jsonify(response_body), status_code
 
     except firebase_admin.auth.UserNotFoundError as e:
         logger.warning(f"verify_session: Firebase user associated with the token was not found (deleted after token issuance?): {str(e)}")
@@ -151,6 +191,9 @@ def firebase_verify_session():
         logger.warning(f"verify_session: Firebase ID token has been REVOKED: {str(e)}")
         print(f"!!! VERIFY_SESSION ERROR: Revoked Firebase ID Token: {str(e)} !!!")
         return jsonify({"success": False, "isLoggedIn": False, "message": f"Authentication token issue: Token revoked."}), 401
+    except firebase_admin.auth.UserDisabledError as e:
+        logger.warning(f"verify_session: Firebase user account is DISABLED: {str(e)}")
+        return jsonify({"success": False, "isLoggedIn": False, "message": "User account has been disabled."}), 403
     except firebase_admin.auth.CertificateFetchError as e:
         logger.error(f"verify_session: Could not fetch Firebase public keys to verify token signature: {str(e)}. This is often a network or Firebase Admin SDK setup issue.")
         print(f"!!! VERIFY_SESSION ERROR: Certificate Fetch Error: {str(e)} !!!") # This might be a 500
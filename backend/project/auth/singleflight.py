@@ -0,0 +1,64 @@
+# MGSCompSciHub/backend/project/auth/singleflight.py
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    '''
+    Coalesces concurrent calls that share a key: the first caller (the leader) runs the function,
+    callers arriving while it is in flight wait and receive the leader's result (or exception).
+    Nothing is cached once the call completes. Results are shared across threads, so they must
+    be plain data, never ORM objects bound to the leader's session.
+    '''
+
+    def __init__(self, wait_timeout=30):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        '''Returns (result, shared) where shared is True if another caller's result was reused.'''
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                is_leader = True
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                is_leader = False
+
+        if not is_leader:
+            if call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.shared += 1
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            # The leader is stuck; do the work ourselves rather than fail the request
+            return fn(*args, **kwargs), False
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
@@ -0,0 +1,120 @@
+# MGSCompSciHub/backend/project/auth/token_cache.py
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+
+def hash_id_token(id_token):
+    '''Cache key for an ID token. The raw token is never stored.'''
+    return hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+
+
+class VerifiedTokenCache:
+    '''
+    Bounded LRU/TTL cache of decoded Firebase ID token claims, keyed by a hash of the token.
+    Entries live until the token's own `exp` or the configured TTL, whichever comes first,
+    so a cache hit never outlives the token it was verified from.
+    '''
+
+    def __init__(self, max_entries=1024, ttl_seconds=300, enabled=True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (expires_at, decoded_token)
+        self._keys_by_uid = {} # firebase_uid -> set of keys, for per-user invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('TOKEN_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl_seconds = app.config.get('TOKEN_CACHE_TTL_SECONDS', self.ttl_seconds)
+        self.enabled = app.config.get('TOKEN_CACHE_ENABLED', self.enabled)
+        self.clear()
+
+    def get(self, id_token):
+        if not self.enabled:
+            return None
+        key = hash_id_token(id_token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, decoded_token = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded_token
+
+    def put(self, id_token, decoded_token):
+        if not self.enabled or self.max_entries <= 0:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        token_exp = decoded_token.get('exp')
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        if expires_at <= now:
+            return
+        key = hash_id_token(id_token)
+        uid = decoded_token.get('uid')
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, decoded_token)
+            if uid:
+                self._keys_by_uid.setdefault(uid, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate(self, id_token):
+        with self._lock:
+            self._remove(hash_id_token(id_token))
+
+    def invalidate_uid(self, firebase_uid):
+        '''Drops every cached token for a user, e.g. after their tokens are revoked.'''
+        with self._lock:
+            for key in list(self._keys_by_uid.get(firebase_uid, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_uid.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+            }
+
+    def _remove(self, key):
+        # Caller must hold self._lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        uid = entry[1].get('uid')
+        uid_keys = self._keys_by_uid.get(uid)
+        if uid_keys is not None:
+            uid_keys.discard(key)
+            if not uid_keys:
+                del self._keys_by_uid[uid]
+
+
+verified_token_cache = VerifiedTokenCache()
@@ -0,0 +1,113 @@
+# MGSCompSciHub/backend/project/auth/usernames.py
+'''
+Allocator for two-word student usernames ("clever_badger", then "clever_badger2" ...).
+
+The used names are loaded from the DB once per process into a set, and free combinations are
+pre-shuffled into a list so handing one out is a pop(). Each batch costs a single
+`username IN (...)` query to catch names taken by another worker process since the load.
+Names are reserved in memory as soon as they are handed out, so concurrent requests in this
+process never receive the same name.
+'''
+import random
+import re
+import threading
+
+from ..models import User, db
+
+ADJECTIVES = ["sunny", "clever", "brave", "quick", "happy", "bright", "gentle", "lucky", "proud", "calm", "eager", "fancy", "jolly", "kind", "merry", "nice", "open", "sharp", "tidy", "witty",
+              "bold", "cosy", "daring", "fair", "fresh", "grand", "keen", "lively", "mighty", "noble", "plucky", "quiet", "rapid", "smart", "steady", "swift", "true", "vivid", "warm", "zesty"]
+NOUNS = ["dolphin", "badger", "eagle", "tiger", "river", "mountain", "forest", "ocean", "meadow", "comet", "apple", "berry", "cloud", "diamond", "engine", "flower", "guitar", "harbor", "island", "jacket",
+         "anchor", "beacon", "canyon", "falcon", "galaxy", "glacier", "hazel", "kestrel", "lantern", "maple", "nebula", "otter", "panda", "pebble", "puffin", "rocket", "saturn", "summit", "walrus", "willow"]
+
+FALLBACK_ATTEMPTS = 1000
+
+
+class UsernamePool:
+
+    def __init__(self, adjectives=ADJECTIVES, nouns=NOUNS, max_suffix=99):
+        self.adjectives = list(adjectives)
+        self.nouns = list(nouns)
+        self.max_suffix = max_suffix
+        self._lock = threading.Lock()
+        self._used = None # Set of taken usernames, loaded on first use
+        self._free = [] # Shuffled free names in the current tier; pop() hands one out
+        self._tier = 0 # 0 = "adj_noun", k >= 2 = "adj_nounk"
+        self._pool_name = re.compile(f"({'|'.join(self.adjectives)})_({'|'.join(self.nouns)})\\d*")
+
+    def init_app(self, app):
+        self.max_suffix = app.config.get('USERNAME_MAX_SUFFIX', self.max_suffix)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._used = None
+            self._free = []
+            self._tier = 0
+
+    def _load_used(self):
+        self._used = {username for (username,) in db.session.query(User.username)}
+
+    def _tier_candidates(self, tier):
+        suffix = '' if tier == 0 else str(tier)
+        return [f"{adj}_{noun}{suffix}" for adj in self.adjectives for noun in self.nouns]
+
+    def _next_free(self):
+        '''Hands out one free name and marks it used, so a batch never contains the same name twice.'''
+        while not self._free:
+            if self._tier > self.max_suffix:
+                name = self._random_fallback()
+                break
+            candidates = [name for name in self._tier_candidates(self._tier) if name not in self._used]
+            random.shuffle(candidates)
+            self._free = candidates
+            self._tier = 2 if self._tier == 0 else self._tier + 1
+        else:
+            name = self._free.pop()
+        self._used.add(name)
+        return name
+
+    def _random_fallback(self):
+        # Every combination is taken: fall back to the old random scheme, with a bounded number of draws
+        for _ in range(FALLBACK_ATTEMPTS):
+            name = f"user{random.randint(10000, 99999)}"
+            if name not in self._used:
+                return name
+        raise RuntimeError("No free student usernames left; raise USERNAME_MAX_SUFFIX.")
+
+    def allocate(self, count):
+        '''Returns `count` distinct usernames free in the DB, using one query per call (plus the initial load).'''
+        with self._lock:
+            if self._used is None:
+                self._load_used()
+            picked = [self._next_free() for _ in range(count)]
+            # Names another process may have taken since the load; usually none
+            taken = {username for (username,) in db.session.query(User.username).filter(User.username.in_(picked))}
+            while taken:
+                replacements = [self._next_free() for _ in taken]
+                picked = [name for name in picked if name not in taken] + replacements
+                taken = {username for (username,) in db.session.query(User.username).filter(User.username.in_(replacements))}
+            return picked
+
+    def reserve(self, usernames):
+        '''Marks names chosen outside the pool (e.g. from an uploaded roster) as taken.'''
+        usernames = set(usernames)
+        with self._lock:
+            if self._used is None:
+                self._load_used()
+            self._used.update(usernames)
+            if any(self._pool_name.fullmatch(name) for name in usernames):
+                self._free = [name for name in self._free if name not in usernames]
+
+    def release(self, usernames):
+        '''Returns names that were allocated or reserved but never saved, so they can be used again.'''
+        with self._lock:
+            if self._used is None:
+                return
+            for name in usernames:
+                if name in self._used:
+                    self._used.discard(name)
+                    if self._pool_name.fullmatch(name): # Only generated names go back to the free list
+                        self._free.append(name)
+
+
+username_pool = UsernamePool()
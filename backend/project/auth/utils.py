@@ -3,29 +3,20 @@ from functools import wraps
 from flask import request, jsonify, current_app, g
 import firebase_admin
 from firebase_admin import auth as firebase_auth_admin # Renamed to avoid conflicts
-from ..models import User, RoleEnum, db # To find/create user in your DB
+from ..models import RoleEnum, db # To find/create user in your DB
+from .token_cache import verified_token_cache
+from .local_verify import local_token_verifier
+from .revocation import revocation_index
+from .principal_cache import principal_cache
+from .usernames import username_pool
 import random
 import string
 
 # --- Username/Password Generation Utilities (still useful for student creation) ---
-ADJECTIVES = ["sunny", "clever", "brave", "quick", "happy", "bright", "gentle", "lucky", "proud", "calm", "eager", "fancy", "jolly", "kind", "merry", "nice", "open", "sharp", "tidy", "witty"]
-NOUNS = ["dolphin", "badger", "eagle", "tiger", "river", "mountain", "forest", "ocean", "meadow", "comet", "apple", "berry", "cloud", "diamond", "engine", "flower", "guitar", "harbor", "island", "jacket"]
-
-def _check_app_username_exists(app_username):
-    # This checks if the two-word username already exists in your local User.username field
-    return User.query.filter_by(username=app_username).first() is not None
-
 def generate_unique_app_username():
     '''Generates a unique two-word username for app display/internal reference.'''
-    max_attempts = 100 
-    for _ in range(max_attempts):
-        adj = random.choice(ADJECTIVES)
-        noun = random.choice(NOUNS)
-        username = f"{adj}_{noun}"
-        if not _check_app_username_exists(username):
-            return username
-    # Fallback if unique username not found
-    return f"user{random.randint(10000, 99999)}"
+    # Batches should call username_pool.allocate(n) directly: one query for the whole batch
+    return username_pool.allocate(1)[0]
 
 def generate_random_password(length=10):
     '''Generates a random password with letters, digits, and a special character.'''
@@ -40,6 +31,47 @@ def generate_random_password(length=10):
     random.shuffle(password_list)
     return "".join(password_list)
 
+# --- Firebase Token Verification ---
+def verify_firebase_id_token(id_token):
+    '''
+    Verifies a Firebase ID token, returning the decoded claims.
+    In 'admin_sdk' mode the Admin SDK checks the token; in 'local' mode the signature and claims
+    are checked against locally cached signing keys.
+    Revocation is checked per FIREBASE_REVOCATION_CHECK: 'remote' asks Firebase on every cache
+    miss (check_revoked=True, or a get_user lookup in local mode), 'index' consults the in-memory
+    revocation index on every call.
+    Results are kept in the in-process verified-token cache, so repeat calls with the same token
+    (e.g. every autosave from a student) skip verification entirely.
+    Raises the same firebase_admin.auth errors as verify_id_token.
+    '''
+    use_revocation_index = current_app.config.get('FIREBASE_REVOCATION_CHECK') == 'index'
+    decoded_token = verified_token_cache.get(id_token)
+    if decoded_token is None:
+        if current_app.config.get('FIREBASE_TOKEN_VERIFICATION') == 'local':
+            decoded_token = local_token_verifier.verify(id_token)
+            if not use_revocation_index:
+                revocation_index.check_remote(decoded_token) # Same revoked/disabled checks as check_revoked=True
+        else:
+            decoded_token = firebase_auth_admin.verify_id_token(
+                id_token, app=firebase_admin.get_app(), check_revoked=not use_revocation_index
+            )
+        verified_token_cache.put(id_token, decoded_token)
+    if use_revocation_index:
+        revocation_index.check(decoded_token) # O(1) dict lookup, also applied to cache hits
+    return decoded_token
+
+def revoke_firebase_user_tokens(firebase_uid):
+    '''Revokes a user's refresh tokens and makes this process reject their existing ID tokens immediately.'''
+    firebase_auth_admin.revoke_refresh_tokens(firebase_uid, app=firebase_admin.get_app())
+    revocation_index.record_revocation(firebase_uid)
+    verified_token_cache.invalidate_uid(firebase_uid)
+
+def set_firebase_user_disabled(firebase_uid, disabled=True):
+    '''Disables (or re-enables) a Firebase user and updates the revocation index straight away.'''
+    firebase_auth_admin.update_user(firebase_uid, disabled=disabled, app=firebase_admin.get_app())
+    revocation_index.record_disabled(firebase_uid, disabled)
+    verified_token_cache.invalidate_uid(firebase_uid)
+
 # --- Firebase Token Verification Decorator ---
 def token_required(f):
     @wraps(f)
@@ -54,15 +86,15 @@ def token_required(f):
             return jsonify({'success': False, 'message': 'Authentication token is missing.'}), 401
 
         try:
-            # Verify the ID token while checking if the token is revoked by passing check_revoked=True.
+            # Verify the ID token (revocation included), served from the verified-token cache when possible.
             # This requires the Firebase Admin SDK to be initialized.
-            decoded_token = firebase_auth_admin.verify_id_token(token, app=firebase_admin.get_app(), check_revoked=True)
+            decoded_token = verify_firebase_id_token(token)
             
             g.firebase_uid = decoded_token['uid']
             g.firebase_token_info = decoded_token # Store full decoded token if needed by route
 
-            # Find user in your local DB based on Firebase UID
-            user = User.query.filter_by(firebase_uid=g.firebase_uid).first()
+            # Find user in your local DB based on Firebase UID (served from the principal cache when possible)
+            user = principal_cache.load(g.firebase_uid)
             
             if not user:
                 # This case means the Firebase token is valid, but we don't have a corresponding user
@@ -72,7 +104,7 @@ def token_required(f):
                 current_app.logger.warning(f"No local user record found for Firebase UID: {g.firebase_uid}. Token was valid.")
                 return jsonify({'success': False, 'message': 'User not fully provisioned in application. Please ensure login process completed.'}), 403
 
-            g.current_user = user # Make your local User object available via Flask's g
+            g.current_user = user # Principal (id, firebase_uid, username, role, student_class_id); user.load_user() for the full row
 
         except firebase_admin.auth.InvalidIdTokenError:
             current_app.logger.warning("Invalid Firebase ID Token received.")
@@ -0,0 +1,53 @@
+# MGSCompSciHub/backend/project/db_utils.py
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from .extensions import db
+from .models import IdSequence, User
+
+# A sequence created on first use starts this far above the highest user id. Student emails used to
+# be numbered COUNT(*) + position (at most 50 per batch), which never exceeds MAX(id) + 50, so the
+# new numbers cannot collide with existing addresses. Migration 5c1e9f3b7a20 seeds with the same value.
+SEQUENCE_START_MARGIN = 51
+
+_DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+def check_upsert_support(app):
+    '''Fails app start-up on a database without INSERT ... ON CONFLICT support here, not mid-request.'''
+    backend_name = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    if backend_name not in _DIALECT_INSERTS:
+        raise RuntimeError(f"Unsupported database '{backend_name}': DATABASE_URL must point to PostgreSQL or SQLite "
+                           f"({', '.join(sorted(_DIALECT_INSERTS))}), which provide the upserts this app relies on.")
+
+
+def dialect_insert(model):
+    '''
+    Returns an INSERT construct for the bound database's dialect, so callers can use
+    on_conflict_do_nothing()/on_conflict_do_update() on both SQLite and PostgreSQL.
+    Other databases are rejected when the app starts (see check_upsert_support).
+    '''
+    return _DIALECT_INSERTS[db.session.get_bind().dialect.name](model)
+
+
+def reserve_id_block(sequence_name, count):
+    '''
+    Reserves `count` consecutive values of a named sequence with a single UPDATE ... RETURNING
+    (SQLite >= 3.35 and PostgreSQL) and returns the first one. The reservation runs and commits on
+    its own connection, so it never commits the caller's session and the row lock isn't held while
+    the caller talks to Firebase; unused values are simply skipped, never reissued.
+    '''
+    sequences = IdSequence.__table__
+    bump = update(sequences).where(sequences.c.name == sequence_name)\
+        .values(next_value=sequences.c.next_value + count)\
+        .returning(sequences.c.next_value)
+    with db.engine.begin() as conn:
+        next_value = conn.execute(bump).scalar()
+        if next_value is None:
+            # First use without the migration's seed row: start above every existing user id
+            start = conn.execute(select(func.coalesce(func.max(User.__table__.c.id), 0) + SEQUENCE_START_MARGIN)).scalar()
+            conn.execute(dialect_insert(sequences).values(name=sequence_name, next_value=start).on_conflict_do_nothing())
+            next_value = conn.execute(bump).scalar()
+    return next_value - count
@@ -0,0 +1,50 @@
+# MGSCompSciHub/backend/project/etags.py
+'''
+ETags for polled read endpoints, derived from cheap version stamps rather than the response body.
+
+A stamp is a small tuple read with one aggregate query (row counts, max ids, a last-activity
+time) plus Class.version, a counter bumped in the same transaction as any change to a class's
+roster or assignments that counts and max ids would not reveal (see bump_class_version). When the
+client's If-None-Match matches, the route answers 304 without running the view's real queries or
+serializing anything.
+'''
+import hashlib
+
+from flask import Response, request
+from sqlalchemy import update
+
+from .metrics import counters
+from .models import db, Class
+
+
+def bump_class_version(class_id):
+    '''Invalidates ETags covering the class. Call inside the transaction that makes the change.'''
+    db.session.execute(
+        update(Class).where(Class.id == class_id).values(version=Class.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def make_etag(*stamp):
+    # Hashing the stamp (not the body) keeps the header short and hides raw ids and counts
+    return hashlib.sha1(repr(stamp).encode('utf-8')).hexdigest()[:32]
+
+
+def conditional_response(name, stamp, build_response):
+    '''
+    Returns a 304 if the request's If-None-Match matches the stamp's ETag; otherwise calls
+    build_response() and tags its result. `name` identifies the endpoint in the counters.
+    A None stamp (e.g. not found) skips ETag handling and leaves the outcome to build_response().
+    '''
+    if stamp is None:
+        return build_response()
+    etag = make_etag(name, *stamp)
+    if etag in request.if_none_match:
+        counters.incr(f'etag.{name}.not_modified')
+        response = Response(status=304)
+    else:
+        counters.incr(f'etag.{name}.full')
+        response = build_response()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' # Cache per user, but always revalidate
+    return response
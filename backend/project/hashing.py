@@ -0,0 +1,83 @@
+# MGSCompSciHub/backend/project/hashing.py
+'''
+Password hashing off the request thread.
+
+pbkdf2_sha256 is deliberately slow (tens of ms per password at the default rounds), so hashing a
+batch of generated student passwords inline blocks a worker for seconds. PasswordHashingService
+spreads a batch across a process pool (hashing is CPU-bound, so threads would serialize on the
+GIL). Small batches are hashed in-process, where starting workers would cost more than it saves.
+
+The pool is created by init_app at app start and starts its workers through a forkserver (spawn
+where that is unavailable): the web process already runs background threads, and forking a
+multi-threaded process can leave a child deadlocked on a lock some other thread held.
+'''
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.hash import pbkdf2_sha256
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_password(password, rounds):
+    # Module-level so the process pool can pickle it
+    return pbkdf2_sha256.using(rounds=rounds).hash(password)
+
+
+def _pool_context():
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+class PasswordHashingService:
+
+    def __init__(self, rounds=pbkdf2_sha256.default_rounds, max_workers=None, min_parallel_batch=4):
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel_batch = min_parallel_batch
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.rounds = app.config.get('PASSWORD_HASH_ROUNDS', self.rounds)
+        self.max_workers = app.config.get('PASSWORD_HASH_WORKERS') or self.max_workers
+        if self.max_workers > 1:
+            self._get_pool()
+
+    def hash(self, password):
+        return _hash_password(password, self.rounds)
+
+    def hash_many(self, passwords):
+        '''Hashes a batch in parallel across cores; returns hashes in the same order.'''
+        passwords = list(passwords)
+        if self.max_workers <= 1 or len(passwords) < self.min_parallel_batch:
+            return [_hash_password(password, self.rounds) for password in passwords]
+        try:
+            pool = self._get_pool()
+            chunksize = max(1, len(passwords) // (self.max_workers * 4))
+            return list(pool.map(_hash_password, passwords, [self.rounds] * len(passwords), chunksize=chunksize))
+        except Exception as e:
+            # A broken pool (e.g. a worker was killed) must not fail provisioning
+            logger.warning(f"Password hashing pool unavailable, hashing {len(passwords)} password(s) in-process: {e}")
+            self.shutdown()
+            return [_hash_password(password, self.rounds) for password in passwords]
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_pool_context())
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHashingService()
+atexit.register(password_hasher.shutdown)
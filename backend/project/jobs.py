@@ -0,0 +1,290 @@
+# MGSCompSciHub/backend/project/jobs.py
+'''
+Background jobs for teacher operations that can outlive an HTTP request (bulk provisioning ...).
+
+Jobs are rows in the `jobs` table, so any process can enqueue one and any process running a
+JobRunner can pick it up. Workers are daemon threads that claim the oldest queued job with a
+conditional UPDATE (so two workers never run the same job), then call the handler registered for
+its type. Handlers report progress and poll for cancellation through a JobContext; both go through
+their own short DB transactions so they never commit the handler's half-finished session work.
+
+Jobs are run by `flask jobs-worker`, a dedicated process, so they never compete with request
+handling. Small deployments without one can set JOB_RUN_IN_WEB_PROCESS: each web process then
+starts its own workers on its first request or enqueue (which also picks up jobs left queued by a
+restart).
+
+Housekeeping that must happen even when nobody calls the app (e.g. purging expired credential
+batches) is registered with JobRunner.periodic and run by `flask jobs-worker` between jobs.
+'''
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from sqlalchemy import select, update
+
+from .models import db, Job, JobStatusEnum
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobCancelled(Exception):
+    '''Raised by a handler (via JobContext.check_cancelled) to stop early; `result` keeps partial output.'''
+
+    def __init__(self, result=None):
+        super().__init__("Job cancelled")
+        self.result = result
+
+
+class JobContext:
+    '''Handed to a job handler: progress reporting and cooperative cancellation.'''
+
+    def __init__(self, job_id, job_type, created_by_id):
+        self.job_id = job_id
+        self.job_type = job_type
+        self.created_by_id = created_by_id
+
+    def set_progress(self, done, total=None):
+        values = {"progress_done": done, "updated_at": _utcnow()}
+        if total is not None:
+            values["progress_total"] = total
+        with db.engine.begin() as conn:
+            conn.execute(update(Job.__table__).where(Job.__table__.c.id == self.job_id).values(**values))
+
+    def cancel_requested(self):
+        with db.engine.connect() as conn:
+            return bool(conn.execute(select(Job.__table__.c.cancel_requested).where(Job.__table__.c.id == self.job_id)).scalar())
+
+    def check_cancelled(self, partial_result=None):
+        if self.cancel_requested():
+            raise JobCancelled(partial_result)
+
+
+class JobRunner:
+
+    def __init__(self, num_workers=2, poll_interval=5.0, stale_after_seconds=900):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.stale_after_seconds = stale_after_seconds
+        self.run_in_web_process = False
+        self.app = None
+        self._handlers = {}
+        self._periodic = [] # [fn, interval_seconds, next_due (monotonic)]
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = False
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.num_workers = app.config.get('JOB_WORKER_THREADS', self.num_workers)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL_SECONDS', self.poll_interval)
+        self.stale_after_seconds = app.config.get('JOB_STALE_AFTER_SECONDS', self.stale_after_seconds)
+        self.run_in_web_process = app.config.get('JOB_RUN_IN_WEB_PROCESS', False)
+        for task in self._periodic:
+            task[2] = 0.0 # Due straight away in a new worker process
+        app.cli.add_command(jobs_worker_command)
+        if self.run_in_web_process:
+            app.before_request(self._ensure_started)
+
+    def _ensure_started(self):
+        if not self._started:
+            self.start()
+
+    def handler(self, job_type):
+        '''Decorator registering `fn(ctx, params) -> result dict` as the handler for a job type.'''
+        def register(fn):
+            self._handlers[job_type] = fn
+            return fn
+        return register
+
+    def periodic(self, interval_seconds):
+        '''Decorator registering `fn()` to run every `interval_seconds` in the jobs-worker process.'''
+        def register(fn):
+            self._periodic.append([fn, interval_seconds, 0.0])
+            return fn
+        return register
+
+    def run_due_periodic(self):
+        '''Runs the periodic tasks that are due, each in its own app context. Errors are logged, not raised.'''
+        now = time.monotonic()
+        for task in self._periodic:
+            fn, interval_seconds, next_due = task
+            if now < next_due:
+                continue
+            task[2] = now + interval_seconds
+            with self.app.app_context():
+                try:
+                    fn()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Periodic task {fn.__name__} failed: {e}", exc_info=True)
+                finally:
+                    db.session.remove()
+
+    def enqueue(self, job_type, params, created_by_id):
+        '''Adds a queued job, commits, and wakes this process's workers if it runs any. Returns the Job.'''
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type '{job_type}'.")
+        job = Job(job_type=job_type, params=params, created_by_id=created_by_id, status=JobStatusEnum.QUEUED,
+                  progress_done=0, cancel_requested=False, updated_at=_utcnow())
+        db.session.add(job)
+        db.session.commit()
+        if self.run_in_web_process:
+            self.start()
+        self._wakeup.set()
+        return job
+
+    def cancel(self, job):
+        '''Cancels a queued job outright; asks a running one to stop at its next checkpoint. Returns the new status.'''
+        now = _utcnow()
+        with db.engine.begin() as conn:
+            cancelled_now = conn.execute(
+                update(Job.__table__)
+                .where(Job.__table__.c.id == job.id, Job.__table__.c.status == JobStatusEnum.QUEUED)
+                .values(status=JobStatusEnum.CANCELLED, cancel_requested=True, finished_at=now, updated_at=now)
+            ).rowcount
+            if not cancelled_now:
+                conn.execute(
+                    update(Job.__table__)
+                    .where(Job.__table__.c.id == job.id, Job.__table__.c.status == JobStatusEnum.RUNNING)
+                    .values(cancel_requested=True)
+                )
+        db.session.refresh(job)
+        return job.status
+
+    def start(self, app=None):
+        '''Starts the worker threads once per process (idempotent).'''
+        if app is not None:
+            self.app = app
+        if self.app is None or self.num_workers <= 0:
+            return
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+            self._started = True
+            self._stopping.clear()
+            with self.app.app_context():
+                self._fail_stale_jobs()
+            for i in range(self.num_workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Started {self.num_workers} background job worker(s).")
+
+    def stop(self, timeout=None):
+        self._started = False
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def _fail_stale_jobs(self):
+        # Jobs left "running" by a process that died; their heartbeat (updated_at) has stopped
+        cutoff = _utcnow() - timedelta(seconds=self.stale_after_seconds)
+        try:
+            with db.engine.begin() as conn:
+                stale = conn.execute(
+                    update(Job.__table__)
+                    .where(Job.__table__.c.status == JobStatusEnum.RUNNING, Job.__table__.c.updated_at < cutoff)
+                    .values(status=JobStatusEnum.FAILED, error="The worker running this job stopped before it finished.", finished_at=_utcnow())
+                ).rowcount
+            if stale:
+                logger.warning(f"Marked {stale} stale running job(s) as failed.")
+        except Exception as e:
+            logger.error(f"Could not check for stale jobs: {e}", exc_info=True)
+
+    def _claim(self):
+        '''Atomically moves the oldest queued job to running. Returns (id, type, params, created_by_id) or None.'''
+        jobs = Job.__table__
+        oldest_queued = select(jobs.c.id).where(jobs.c.status == JobStatusEnum.QUEUED).order_by(jobs.c.id).limit(1).scalar_subquery()
+        now = _utcnow()
+        with db.engine.begin() as conn:
+            # The status condition makes the claim safe when two workers pick the same row
+            return conn.execute(
+                update(jobs)
+                .where(jobs.c.id == oldest_queued, jobs.c.status == JobStatusEnum.QUEUED)
+                .values(status=JobStatusEnum.RUNNING, started_at=now, updated_at=now)
+                .returning(jobs.c.id, jobs.c.job_type, jobs.c.params, jobs.c.created_by_id)
+            ).first()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with db.engine.begin() as conn:
+            conn.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(
+                status=status, result=result, error=error, finished_at=_utcnow(), updated_at=_utcnow()))
+
+    def _execute(self, job_id, job_type, params, created_by_id):
+        handler = self._handlers.get(job_type)
+        if handler is None:
+            self._finish(job_id, JobStatusEnum.FAILED, error=f"No handler for job type '{job_type}'.")
+            return
+        ctx = JobContext(job_id, job_type, created_by_id)
+        try:
+            result = handler(ctx, params or {})
+        except JobCancelled as e:
+            db.session.rollback()
+            self._finish(job_id, JobStatusEnum.CANCELLED, result=e.result)
+            self.cancelled += 1
+            logger.info(f"Job {job_id} ({job_type}) cancelled.")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Job {job_id} ({job_type}) failed: {e}", exc_info=True)
+            self._finish(job_id, JobStatusEnum.FAILED, error=str(e) or e.__class__.__name__)
+            self.failed += 1
+        else:
+            self._finish(job_id, JobStatusEnum.SUCCEEDED, result=result)
+            self.completed += 1
+            logger.info(f"Job {job_id} ({job_type}) finished.")
+
+    def _work(self):
+        while not self._stopping.is_set():
+            claimed = None
+            with self.app.app_context():
+                try:
+                    claimed = self._claim()
+                    if claimed is not None:
+                        self._execute(*claimed)
+                except Exception as e:
+                    logger.error(f"Background job worker error: {e}", exc_info=True)
+            if claimed is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def stats(self):
+        return {
+            "workers": sum(1 for t in self._threads if t.is_alive()),
+            "job_types": sorted(self._handlers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+job_runner = JobRunner()
+
+
+@click.command('jobs-worker')
+@click.option('--workers', type=int, default=None, help='Worker threads (defaults to JOB_WORKER_THREADS).')
+def jobs_worker_command(workers):
+    '''Runs background job workers in the foreground until interrupted.'''
+    from flask import current_app
+    if workers is not None:
+        job_runner.num_workers = workers
+    job_runner.start(current_app._get_current_object())
+    try:
+        while any(t.is_alive() for t in job_runner._threads):
+            job_runner.run_due_periodic()
+            for thread in job_runner._threads:
+                thread.join(1)
+    except KeyboardInterrupt:
+        job_runner.stop(timeout=5)
@@ -0,0 +1,130 @@
+# MGSCompSciHub/backend/project/jsonpatch.py
+'''
+Minimal RFC 6902 JSON Patch (with RFC 6901 JSON Pointers), for delta saves of large answer_data.
+
+apply_patch() never modifies its input: it works on a deep copy and returns the patched document,
+or raises JsonPatchError without side effects. All six operations are supported (add, remove,
+replace, move, copy, test).
+'''
+import copy
+
+MAX_OPERATIONS = 1000
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    '''A "test" operation did not match: the document is not in the state the client expected.'''
+
+
+def _parse_pointer(pointer):
+    if not isinstance(pointer, str):
+        raise JsonPatchError("A JSON Pointer must be a string.")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer '{pointer}'.")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _array_index(container, token, allow_end):
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index '{token}'.")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} is out of range.")
+    return index
+
+
+def _resolve(document, tokens, pointer):
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f"Path '{pointer}' does not exist.")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_array_index(document, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path '{pointer}' does not exist.")
+    return document
+
+
+def _parent(document, pointer):
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        return None, None
+    parent = _resolve(document, tokens[:-1], pointer)
+    if not isinstance(parent, (dict, list)):
+        raise JsonPatchError(f"Path '{pointer}' does not exist.")
+    return parent, tokens[-1]
+
+
+def _add(document, pointer, value):
+    parent, key = _parent(document, pointer)
+    if parent is None:
+        return value
+    if isinstance(parent, list):
+        parent.insert(_array_index(parent, key, allow_end=True), value)
+    else:
+        parent[key] = value
+    return document
+
+
+def _remove(document, pointer):
+    parent, key = _parent(document, pointer)
+    if parent is None:
+        raise JsonPatchError("Cannot remove the whole document.")
+    if isinstance(parent, list):
+        return document, parent.pop(_array_index(parent, key, allow_end=False))
+    if key not in parent:
+        raise JsonPatchError(f"Path '{pointer}' does not exist.")
+    return document, parent.pop(key)
+
+
+def _required(operation, name):
+    if name not in operation:
+        raise JsonPatchError(f"'{operation.get('op')}' operation needs '{name}'.")
+    return operation[name]
+
+
+def apply_patch(document, patch):
+    '''Returns `document` with the RFC 6902 `patch` (a list of operations) applied.'''
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be a list of operations.")
+    if len(patch) > MAX_OPERATIONS:
+        raise JsonPatchError(f"At most {MAX_OPERATIONS} operations per patch.")
+    document = copy.deepcopy(document)
+    for operation in patch:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Each patch operation must be an object.")
+        op, path = operation.get('op'), _required(operation, 'path')
+        if op == 'add':
+            document = _add(document, path, copy.deepcopy(_required(operation, 'value')))
+        elif op == 'remove':
+            document, _ = _remove(document, path)
+        elif op == 'replace':
+            value = copy.deepcopy(_required(operation, 'value'))
+            if path == "":
+                document = value
+            else:
+                document, _ = _remove(document, path)
+                document = _add(document, path, value)
+        elif op == 'move':
+            from_path = _required(operation, 'from')
+            if path != from_path and path.startswith(from_path + "/"):
+                raise JsonPatchError("Cannot move a value into one of its own children.")
+            document, value = _remove(document, from_path)
+            document = _add(document, path, value)
+        elif op == 'copy':
+            value = _resolve(document, _parse_pointer(_required(operation, 'from')), operation['from'])
+            document = _add(document, path, copy.deepcopy(value))
+        elif op == 'test':
+            if _resolve(document, _parse_pointer(path), path) != _required(operation, 'value'):
+                raise JsonPatchTestFailed(f"Test failed at '{path}'.")
+        else:
+            raise JsonPatchError(f"Unknown patch operation '{op}'.")
+    return document
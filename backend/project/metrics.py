@@ -0,0 +1,25 @@
+# MGSCompSciHub/backend/project/metrics.py
+import threading
+
+
+class Counters:
+    '''Thread-safe named counters for fast paths worth watching (writes skipped, etc.).'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+
+counters = Counters()
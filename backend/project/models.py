@@ -2,6 +2,7 @@
 from .extensions import db
 from flask_login import UserMixin
 from passlib.hash import pbkdf2_sha256 # Keep for student password generation if needed by Admin SDK
+from .hashing import password_hasher
 import enum
 from sqlalchemy import func
 
@@ -41,7 +42,8 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         # This method will be used by Firebase Admin SDK when creating users with passwords
-        self.password_hash = pbkdf2_sha256.hash(password)
+        # For many users at once, use password_hasher.hash_many() and assign password_hash directly
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         # This method is less likely to be called if logins are purely via Firebase token verification.
@@ -55,6 +57,7 @@ class Class(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped on roster/assignment changes; feeds ETags (see project/etags.py)
     students = db.relationship('User', backref='assigned_class', lazy='dynamic', foreign_keys='User.student_class_id')
     assigned_worksheets = db.relationship('Assignment', back_populates='class_assigned', cascade="all, delete-orphan")
     def __repr__(self): return f'<Class {self.name}>'
@@ -65,6 +68,7 @@ class Worksheet(db.Model):
     title = db.Column(db.String(150), nullable=False, unique=True)
     description = db.Column(db.Text, nullable=True)
     component_identifier = db.Column(db.String(100), nullable=False, unique=True) 
+    task_count = db.Column(db.Integer, nullable=True) # Number of tasks in the worksheet component; None if unknown
     assignments = db.relationship('Assignment', back_populates='worksheet', cascade="all, delete-orphan")
     def __repr__(self): return f'<Worksheet {self.title}>'
 
@@ -78,6 +82,7 @@ class Assignment(db.Model):
     class_assigned = db.relationship('Class', back_populates='assigned_worksheets')
     worksheet = db.relationship('Worksheet', back_populates='assignments')
     progress_records = db.relationship('WorksheetProgress', back_populates='assignment', cascade="all, delete-orphan")
+    stats = db.relationship('AssignmentStats', uselist=False, cascade="all, delete-orphan")
     __table_args__ = (db.UniqueConstraint('class_id', 'worksheet_id', name='_class_worksheet_uc'),)
     def __repr__(self): return f'<Assignment of {self.worksheet.title} to {self.class_assigned.name}>'
 
@@ -90,7 +95,110 @@ class WorksheetProgress(db.Model):
     answer_data = db.Column(db.JSON, nullable=True)
     score = db.Column(db.Float, nullable=True)
     last_updated = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    content_hash = db.Column(db.String(32), nullable=True) # Of answer_data + score, to skip no-op saves (see project/student/progress.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped on every write; JSON Patch saves name the version they apply to
     student = db.relationship('User', backref=db.backref('progress_records', lazy='dynamic'))
     assignment = db.relationship('Assignment', back_populates='progress_records')
     __table_args__ = (db.UniqueConstraint('student_id', 'assignment_id', 'task_identifier', name='_student_assignment_task_uc'),)
     def __repr__(self): return f'<Progress by Student ID {self.student_id} on Task {self.task_identifier}>'
+
+class AssignmentStats(db.Model):
+    '''
+    Running totals for one assignment, updated in the same transaction as each progress save
+    (see project/student/progress.py) so overviews never scan worksheet_progress.
+    `flask assignment-stats rebuild` recomputes them from scratch.
+    '''
+    __tablename__ = 'assignment_stats'
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), primary_key=True)
+    started_count = db.Column(db.Integer, nullable=False, default=0) # Students with at least one saved task
+    completed_count = db.Column(db.Integer, nullable=False, default=0) # Students with >= Worksheet.task_count tasks saved
+    progress_rows = db.Column(db.Integer, nullable=False, default=0) # Saved (student, task) pairs
+    distinct_tasks = db.Column(db.Integer, nullable=False, default=0) # Task identifiers seen for this assignment
+    scored_count = db.Column(db.Integer, nullable=False, default=0) # Progress rows with a score
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0.0) # For the variance without a rescan
+    last_activity = db.Column(db.DateTime, nullable=True)
+
+    @classmethod
+    def empty(cls, assignment_id):
+        return cls(assignment_id=assignment_id, started_count=0, completed_count=0, progress_rows=0, distinct_tasks=0,
+                   scored_count=0, score_sum=0.0, score_sq_sum=0.0)
+
+    def to_dict(self, task_count=None):
+        mean = self.score_sum / self.scored_count if self.scored_count else None
+        variance = max(self.score_sq_sum / self.scored_count - mean * mean, 0.0) if self.scored_count else None
+        return {
+            "started_count": self.started_count, "completed_count": self.completed_count,
+            "progress_rows": self.progress_rows, "task_count": task_count or self.distinct_tasks,
+            "mean_score": mean, "score_stddev": variance ** 0.5 if variance is not None else None,
+            "last_activity": self.last_activity.isoformat() if self.last_activity else None,
+        }
+
+    def __repr__(self): return f'<AssignmentStats {self.assignment_id}: {self.started_count} started>'
+
+class IdSequence(db.Model):
+    '''Named counters for identifiers that must be unique without a COUNT(*) (e.g. synthetic student emails).'''
+    __tablename__ = 'id_sequences'
+    name = db.Column(db.String(64), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+    def __repr__(self): return f'<IdSequence {self.name}={self.next_value}>'
+
+class JobStatusEnum(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class Job(db.Model):
+    '''A long-running teacher operation (bulk provisioning, exports...) executed by the background job runner.'''
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(JobStatusEnum), nullable=False, default=JobStatusEnum.QUEUED, index=True)
+    params = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True) # Worker heartbeat, written by the job runner
+    created_by = db.relationship('User')
+
+    def to_dict(self):
+        return {
+            "id": self.id, "job_type": self.job_type, "status": self.status.value,
+            "progress": {"done": self.progress_done, "total": self.progress_total},
+            "cancel_requested": self.cancel_requested,
+            "result": self.result, "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self): return f'<Job {self.id} {self.job_type} ({self.status.value})>'
+
+class CredentialBatch(db.Model):
+    '''Initial passwords from one provisioning run, kept briefly so they can be exported as CSV or login slips.'''
+    __tablename__ = 'credential_batches'
+    id = db.Column(db.String(64), primary_key=True) # Unguessable token, also used in the export URLs
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=True)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    target_class = db.relationship('Class')
+    def __repr__(self): return f'<CredentialBatch {self.id} ({self.entry_count} entries)>'
+
+class CredentialBatchEntry(db.Model):
+    __tablename__ = 'credential_batch_entries'
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.String(64), db.ForeignKey('credential_batches.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    app_username = db.Column(db.String(80), nullable=False)
+    login_email = db.Column(db.String(120), nullable=False)
+    initial_password = db.Column(db.String(128), nullable=False)
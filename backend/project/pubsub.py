@@ -0,0 +1,173 @@
+# MGSCompSciHub/backend/project/pubsub.py
+'''
+Publish/subscribe hub for live updates (currently: progress deltas for the teacher SSE stream).
+
+Subscribers are local to the process: each SSE connection gets a bounded queue. Publishing goes
+through a backend:
+- 'memory' delivers straight to this process's subscribers (single worker / dev server);
+- 'redis' publishes to Redis and a listener thread in every process delivers what it receives,
+  so a save handled by one worker reaches teachers connected to any other. Needs the `redis`
+  package and PUBSUB_REDIS_URL.
+
+Backpressure: a subscriber that falls more than its queue size behind is not allowed to slow the
+publisher. Its queue is cleared and it receives a single {"type": "resync"} message, telling the
+client to refetch the full state, then carries on with new deltas.
+'''
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+
+    def __init__(self, hub, channel, max_queue):
+        self.hub = hub
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def offer(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Drop the backlog rather than block the publisher; the client refetches instead
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(RESYNC)
+            return False
+        return True
+
+    def get(self, timeout):
+        '''Next message, or None if nothing arrived within `timeout` seconds.'''
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class MemoryBackend:
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def stats(self):
+        return {"backend": "memory"}
+
+
+class RedisBackend:
+    '''Fans messages out across processes through Redis pub/sub.'''
+
+    def __init__(self, url, channel_prefix='mgs:'):
+        try:
+            import redis # Optional dependency, only needed for multi-worker deployments
+        except ImportError:
+            raise RuntimeError("PUBSUB_BACKEND=redis needs the 'redis' package (pip install redis).")
+        self._client = redis.Redis.from_url(url)
+        self.channel_prefix = channel_prefix
+        self.errors = 0
+
+    def start(self, deliver):
+        self._deliver = deliver
+        thread = threading.Thread(target=self._listen, name='pubsub-redis-listener', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{self.channel_prefix}*")
+                for raw in pubsub.listen():
+                    channel = raw['channel'].decode('utf-8')[len(self.channel_prefix):]
+                    self._deliver(channel, json.loads(raw['data']))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Redis pub/sub listener failed, reconnecting: {e}")
+                time.sleep(2)
+
+    def publish(self, channel, message):
+        self._client.publish(f"{self.channel_prefix}{channel}", json.dumps(message))
+
+    def stats(self):
+        return {"backend": "redis", "errors": self.errors}
+
+
+class PubSubHub:
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = {} # channel -> set of Subscription
+        self._backend = MemoryBackend()
+        self._backend.start(self._deliver)
+        self.published = 0
+        self.delivered = 0
+        self.publish_errors = 0
+        self.overflows = 0
+
+    def init_app(self, app):
+        self.max_queue = app.config.get('SSE_QUEUE_SIZE', self.max_queue)
+        if app.config.get('PUBSUB_BACKEND', 'memory') == 'redis':
+            try:
+                backend = RedisBackend(app.config['PUBSUB_REDIS_URL'])
+                backend.start(self._deliver)
+                self._backend = backend
+            except Exception as e:
+                app.logger.error(f"Could not start the Redis pub/sub backend, live updates stay in-process: {e}")
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        '''Best effort: a failed publish is logged, never raised into the caller's request.'''
+        self.published += 1
+        try:
+            self._backend.publish(channel, message)
+        except Exception as e:
+            self.publish_errors += 1
+            logger.error(f"Could not publish to {channel}: {e}")
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            if not subscription.offer(message):
+                self.overflows += 1
+        self.delivered += len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            subscribers = [s for channel_subs in self._subscribers.values() for s in channel_subs]
+        return {
+            **self._backend.stats(),
+            "channels": len({s.channel for s in subscribers}),
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "publish_errors": self.publish_errors,
+            "overflows": self.overflows,
+        }
+
+
+pubsub_hub = PubSubHub()
@@ -0,0 +1,366 @@
+# MGSCompSciHub/backend/project/student/progress.py
+'''
+Saving worksheet progress and keeping AssignmentStats in step with it.
+
+save_task_progress() writes the progress row and applies the matching delta to the assignment's
+stats row in the caller's transaction, so the two commit (or roll back) together. Counters are
+bumped with `col = col + delta` so concurrent saves from different students don't lose updates.
+Two first saves by the same student racing on different tasks can still double-count
+started/completed; `flask assignment-stats rebuild --check` reports any such drift and
+`flask assignment-stats rebuild` fixes it.
+
+Saves whose answer_data and score match the stored row's content_hash are skipped entirely (no
+UPDATE, no last_updated bump, no commit): the frontend autosaves whether or not anything changed.
+
+Every write bumps WorksheetProgress.version. patch_task_progress() applies an RFC 6902 JSON Patch
+to the stored answer_data only if the row is still at the version the client patched, checked in
+the UPDATE itself, so large documents can be saved as small deltas without lost updates.
+
+After the commit, publish_progress() pushes a small delta to teachers watching the assignment's
+live stream (see project/pubsub.py).
+'''
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+from ..db_utils import dialect_insert
+from ..jsonpatch import apply_patch
+from ..metrics import counters
+from ..models import db, Assignment, AssignmentStats, Worksheet, WorksheetProgress
+from ..pubsub import pubsub_hub
+
+STAT_COLUMNS = ('started_count', 'completed_count', 'progress_rows', 'distinct_tasks',
+                'scored_count', 'score_sum', 'score_sq_sum', 'last_activity')
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def progress_content_hash(answer_data, score):
+    '''Compact hash of what a progress row stores. Scores are hashed as floats, as the column returns them.'''
+    canonical = json.dumps([answer_data, None if score is None else float(score)],
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SavedProgress(NamedTuple):
+    written: bool # False when the save matched what was stored
+    score: Optional[float] # The row's score after the save
+    version: int
+
+
+class ProgressVersionConflict(Exception):
+    '''A patch named a version the row is no longer (or not yet) at.'''
+
+    def __init__(self, current_version):
+        super().__init__(f"Progress is at version {current_version}")
+        self.current_version = current_version
+
+
+def _stored_progress(student_id, assignment_id, task_identifier, *columns):
+    return db.session.execute(
+        select(WorksheetProgress.id, WorksheetProgress.score, WorksheetProgress.content_hash, WorksheetProgress.version, *columns)
+        .where(WorksheetProgress.student_id == student_id, WorksheetProgress.assignment_id == assignment_id,
+               WorksheetProgress.task_identifier == task_identifier)
+    ).first()
+
+
+def save_task_progress(student_id, assignment, task_identifier, answer_data, score):
+    '''
+    Creates or updates one task's progress and the assignment's stats. Does not commit.
+    As before, a None score leaves an existing score unchanged. Returns a SavedProgress; nothing is
+    written if the save matches what is stored.
+    '''
+    existing = _stored_progress(student_id, assignment.id, task_identifier)
+    if existing is None:
+        content_hash = progress_content_hash(answer_data, score)
+        progress_record = WorksheetProgress(
+            student_id=student_id, assignment_id=assignment.id, task_identifier=task_identifier,
+            answer_data=answer_data, score=score, content_hash=content_hash, version=1
+        )
+        db.session.add(progress_record)
+        db.session.flush()
+        counters.incr('progress.writes')
+        apply_stats_delta(assignment, student_id, task_identifier, True, None, score)
+        return SavedProgress(True, score, 1)
+    return _update_stored_progress(existing, student_id, assignment, task_identifier, answer_data, score)
+
+
+def _update_stored_progress(existing, student_id, assignment, task_identifier, answer_data, score, expected_version=None):
+    new_score = score if score is not None else existing.score
+    content_hash = progress_content_hash(answer_data, new_score)
+    if existing.content_hash == content_hash:
+        counters.incr('progress.writes_skipped')
+        return SavedProgress(False, existing.score, existing.version)
+    values = {"answer_data": answer_data, "content_hash": content_hash, "version": WorksheetProgress.version + 1}
+    if score is not None:
+        values["score"] = score
+    conditions = [WorksheetProgress.id == existing.id]
+    if expected_version is not None:
+        conditions.append(WorksheetProgress.version == expected_version)
+    # Core UPDATE ... RETURNING: the stored (possibly large) answer_data never has to be loaded
+    version = db.session.execute(
+        update(WorksheetProgress).where(*conditions).values(**values).returning(WorksheetProgress.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if version is None: # Another save got in after we read the row
+        current = db.session.execute(select(WorksheetProgress.version).where(WorksheetProgress.id == existing.id)).scalar()
+        raise ProgressVersionConflict(current or 0)
+    counters.incr('progress.writes')
+    apply_stats_delta(assignment, student_id, task_identifier, False, existing.score, new_score)
+    return SavedProgress(True, new_score, version)
+
+
+def patch_task_progress(student_id, assignment, task_identifier, patch, base_version, score):
+    '''
+    Applies a JSON Patch to the task's stored answer_data, if the row is at `base_version` (0 for a
+    task with no progress yet, patching a null document). Does not commit. Raises
+    ProgressVersionConflict or JsonPatchError; returns a SavedProgress.
+    '''
+    existing = _stored_progress(student_id, assignment.id, task_identifier, WorksheetProgress.answer_data)
+    current_version = existing.version if existing is not None else 0
+    if base_version != current_version:
+        raise ProgressVersionConflict(current_version)
+    answer_data = apply_patch(existing.answer_data if existing is not None else None, patch)
+    if existing is None:
+        return save_task_progress(student_id, assignment, task_identifier, answer_data, score)
+    return _update_stored_progress(existing, student_id, assignment, task_identifier, answer_data, score,
+                                   expected_version=base_version)
+
+
+def apply_stats_delta(assignment, student_id, task_identifier, is_new, old_score, new_score):
+    '''Updates AssignmentStats for one saved row; call after the row is flushed.'''
+    deltas = {}
+    if is_new:
+        student_rows = db.session.execute(
+            select(func.count()).select_from(WorksheetProgress)
+            .where(WorksheetProgress.student_id == student_id, WorksheetProgress.assignment_id == assignment.id)
+        ).scalar()
+        task_rows = db.session.execute(
+            select(func.count()).select_from(WorksheetProgress)
+            .where(WorksheetProgress.assignment_id == assignment.id, WorksheetProgress.task_identifier == task_identifier)
+        ).scalar()
+        task_count = db.session.execute(select(Worksheet.task_count).where(Worksheet.id == assignment.worksheet_id)).scalar()
+        deltas['progress_rows'] = 1
+        if student_rows == 1:
+            deltas['started_count'] = 1
+        if task_count and student_rows == task_count:
+            deltas['completed_count'] = 1
+        if task_rows == 1:
+            deltas['distinct_tasks'] = 1
+    _add_score_delta(deltas, old_score, new_score)
+    _apply_stats_deltas(assignment.id, deltas)
+
+
+def _add_score_delta(deltas, old_score, new_score):
+    if new_score is not None and old_score is None:
+        deltas['scored_count'] = deltas.get('scored_count', 0) + 1
+        deltas['score_sum'] = deltas.get('score_sum', 0.0) + new_score
+        deltas['score_sq_sum'] = deltas.get('score_sq_sum', 0.0) + new_score * new_score
+    elif new_score is not None and new_score != old_score:
+        deltas['score_sum'] = deltas.get('score_sum', 0.0) + new_score - old_score
+        deltas['score_sq_sum'] = deltas.get('score_sq_sum', 0.0) + new_score * new_score - old_score * old_score
+
+
+def _apply_stats_deltas(assignment_id, deltas):
+    db.session.execute(dialect_insert(AssignmentStats).values(
+        assignment_id=assignment_id, started_count=0, completed_count=0, progress_rows=0, distinct_tasks=0,
+        scored_count=0, score_sum=0.0, score_sq_sum=0.0,
+    ).on_conflict_do_nothing(index_elements=['assignment_id']))
+    values = {name: getattr(AssignmentStats, name) + delta for name, delta in deltas.items() if delta}
+    values['last_activity'] = _utcnow()
+    db.session.execute(
+        update(AssignmentStats).where(AssignmentStats.assignment_id == assignment_id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def save_task_progress_batch(student_id, assignment, updates):
+    '''
+    Saves many tasks of one assignment with a single multi-row upsert on _student_assignment_task_uc,
+    plus one combined stats update. Does not commit. `updates` is a list of
+    (task_identifier, answer_data, score) with unique task identifiers; as for single saves, a None
+    score leaves an existing score unchanged, and tasks matching their stored content hash are not
+    written. Returns {task_identifier: (created, score, written)}.
+    '''
+    task_identifiers = [task_identifier for task_identifier, _, _ in updates]
+    existing = {task_identifier: (score, content_hash) for task_identifier, score, content_hash in db.session.execute(
+        select(WorksheetProgress.task_identifier, WorksheetProgress.score, WorksheetProgress.content_hash)
+        .where(WorksheetProgress.student_id == student_id, WorksheetProgress.assignment_id == assignment.id,
+               WorksheetProgress.task_identifier.in_(task_identifiers))
+    )}
+    results, rows = {}, []
+    for task_identifier, answer_data, score in updates:
+        old_score, old_hash = existing.get(task_identifier, (None, None))
+        new_score = score if score is not None else old_score
+        content_hash = progress_content_hash(answer_data, new_score)
+        written = content_hash != old_hash
+        results[task_identifier] = (task_identifier not in existing, new_score, written)
+        if written:
+            rows.append({"student_id": student_id, "assignment_id": assignment.id, "task_identifier": task_identifier,
+                         "answer_data": answer_data, "score": score, "content_hash": content_hash, "version": 1})
+    skipped = len(updates) - len(rows)
+    if skipped:
+        counters.incr('progress.writes_skipped', skipped)
+    if not rows:
+        return results
+    counters.incr('progress.writes', len(rows))
+    student_rows_before = db.session.execute(
+        select(func.count()).select_from(WorksheetProgress)
+        .where(WorksheetProgress.student_id == student_id, WorksheetProgress.assignment_id == assignment.id)
+    ).scalar()
+    tasks_seen = set(db.session.execute(
+        select(WorksheetProgress.task_identifier).distinct()
+        .where(WorksheetProgress.assignment_id == assignment.id, WorksheetProgress.task_identifier.in_(task_identifiers))
+    ).scalars())
+
+    stmt = dialect_insert(WorksheetProgress).values(rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['student_id', 'assignment_id', 'task_identifier'],
+        set_={"answer_data": stmt.excluded.answer_data,
+              "score": func.coalesce(stmt.excluded.score, WorksheetProgress.score),
+              "content_hash": stmt.excluded.content_hash,
+              "version": WorksheetProgress.version + 1,
+              "last_updated": func.now()},
+    ))
+
+    deltas = {}
+    created = [row["task_identifier"] for row in rows if row["task_identifier"] not in existing]
+    for row in rows:
+        _add_score_delta(deltas, existing.get(row["task_identifier"], (None, None))[0], results[row["task_identifier"]][1])
+    if created:
+        task_count = db.session.execute(select(Worksheet.task_count).where(Worksheet.id == assignment.worksheet_id)).scalar()
+        student_rows_after = student_rows_before + len(created)
+        deltas['progress_rows'] = len(created)
+        deltas['distinct_tasks'] = len(set(created) - tasks_seen)
+        if student_rows_before == 0:
+            deltas['started_count'] = 1
+        if task_count and student_rows_before < task_count <= student_rows_after:
+            deltas['completed_count'] = 1
+    _apply_stats_deltas(assignment.id, deltas)
+    return results
+
+
+def progress_channel(class_id, assignment_id):
+    return f"progress:{class_id}:{assignment_id}"
+
+
+def publish_progress(class_id, assignment_id, student_id, username, task_identifier, score):
+    '''
+    Tells live streams about one committed save: identifiers and the score only, never answer_data.
+    Takes plain values, captured before the commit expired the ORM objects, so no reload is needed.
+    '''
+    pubsub_hub.publish(progress_channel(class_id, assignment_id), {
+        "type": "progress",
+        "assignment_id": assignment_id,
+        "student_db_id": student_id,
+        "student_username": username,
+        "task_identifier": task_identifier,
+        "score": score,
+        "saved_at": _utcnow().isoformat(),
+    })
+
+
+def computed_stats_query():
+    '''SELECT of every assignment's stats recomputed from worksheet_progress (the rebuild source of truth).'''
+    per_assignment = (
+        select(WorksheetProgress.assignment_id,
+               func.count(func.distinct(WorksheetProgress.student_id)).label('started_count'),
+               func.count().label('progress_rows'),
+               func.count(func.distinct(WorksheetProgress.task_identifier)).label('distinct_tasks'),
+               func.count(WorksheetProgress.score).label('scored_count'),
+               func.sum(WorksheetProgress.score).label('score_sum'),
+               func.sum(WorksheetProgress.score * WorksheetProgress.score).label('score_sq_sum'),
+               func.max(WorksheetProgress.last_updated).label('last_activity'))
+        .group_by(WorksheetProgress.assignment_id)
+        .subquery()
+    )
+    per_student = (
+        select(WorksheetProgress.assignment_id, WorksheetProgress.student_id, func.count().label('tasks_done'))
+        .group_by(WorksheetProgress.assignment_id, WorksheetProgress.student_id)
+        .subquery()
+    )
+    completed = (
+        select(per_student.c.assignment_id, func.count().label('completed_count'))
+        .join(Assignment, Assignment.id == per_student.c.assignment_id)
+        .join(Worksheet, Worksheet.id == Assignment.worksheet_id)
+        .where(Worksheet.task_count.is_not(None), per_student.c.tasks_done >= Worksheet.task_count)
+        .group_by(per_student.c.assignment_id)
+        .subquery()
+    )
+    return (
+        select(Assignment.id.label('assignment_id'),
+               func.coalesce(per_assignment.c.started_count, 0).label('started_count'),
+               func.coalesce(completed.c.completed_count, 0).label('completed_count'),
+               func.coalesce(per_assignment.c.progress_rows, 0).label('progress_rows'),
+               func.coalesce(per_assignment.c.distinct_tasks, 0).label('distinct_tasks'),
+               func.coalesce(per_assignment.c.scored_count, 0).label('scored_count'),
+               func.coalesce(per_assignment.c.score_sum, 0.0).label('score_sum'),
+               func.coalesce(per_assignment.c.score_sq_sum, 0.0).label('score_sq_sum'),
+               per_assignment.c.last_activity)
+        .outerjoin(per_assignment, per_assignment.c.assignment_id == Assignment.id)
+        .outerjoin(completed, completed.c.assignment_id == Assignment.id)
+        .order_by(Assignment.id)
+    )
+
+
+def find_stats_drift():
+    '''Compares stored stats with a full recomputation. Returns a list of {assignment_id, column: (stored, computed)}.'''
+    stored = {stats.assignment_id: stats for stats in AssignmentStats.query}
+    drift = []
+    for row in db.session.execute(computed_stats_query()).mappings():
+        current = stored.pop(row['assignment_id'], None)
+        differences = {}
+        for name in STAT_COLUMNS:
+            if name == 'last_activity':
+                continue # Saved time vs row timestamp; not comparable
+            stored_value = getattr(current, name) if current is not None else 0
+            computed_value = row[name]
+            if isinstance(computed_value, float) or isinstance(stored_value, float):
+                if abs((stored_value or 0.0) - (computed_value or 0.0)) > 1e-6 * max(1.0, abs(computed_value or 0.0)):
+                    differences[name] = (stored_value, computed_value)
+            elif stored_value != computed_value:
+                differences[name] = (stored_value, computed_value)
+        if differences:
+            drift.append({"assignment_id": row['assignment_id'], **differences})
+    for assignment_id in stored: # Stats rows left behind by deleted assignments
+        drift.append({"assignment_id": assignment_id, "orphaned": True})
+    return drift
+
+
+def rebuild_assignment_stats():
+    '''Replaces every stats row with a full recomputation, in one transaction. Returns the row count.'''
+    rows = [dict(row) for row in db.session.execute(computed_stats_query()).mappings()]
+    db.session.execute(AssignmentStats.__table__.delete())
+    if rows:
+        db.session.execute(AssignmentStats.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+
+@click.group('assignment-stats')
+def assignment_stats_cli():
+    '''Maintain the assignment_stats summary table.'''
+
+
+@assignment_stats_cli.command('rebuild')
+@click.option('--check', is_flag=True, help='Only report drift between stored and recomputed stats; exit 1 if any.')
+@with_appcontext
+def rebuild_command(check):
+    '''Recomputes assignment stats from worksheet_progress.'''
+    drift = find_stats_drift()
+    for entry in drift:
+        click.echo(f"Drift: {entry}")
+    if check:
+        click.echo(f"{len(drift)} assignment(s) with drift.")
+        if drift:
+            raise SystemExit(1)
+        return
+    count = rebuild_assignment_stats()
+    click.echo(f"Rebuilt stats for {count} assignment(s); {len(drift)} had drifted.")
@@ -0,0 +1,85 @@
+# MGSCompSciHub/backend/project/student/queries.py
+'''
+Set-based read queries behind the student dashboard.
+
+Completion follows the teacher views (see project/teacher/queries.py): tasks with progress / task
+count, capped at 1, where the task count is Worksheet.task_count or, if unset, the distinct tasks
+saved for the assignment so far. "Completed" is only reported against a known task count.
+'''
+from sqlalchemy import func, select
+
+from ..models import db, Assignment, AssignmentStats, Class, Worksheet, WorksheetProgress
+from ..teacher.queries import completion_fraction
+
+STATUS_NOT_STARTED = "Not Started"
+STATUS_IN_PROGRESS = "In Progress"
+STATUS_COMPLETED = "Completed"
+
+
+def student_assignments_stamp(student_id, class_id):
+    '''
+    ETag stamp for the assignment list: the class's version and assignments, the student's progress
+    totals, and the distinct task counts used as the fallback task count for completion.
+    '''
+    class_assignments = select(Assignment.id).where(Assignment.class_id == class_id)
+    row = db.session.execute(select(
+        Class.version,
+        select(func.count(Assignment.id)).where(Assignment.class_id == class_id).scalar_subquery(),
+        select(func.max(Assignment.id)).where(Assignment.class_id == class_id).scalar_subquery(),
+        select(func.count(WorksheetProgress.id)).where(WorksheetProgress.student_id == student_id).scalar_subquery(),
+        select(func.sum(WorksheetProgress.score)).where(WorksheetProgress.student_id == student_id).scalar_subquery(),
+        select(func.max(WorksheetProgress.last_updated)).where(WorksheetProgress.student_id == student_id).scalar_subquery(),
+        select(func.sum(AssignmentStats.distinct_tasks)).where(AssignmentStats.assignment_id.in_(class_assignments))
+        .scalar_subquery(),
+    ).where(Class.id == class_id)).first()
+    return None if row is None else (student_id, class_id, *row)
+
+
+def student_assignment_summaries(student_id, class_id):
+    '''
+    The class's assignments, newest first, each with the student's tasks attempted, latest save,
+    score sum, completion fraction and status, from one statement grouped over their progress rows.
+    '''
+    own_progress = (
+        select(WorksheetProgress.assignment_id,
+               func.count(WorksheetProgress.id).label('tasks_attempted'),
+               func.max(WorksheetProgress.last_updated).label('last_updated'),
+               func.sum(WorksheetProgress.score).label('score_sum'))
+        .where(WorksheetProgress.student_id == student_id)
+        .group_by(WorksheetProgress.assignment_id)
+        .subquery()
+    )
+    tasks_attempted = func.coalesce(own_progress.c.tasks_attempted, 0)
+    rows = db.session.execute(
+        select(Assignment.id, Assignment.assigned_date, Assignment.due_date,
+               Worksheet.id.label('worksheet_id'), Worksheet.title, Worksheet.component_identifier, Worksheet.task_count,
+               tasks_attempted.label('tasks_attempted'), own_progress.c.last_updated, own_progress.c.score_sum,
+               completion_fraction(tasks_attempted, func.coalesce(Worksheet.task_count, AssignmentStats.distinct_tasks))
+               .label('completion'))
+        .join(Worksheet, Worksheet.id == Assignment.worksheet_id)
+        .outerjoin(AssignmentStats, AssignmentStats.assignment_id == Assignment.id)
+        .outerjoin(own_progress, own_progress.c.assignment_id == Assignment.id)
+        .where(Assignment.class_id == class_id)
+        .order_by(Assignment.assigned_date.desc(), Assignment.id.desc())
+    ).all()
+
+    summaries = []
+    for row in rows:
+        if not row.tasks_attempted:
+            status = STATUS_NOT_STARTED
+        elif row.task_count and row.tasks_attempted >= row.task_count:
+            status = STATUS_COMPLETED
+        else:
+            status = STATUS_IN_PROGRESS
+        summaries.append({
+            "assignment_id": row.id, "worksheet_id": row.worksheet_id, "worksheet_title": row.title,
+            "worksheet_component": row.component_identifier, "assigned_date": row.assigned_date.isoformat(),
+            "due_date": row.due_date.isoformat() if row.due_date else None,
+            "status": status,
+            "tasks_attempted": row.tasks_attempted,
+            "task_count": row.task_count,
+            "completion": round(row.completion, 4),
+            "score_sum": row.score_sum,
+            "last_updated": row.last_updated.isoformat() if row.last_updated else None,
+        })
+    return summaries
@@ -1,8 +1,13 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_login import current_user, login_required
 from . import student_bp
 from ..models import db, User, RoleEnum, Assignment, WorksheetProgress
-from sqlalchemy.orm import joinedload
+from ..etags import conditional_response
+from ..jsonpatch import JsonPatchError, JsonPatchTestFailed
+from .progress import save_task_progress, save_task_progress_batch, patch_task_progress, publish_progress, \
+    ProgressVersionConflict
+from .queries import student_assignments_stamp, student_assignment_summaries
+from .write_behind import progress_buffer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,34 +24,38 @@ def student_required(fn):
 @student_bp.route('/assignments', methods=['GET'])
 @student_required
 def get_student_assignments():
+    '''The class's assignments with this student's status and completion, in a fixed number of queries.'''
     if not current_user.student_class_id:
         return jsonify(success=False, message="Student not assigned to any class."), 404
-    assignments = Assignment.query.filter_by(class_id=current_user.student_class_id)\
-                                   .options(joinedload(Assignment.worksheet))\
-                                   .order_by(Assignment.assigned_date.desc()).all()
-    assignments_data = []
-    for ass in assignments:
-        has_progress = WorksheetProgress.query.filter_by(student_id=current_user.id, assignment_id=ass.id).first() is not None
-        assignments_data.append({
-            "assignment_id": ass.id, "worksheet_id": ass.worksheet.id, "worksheet_title": ass.worksheet.title,
-            "worksheet_component": ass.worksheet.component_identifier, "assigned_date": ass.assigned_date.isoformat(),
-            "due_date": ass.due_date.isoformat() if ass.due_date else None,
-            "status": "In Progress" if has_progress else "Not Started"
-        })
-    return jsonify(success=True, assignments=assignments_data)
+    student_id, class_id = current_user.id, current_user.student_class_id
+    return conditional_response('student_assignments', student_assignments_stamp(student_id, class_id),
+                                lambda: jsonify(success=True, assignments=student_assignment_summaries(student_id, class_id)))
 
 @student_bp.route('/assignments/<int:assignment_id>/progress', methods=['GET'])
 @student_required
 def get_student_progress_for_assignment(assignment_id):
     assignment = Assignment.query.filter_by(id=assignment_id, class_id=current_user.student_class_id).first_or_404("Assignment not found.")
     progress_records = WorksheetProgress.query.filter_by(student_id=current_user.id, assignment_id=assignment.id).all()
-    progress_data = {pr.task_identifier: {"answer_data": pr.answer_data, "score": pr.score} for pr in progress_records}
+    progress_data = {pr.task_identifier: {"answer_data": pr.answer_data, "score": pr.score, "version": pr.version}
+                     for pr in progress_records}
+    if progress_buffer.enabled: # Saves acknowledged but not flushed yet are newer than the rows
+        for task_identifier, pending in progress_buffer.pending_for(current_user.id, assignment.id).items():
+            stored = progress_data.get(task_identifier)
+            if pending["score"] is None and stored is not None:
+                pending = dict(pending, score=stored["score"])
+            progress_data[task_identifier] = dict(pending, version=None) # Not written yet: no version to patch against
     return jsonify(success=True, worksheet_id=assignment.worksheet_id, worksheet_title=assignment.worksheet.title,
                    worksheet_component=assignment.worksheet.component_identifier, progress=progress_data)
 
 @student_bp.route('/assignments/<int:assignment_id>/progress', methods=['POST'])
 @student_required
 def save_student_progress(assignment_id):
+    '''
+    Saves one task: either the whole document ({"task_identifier", "answer_data", "score"}) or an
+    RFC 6902 JSON Patch against the stored one ({"task_identifier", "patch", "base_version", "score"}).
+    A patch for a version the task is no longer at gets 409 with the current version; the client
+    then refetches (or sends the whole document).
+    '''
     assignment = Assignment.query.filter_by(id=assignment_id, class_id=current_user.student_class_id).first_or_404("Assignment not found.")
     data = request.get_json()
     if not data or 'task_identifier' not in data:
@@ -54,24 +63,115 @@ def save_student_progress(assignment_id):
     task_identifier = data['task_identifier']
     answer_data = data.get('answer_data')
     score = data.get('score')
+    patch = data.get('patch')
+    if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float))):
+        return jsonify(success=False, message="Score must be a number."), 400
+    if patch is not None:
+        base_version = data.get('base_version')
+        if isinstance(base_version, bool) or not isinstance(base_version, int) or base_version < 0:
+            return jsonify(success=False, message="A patch needs the base_version it applies to."), 400
+        if progress_buffer.enabled and task_identifier in progress_buffer.pending_for(current_user.id, assignment.id):
+            progress_buffer.flush() # The patch must apply to the latest acknowledged save
+    elif progress_buffer.enabled:
+        progress_buffer.put(current_user.id, current_user.username, assignment.class_id, assignment.id,
+                            task_identifier, answer_data, score)
+        return jsonify(success=True, message="Progress saved.", buffered=True,
+                       progress_update={"task_identifier": task_identifier, "answer_data": answer_data, "score": score}), 200
+    # Patch responses don't echo the document: their size should scale with the edit
+    progress_update = {"task_identifier": task_identifier, "score": score}
+    if patch is None:
+        progress_update["answer_data"] = answer_data
     try:
-        progress_record = WorksheetProgress.query.filter_by(
-            student_id=current_user.id, assignment_id=assignment.id, task_identifier=task_identifier
-        ).first()
-        if progress_record:
-            progress_record.answer_data = answer_data
-            if score is not None: progress_record.score = score
+        # Progress row and assignment_stats delta go into the same transaction
+        if patch is not None:
+            saved = patch_task_progress(current_user.id, assignment, task_identifier, patch, base_version, score)
         else:
-            progress_record = WorksheetProgress(
-                student_id=current_user.id, assignment_id=assignment.id, task_identifier=task_identifier,
-                answer_data=answer_data, score=score
-            )
-            db.session.add(progress_record)
+            saved = save_task_progress(current_user.id, assignment, task_identifier, answer_data, score)
+        progress_update["version"] = saved.version
+        if not saved.written: # Same as what is stored: no write, no commit
+            db.session.rollback()
+            return jsonify(success=True, message="Progress saved.", unchanged=True, progress_update=progress_update), 200
+        delta = (assignment.class_id, assignment.id, current_user.id, current_user.username, task_identifier, saved.score)
         db.session.commit()
+        publish_progress(*delta) # Only once committed, so teachers never see a save that rolled back
         logger.info(f"Student {current_user.username} progress saved for task {task_identifier} in assignment {assignment_id}")
-        return jsonify(success=True, message="Progress saved.",
-                       progress_update={"task_identifier": task_identifier, "answer_data": answer_data, "score": score}), 200
+        return jsonify(success=True, message="Progress saved.", progress_update=progress_update), 200
+    except ProgressVersionConflict as e:
+        db.session.rollback()
+        return jsonify(success=False, message="Progress has changed since that version.", current_version=e.current_version), 409
+    except JsonPatchTestFailed as e:
+        db.session.rollback()
+        return jsonify(success=False, message=str(e), current_version=base_version), 409
+    except JsonPatchError as e:
+        db.session.rollback()
+        return jsonify(success=False, message=f"Invalid patch: {e}"), 400
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error saving progress for student {current_user.username}, task {task_identifier}: {str(e)}")
         return jsonify(success=False, message="Failed to save progress."), 500
+
+def _batch_item_error(item, seen):
+    if not isinstance(item, dict):
+        return "Each update must be an object."
+    task_identifier = item.get('task_identifier')
+    if not isinstance(task_identifier, str) or not task_identifier or len(task_identifier) > 100:
+        return "Task identifier is required (a string of at most 100 characters)."
+    if task_identifier in seen:
+        return "Duplicate task identifier in this batch."
+    score = item.get('score')
+    if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float))):
+        return "Score must be a number."
+    return None
+
+@student_bp.route('/assignments/<int:assignment_id>/progress/batch', methods=['POST'])
+@student_required
+def save_student_progress_batch(assignment_id):
+    '''
+    Saves many tasks in one request and one transaction: {"updates": [{"task_identifier", "answer_data", "score"}, ...]}.
+    Invalid entries are reported and skipped; the rest are written with one bulk upsert. Returns a result per entry, in order.
+    '''
+    assignment = Assignment.query.filter_by(id=assignment_id, class_id=current_user.student_class_id).first_or_404("Assignment not found.")
+    data = request.get_json(silent=True)
+    updates = data.get('updates') if isinstance(data, dict) else None
+    if not isinstance(updates, list) or not updates:
+        return jsonify(success=False, message="A non-empty 'updates' list is required."), 400
+    max_tasks = current_app.config.get('PROGRESS_BATCH_MAX_TASKS', 200)
+    if len(updates) > max_tasks:
+        return jsonify(success=False, message=f"At most {max_tasks} updates per batch."), 400
+
+    results, valid, seen = [], [], set()
+    for item in updates:
+        error = _batch_item_error(item, seen)
+        if error:
+            results.append({"task_identifier": item.get('task_identifier') if isinstance(item, dict) else None,
+                            "success": False, "message": error})
+            continue
+        seen.add(item['task_identifier'])
+        valid.append((item['task_identifier'], item.get('answer_data'), item.get('score')))
+        results.append(None) # Filled in once saved
+    if not valid:
+        return jsonify(success=False, message="No valid updates.", results=results), 400
+
+    student_id, username, class_id = current_user.id, current_user.username, assignment.class_id
+    if progress_buffer.enabled:
+        progress_buffer.discard(student_id, assignment.id, [task_identifier for task_identifier, _, _ in valid])
+    try:
+        saved = save_task_progress_batch(student_id, assignment, valid)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving a batch of {len(valid)} task(s) for student {username} in assignment {assignment_id}: {str(e)}")
+        return jsonify(success=False, message="Failed to save progress."), 500
+
+    valid_iter = iter(valid)
+    for index, result in enumerate(results):
+        if result is None:
+            task_identifier = next(valid_iter)[0]
+            created, score, written = saved[task_identifier]
+            results[index] = {"task_identifier": task_identifier, "success": True, "created": created, "score": score,
+                              "unchanged": not written}
+            if written:
+                publish_progress(class_id, assignment_id, student_id, username, task_identifier, score)
+    logger.info(f"Student {username} saved {len(valid)} task(s) in one batch for assignment {assignment_id}")
+    return jsonify(success=all(result["success"] for result in results), saved=len(valid), results=results), 200
+
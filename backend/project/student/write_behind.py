@@ -0,0 +1,180 @@
+# MGSCompSciHub/backend/project/student/write_behind.py
+'''
+Optional write-behind buffer for progress autosaves (PROGRESS_WRITE_BEHIND=true).
+
+save_student_progress puts the save here and answers at once. The buffer keeps only the latest
+answer_data/score per (student, assignment, task), so a burst of autosaves while a student types
+collapses into one row write. A flusher thread writes everything buffered every
+PROGRESS_WRITE_BEHIND_INTERVAL_MS, or sooner once PROGRESS_WRITE_BEHIND_MAX_ENTRIES keys are
+waiting, with one bulk upsert per (student, assignment) (see save_task_progress_batch) and one
+commit per flush. Teachers' live streams are notified after that commit.
+
+The buffer is per process and in memory: it is flushed on normal shutdown (atexit), but saves
+from the last interval are lost if the process is killed. The student's own progress reads merge
+in their buffered entries, so a reload never shows older data than was acknowledged.
+'''
+import atexit
+import logging
+import threading
+import time
+
+from ..models import db, Assignment
+from .progress import save_task_progress_batch, publish_progress
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 3 # A save that keeps failing (e.g. its student was deleted) is dropped, not retried forever
+
+
+class ProgressWriteBuffer:
+
+    def __init__(self, interval_ms=500, max_entries=500):
+        self.enabled = False
+        self.interval_ms = interval_ms
+        self.max_entries = max_entries
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock() # One flush at a time (flusher thread vs atexit)
+        self._entries = {} # (student_id, assignment_id, task_identifier) -> entry dict
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self.buffered = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('PROGRESS_WRITE_BEHIND', False)
+        self.interval_ms = app.config.get('PROGRESS_WRITE_BEHIND_INTERVAL_MS', self.interval_ms)
+        self.max_entries = app.config.get('PROGRESS_WRITE_BEHIND_MAX_ENTRIES', self.max_entries)
+
+    def put(self, student_id, username, class_id, assignment_id, task_identifier, answer_data, score):
+        '''Buffers a save, replacing any buffered save of the same task. A None score keeps the buffered one.'''
+        key = (student_id, assignment_id, task_identifier)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self.coalesced += 1
+                if score is None:
+                    score = previous["score"]
+            self._entries[key] = {"answer_data": answer_data, "score": score,
+                                  "username": username, "class_id": class_id, "attempts": 0}
+            self.buffered += 1
+            depth = len(self._entries)
+        self._ensure_started()
+        if depth >= self.max_entries:
+            self._wakeup.set()
+
+    def pending_for(self, student_id, assignment_id):
+        '''Buffered {task_identifier: {"answer_data", "score"}} for one student's assignment.'''
+        with self._lock:
+            return {task_identifier: {"answer_data": entry["answer_data"], "score": entry["score"]}
+                    for (entry_student, entry_assignment, task_identifier), entry in self._entries.items()
+                    if entry_student == student_id and entry_assignment == assignment_id}
+
+    def discard(self, student_id, assignment_id, task_identifiers):
+        '''
+        Drops buffered saves that a direct write is about to supersede (the batch endpoint), waiting
+        for any flush in progress first so an older buffered value can't land after the newer write.
+        '''
+        with self._flush_lock, self._lock:
+            for task_identifier in task_identifiers:
+                self._entries.pop((student_id, assignment_id, task_identifier), None)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='progress-write-behind', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval_ms / 1000.0)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        '''Writes everything buffered so far. Safe to call from any thread; returns the rows written.'''
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, {}
+            if not entries:
+                return 0
+            started = time.perf_counter()
+            with self.app.app_context():
+                try:
+                    self._write(entries)
+                except Exception as e:
+                    db.session.rollback()
+                    self.flush_errors += 1
+                    logger.error(f"Progress write-behind flush of {len(entries)} entries failed, requeueing: {e}", exc_info=True)
+                    with self._lock:
+                        for key, entry in entries.items():
+                            entry["attempts"] += 1
+                            if entry["attempts"] >= MAX_FLUSH_ATTEMPTS:
+                                logger.error(f"Dropping buffered save {key} after {entry['attempts']} failed flushes")
+                                continue
+                            self._entries.setdefault(key, entry) # Newer saves buffered meanwhile win
+                    return 0
+                finally:
+                    db.session.remove()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.flushed_rows += len(entries)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            return len(entries)
+
+    def _write(self, entries):
+        groups = {}
+        for (student_id, assignment_id, task_identifier), entry in entries.items():
+            groups.setdefault((student_id, assignment_id), []).append((task_identifier, entry))
+        assignments = {}
+        saved = []
+        for (student_id, assignment_id), tasks in groups.items():
+            assignment = assignments.get(assignment_id)
+            if assignment is None:
+                assignment = assignments[assignment_id] = db.session.get(Assignment, assignment_id)
+            if assignment is None:
+                logger.warning(f"Dropping {len(tasks)} buffered save(s) for deleted assignment {assignment_id}")
+                continue
+            results = save_task_progress_batch(student_id, assignment, [
+                (task_identifier, entry["answer_data"], entry["score"]) for task_identifier, entry in tasks
+            ])
+            saved.extend((entry["class_id"], assignment_id, student_id, entry["username"], task_identifier,
+                          results[task_identifier][1]) for task_identifier, entry in tasks if results[task_identifier][2])
+        db.session.commit()
+        for delta in saved:
+            publish_progress(*delta)
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._entries)
+        return {
+            "enabled": self.enabled,
+            "depth": depth,
+            "buffered": self.buffered,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2) if self.last_flush_ms is not None else None,
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else None,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+progress_buffer = ProgressWriteBuffer()
@@ -0,0 +1,214 @@
+# MGSCompSciHub/backend/project/teacher/credentials.py
+'''
+Short-lived credential batches for newly provisioned students.
+
+A provisioning run stores its successful rows (username, login email, initial password) under an
+unguessable batch id and returns only that id, instead of echoing every password in the response.
+The batch can then be downloaded as CSV or printable login slips until it expires. Both exports
+are generators that read the entries in pages and emit one row at a time, so neither the query
+result nor the response body is ever held in memory in full. Batches live in the DB (not process
+memory) so an export works from any web worker, including for batches created by a job worker.
+
+Expired batches are never readable, and their rows (plaintext passwords included) are deleted by
+purge_expired_credential_batches: on every batch creation and export, every
+PURGE_INTERVAL_SECONDS in `flask jobs-worker`, and on demand with `flask credential-batches purge`.
+'''
+import csv
+import html
+import io
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app, has_request_context, url_for
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+
+from ..models import db, CredentialBatch, CredentialBatchEntry
+from ..jobs import job_runner
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = 200
+PURGE_INTERVAL_SECONDS = 300
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def create_credential_batch(report, created_by_id, class_id):
+    '''Stores the successful rows of a provisioning report. Returns the CredentialBatch, or None if nothing was created.'''
+    rows = [row for row in report if row.get("success") and row.get("initial_password")]
+    if not rows:
+        return None
+    purge_expired_credential_batches(commit=False) # Committed with the new batch
+    batch = CredentialBatch(
+        id=secrets.token_urlsafe(32),
+        created_by_id=created_by_id,
+        class_id=class_id,
+        expires_at=_utcnow() + timedelta(seconds=current_app.config.get('CREDENTIAL_BATCH_TTL_SECONDS', 3600)),
+        entry_count=len(rows),
+    )
+    db.session.add(batch)
+    db.session.flush()
+    db.session.execute(insert(CredentialBatchEntry), [{
+        "batch_id": batch.id,
+        "position": position,
+        "app_username": row["app_username"],
+        "login_email": row["firebase_login_email"],
+        "initial_password": row["initial_password"],
+    } for position, row in enumerate(rows)])
+    db.session.commit()
+    return batch
+
+
+def store_credentials(report, created_by_id, class_id):
+    '''
+    Moves the passwords in a provisioning report into a credential batch. Returns (report, info):
+    the report without passwords plus the batch info, or, if the batch could not be saved, the
+    report unchanged and None, so the passwords are never lost.
+    '''
+    try:
+        batch = create_credential_batch(report, created_by_id, class_id)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Could not store a credential batch; returning passwords inline: {e}", exc_info=True)
+        return report, None
+    if batch is None:
+        return report, None
+    return without_passwords(report), credential_batch_info(batch)
+
+
+def credential_batch_info(batch):
+    '''What provisioning responses return in place of the passwords.'''
+    info = {
+        "batch_id": batch.id,
+        "count": batch.entry_count,
+        "expires_at": batch.expires_at.isoformat(),
+    }
+    if has_request_context(): # Job workers have no request to build URLs from
+        info["csv_url"] = url_for('teacher.export_credential_batch_csv', batch_id=batch.id)
+        info["slips_url"] = url_for('teacher.export_credential_batch_slips', batch_id=batch.id)
+    return info
+
+
+def without_passwords(report):
+    return [{key: value for key, value in row.items() if key != "initial_password"} for row in report]
+
+
+def get_credential_batch(batch_id, created_by_id):
+    '''Returns the batch if it exists, belongs to the teacher and has not expired; otherwise None.'''
+    purge_expired_credential_batches()
+    return db.session.execute(
+        select(CredentialBatch).where(CredentialBatch.id == batch_id, CredentialBatch.created_by_id == created_by_id,
+                                      CredentialBatch.expires_at > _utcnow())
+    ).scalar_one_or_none()
+
+
+def delete_credential_batch(batch):
+    db.session.execute(delete(CredentialBatchEntry).where(CredentialBatchEntry.batch_id == batch.id))
+    db.session.delete(batch)
+    db.session.commit()
+
+
+@job_runner.periodic(PURGE_INTERVAL_SECONDS)
+def purge_expired_credential_batches(commit=True):
+    '''Deletes expired batches and their entries. Returns the number of batches removed.'''
+    now = _utcnow()
+    expired = select(CredentialBatch.id).where(CredentialBatch.expires_at <= now)
+    # Entries explicitly, since SQLite does not enforce ON DELETE CASCADE by default
+    db.session.execute(delete(CredentialBatchEntry).where(CredentialBatchEntry.batch_id.in_(expired)))
+    removed = db.session.execute(delete(CredentialBatch).where(CredentialBatch.expires_at <= now)).rowcount
+    if commit:
+        db.session.commit()
+    if removed:
+        logger.info(f"Purged {removed} expired credential batch(es).")
+    return removed
+
+
+@click.group('credential-batches')
+def credential_batches_cli():
+    '''Manage stored student credential batches.'''
+
+
+@credential_batches_cli.command('purge')
+@with_appcontext
+def purge_command():
+    '''Deletes expired credential batches and their passwords.'''
+    click.echo(f"Purged {purge_expired_credential_batches()} expired credential batch(es).")
+
+
+def _iter_entries(batch_id):
+    # Keyset pagination on position keeps each page query cheap and the working set bounded
+    last_position = -1
+    while True:
+        page = db.session.execute(
+            select(CredentialBatchEntry.position, CredentialBatchEntry.app_username,
+                   CredentialBatchEntry.login_email, CredentialBatchEntry.initial_password)
+            .join(CredentialBatch, CredentialBatch.id == CredentialBatchEntry.batch_id)
+            .where(CredentialBatchEntry.batch_id == batch_id, CredentialBatchEntry.position > last_position,
+                   CredentialBatch.expires_at > _utcnow()) # A batch that expires mid-export stops there
+            .order_by(CredentialBatchEntry.position)
+            .limit(EXPORT_PAGE_SIZE)
+        ).all()
+        if not page:
+            return
+        for row in page:
+            yield row
+        last_position = page[-1].position
+
+
+def _csv_safe(value):
+    # Stop spreadsheet apps evaluating roster-supplied cells as formulas. Not applied to the
+    # generated passwords, which may legitimately start with these characters.
+    return "'" + value if value[:1] in ('=', '+', '-', '@') else value
+
+
+def iter_credentials_csv(batch_id):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(["username", "login_email", "initial_password"])
+    yield take()
+    for entry in _iter_entries(batch_id):
+        writer.writerow([_csv_safe(entry.app_username), _csv_safe(entry.login_email), entry.initial_password])
+        yield take()
+
+
+SLIPS_HEAD = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Student login slips</title>
+<style>
+body {{ font-family: sans-serif; margin: 1cm; }}
+.slip {{ display: inline-block; box-sizing: border-box; width: 48%; margin: 0 1% 0.5cm 0; padding: 0.4cm;
+         border: 1px dashed #888; page-break-inside: avoid; vertical-align: top; }}
+.slip h2 {{ font-size: 1em; margin: 0 0 0.3em; }}
+.slip dt {{ font-weight: bold; float: left; width: 6em; }}
+.slip dd {{ margin: 0 0 0.2em 6em; font-family: monospace; font-size: 1.1em; }}
+</style></head><body>
+<h1>{title}</h1>
+'''
+
+SLIP = '''<div class="slip"><h2>{site}</h2><dl>
+<dt>Username</dt><dd>{username}</dd>
+<dt>Email</dt><dd>{email}</dd>
+<dt>Password</dt><dd>{password}</dd>
+</dl></div>
+'''
+
+
+def iter_login_slips_html(batch_id, class_name=None):
+    # Takes plain values: the generator runs after the view returns, when ORM objects may be detached
+    title = f"Login slips: {class_name}" if class_name else "Login slips"
+    yield SLIPS_HEAD.format(title=html.escape(title))
+    for entry in _iter_entries(batch_id):
+        yield SLIP.format(site="MGS CompSci Hub", username=html.escape(entry.app_username),
+                          email=html.escape(entry.login_email), password=html.escape(entry.initial_password))
+    yield "</body></html>\n"
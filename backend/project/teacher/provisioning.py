@@ -0,0 +1,267 @@
+# MGSCompSciHub/backend/project/teacher/provisioning.py
+'''
+Bulk student provisioning.
+
+Accounts are planned locally (username, synthetic login email, initial password and its
+pbkdf2_sha256 hash) and then created in Firebase either
+- with import_users (up to 1000 per call, passwords pre-hashed so Firebase never sees them in
+  plain text), followed by one bulk insert of the local User rows, or
+- with per-user create_user calls fanned out over a bounded thread pool, the local rows staged and
+  committed once.
+Both paths return one report row per planned student instead of silently skipping failures.
+
+Batches too large for one request run as a 'provision_students' background job (see project/jobs.py),
+planned and created chunk by chunk so progress and cancellation are visible between chunks.
+'''
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth_admin
+from passlib.hash import pbkdf2_sha256
+from flask import current_app
+from sqlalchemy import insert
+
+from ..models import db, User, RoleEnum
+from ..auth.utils import generate_random_password
+from ..auth.usernames import username_pool
+from ..auth.principal_cache import principal_cache
+from ..db_utils import reserve_id_block
+from ..etags import bump_class_version
+from ..hashing import password_hasher
+from ..jobs import job_runner, JobCancelled
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_IMPORT_BATCH_SIZE = 1000 # import_users limit per call
+STUDENT_EMAIL_DOMAIN = 'mgscompscihub-students.firebase'
+STUDENT_EMAIL_SEQUENCE = 'student_email'
+PROVISION_JOB_TYPE = 'provision_students'
+
+
+class StudentAccountSpec(NamedTuple):
+    firebase_uid: str
+    app_username: str
+    firebase_email: str
+    initial_password: str
+    password_hash: str # passlib pbkdf2_sha256 string, stored locally and imported into Firebase
+
+
+def allocate_student_email_numbers(count):
+    '''Reserves `count` unique numbers for synthetic student emails in one statement.'''
+    first = reserve_id_block(STUDENT_EMAIL_SEQUENCE, count)
+    return range(first, first + count)
+
+
+def student_firebase_email(app_username, email_number):
+    return f"{app_username.replace('_', '')}{email_number}@{STUDENT_EMAIL_DOMAIN}".lower()
+
+
+def plan_student_accounts(num_students, app_usernames=None, firebase_emails=None):
+    '''
+    Generates usernames, login emails and hashed initial passwords for a batch of new students.
+    `app_usernames` / `firebase_emails` optionally fix some of them (e.g. from an uploaded roster);
+    entries left as None are generated.
+    '''
+    app_usernames = list(app_usernames or [None] * num_students)
+    firebase_emails = list(firebase_emails or [None] * num_students)
+    chosen_usernames = [name for name in app_usernames if name is not None]
+    if chosen_usernames:
+        username_pool.reserve(chosen_usernames)
+    missing_usernames = [index for index, name in enumerate(app_usernames) if name is None]
+    if missing_usernames:
+        for index, name in zip(missing_usernames, username_pool.allocate(len(missing_usernames))): # One query for the whole batch
+            app_usernames[index] = name
+    missing_emails = [index for index, email in enumerate(firebase_emails) if email is None]
+    if missing_emails:
+        for index, email_number in zip(missing_emails, allocate_student_email_numbers(len(missing_emails))):
+            firebase_emails[index] = student_firebase_email(app_usernames[index], email_number)
+    initial_passwords = [generate_random_password(10) for _ in range(num_students)]
+    password_hashes = password_hasher.hash_many(initial_passwords) # Parallel across cores
+    return [StudentAccountSpec(
+        firebase_uid=uuid.uuid4().hex, # import_users needs us to choose the UID
+        app_username=app_username,
+        firebase_email=firebase_email,
+        initial_password=initial_password,
+        password_hash=password_hash,
+    ) for app_username, firebase_email, initial_password, password_hash
+        in zip(app_usernames, firebase_emails, initial_passwords, password_hashes)]
+
+
+def _import_record(spec):
+    parsed = pbkdf2_sha256.parsehash(spec.password_hash)
+    record = firebase_auth_admin.ImportUserRecord(
+        uid=spec.firebase_uid,
+        email=spec.firebase_email,
+        email_verified=False,
+        display_name=spec.app_username,
+        password_hash=parsed['checksum'],
+        password_salt=parsed['salt'],
+    )
+    return record, parsed['rounds']
+
+
+def _report_row(spec, error=None):
+    row = {
+        "app_username": spec.app_username,
+        "firebase_login_email": spec.firebase_email,
+        "firebase_uid": spec.firebase_uid,
+        "success": error is None,
+    }
+    if error is None:
+        row["initial_password"] = spec.initial_password
+    else:
+        row["error"] = error
+    return row
+
+
+def import_student_accounts(specs, class_id):
+    '''
+    Creates the planned accounts in Firebase via import_users and inserts the local User rows for
+    the ones Firebase accepted. Returns one report row per spec, in order.
+    '''
+    errors = {} # index into specs -> reason
+    for start in range(0, len(specs), FIREBASE_IMPORT_BATCH_SIZE):
+        chunk = specs[start:start + FIREBASE_IMPORT_BATCH_SIZE]
+        records_by_rounds = {}
+        for offset, spec in enumerate(chunk):
+            record, rounds = _import_record(spec)
+            records_by_rounds.setdefault(rounds, []).append((start + offset, record))
+        for rounds, indexed_records in records_by_rounds.items():
+            try:
+                result = firebase_auth_admin.import_users(
+                    [record for _, record in indexed_records],
+                    hash_alg=firebase_auth_admin.UserImportHash.pbkdf2_sha256(rounds=rounds),
+                    app=firebase_admin.get_app()
+                )
+                for error_info in result.errors:
+                    errors[indexed_records[error_info.index][0]] = error_info.reason
+            except Exception as e:
+                logger.error(f"Firebase import_users failed for {len(indexed_records)} student(s): {e}", exc_info=True)
+                for index, _ in indexed_records:
+                    errors[index] = f"Firebase import failed: {e}"
+
+    imported = [spec for index, spec in enumerate(specs) if index not in errors]
+    if imported:
+        try:
+            db.session.execute(insert(User), [{
+                "firebase_uid": spec.firebase_uid,
+                "username": spec.app_username,
+                "email": spec.firebase_email,
+                "password_hash": spec.password_hash,
+                "role": RoleEnum.STUDENT,
+                "is_mock_teacher": False,
+                "student_class_id": class_id,
+            } for spec in imported])
+            bump_class_version(class_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error bulk-inserting {len(imported)} local student record(s); removing them from Firebase: {e}", exc_info=True)
+            _delete_firebase_users([spec.firebase_uid for spec in imported])
+            for index, spec in enumerate(specs):
+                errors.setdefault(index, "Could not save the student to the local database.")
+        else:
+            for spec in imported:
+                principal_cache.invalidate(spec.firebase_uid)
+
+    username_pool.release([spec.app_username for index, spec in enumerate(specs) if index in errors])
+    return [_report_row(spec, errors.get(index)) for index, spec in enumerate(specs)]
+
+
+def _create_firebase_user(spec):
+    '''Runs on a pool thread: network only, no DB or app-context access. Returns an error string or None.'''
+    try:
+        firebase_auth_admin.create_user(
+            uid=spec.firebase_uid,
+            email=spec.firebase_email,
+            password=spec.initial_password,
+            display_name=spec.app_username,
+            email_verified=False,
+            app=firebase_admin.get_app()
+        )
+        return None
+    except firebase_auth_admin.EmailAlreadyExistsError:
+        return "A Firebase account with this email already exists."
+    except Exception as e:
+        logger.error(f"Error creating Firebase student {spec.firebase_email}: {e}", exc_info=True)
+        return f"Firebase account creation failed: {e}"
+
+
+def create_student_accounts_parallel(specs, class_id, max_workers):
+    '''
+    Creates the planned accounts with create_user on a bounded thread pool (the calls are almost all
+    network wait), then stages the local User rows for the successes and commits once.
+    Returns one report row per spec, in order.
+    '''
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(specs) or 1)), thread_name_prefix='provision') as pool:
+        firebase_errors = list(pool.map(_create_firebase_user, specs))
+    errors = {index: error for index, error in enumerate(firebase_errors) if error is not None}
+
+    created = [spec for index, spec in enumerate(specs) if index not in errors]
+    if created:
+        try:
+            for spec in created:
+                db.session.add(User(
+                    firebase_uid=spec.firebase_uid,
+                    username=spec.app_username,
+                    email=spec.firebase_email,
+                    password_hash=spec.password_hash,
+                    role=RoleEnum.STUDENT,
+                    student_class_id=class_id,
+                ))
+            bump_class_version(class_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error committing {len(created)} local student record(s); removing them from Firebase: {e}", exc_info=True)
+            _delete_firebase_users([spec.firebase_uid for spec in created])
+            for index, spec in enumerate(specs):
+                errors.setdefault(index, "Could not save the student to the local database.")
+
+    username_pool.release([spec.app_username for index, spec in enumerate(specs) if index in errors])
+    return [_report_row(spec, errors.get(index)) for index, spec in enumerate(specs)]
+
+
+def _delete_firebase_users(firebase_uids):
+    '''Best-effort cleanup so a failed local insert doesn't leave orphaned Firebase accounts.'''
+    for start in range(0, len(firebase_uids), FIREBASE_IMPORT_BATCH_SIZE):
+        try:
+            firebase_auth_admin.delete_users(firebase_uids[start:start + FIREBASE_IMPORT_BATCH_SIZE], app=firebase_admin.get_app())
+        except Exception as e:
+            logger.error(f"Could not clean up orphaned Firebase students: {e}", exc_info=True)
+
+
+@job_runner.handler(PROVISION_JOB_TYPE)
+def run_provisioning_job(ctx, params):
+    '''
+    Job handler: provisions params["num_students"] students into params["class_id"] in chunks of
+    PROVISION_JOB_CHUNK_SIZE. A cancelled job keeps the report for the chunks already created.
+    Initial passwords are stored as a credential batch; the result only carries its id.
+    '''
+    class_id = params["class_id"]
+    total = params["num_students"]
+    chunk_size = max(1, current_app.config.get('PROVISION_JOB_CHUNK_SIZE', 100))
+    report = []
+    ctx.set_progress(0, total)
+    for start in range(0, total, chunk_size):
+        if ctx.cancel_requested():
+            raise JobCancelled(_job_result(report, ctx, class_id))
+        specs = plan_student_accounts(min(chunk_size, total - start))
+        if params.get("parallel"):
+            report.extend(create_student_accounts_parallel(specs, class_id, current_app.config.get('PROVISION_MAX_WORKERS', 8)))
+        else:
+            report.extend(import_student_accounts(specs, class_id))
+        ctx.set_progress(len(report), total)
+    created = sum(1 for row in report if row["success"])
+    logger.info(f"Provisioning job {ctx.job_id} created {created}/{total} student(s) for class {class_id}.")
+    return _job_result(report, ctx, class_id)
+
+
+def _job_result(report, ctx, class_id):
+    # Job results are kept indefinitely, so passwords go into a short-lived credential batch instead
+    from .credentials import store_credentials
+    report, credentials = store_credentials(report, ctx.created_by_id, class_id)
+    return {"report": report, "credentials": credentials}
@@ -0,0 +1,282 @@
+# MGSCompSciHub/backend/project/teacher/queries.py
+'''
+Set-based read queries behind the teacher dashboard.
+
+Each function answers its view with a fixed number of statements, however many classes, students
+or assignments are involved, and selects only the columns the view returns.
+
+Completion: a student's completion of an assignment is tasks with progress / task count, capped
+at 1. The task count is Worksheet.task_count when set, otherwise the number of distinct tasks
+saved for that assignment (the best lower bound available). Overviews take the counts from the
+incrementally maintained AssignmentStats rows instead of scanning worksheet_progress.
+
+The *_stamp() functions return the ETag version stamp for a view (see project/etags.py): one
+aggregate statement, or None when the class/assignment is not the teacher's.
+'''
+import math
+from array import array
+from datetime import datetime, timezone
+
+from sqlalchemy import Float, and_, case, cast, func, literal, or_, select
+
+from ..models import db, Assignment, AssignmentStats, Class, RoleEnum, User, Worksheet, WorksheetProgress
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def active_assignment_condition(now=None):
+    '''Assignments with no due date, or one that has not passed yet.'''
+    now = now or _utcnow()
+    return or_(Assignment.due_date.is_(None), Assignment.due_date >= now)
+
+
+def completion_fraction(tasks_done, total_tasks):
+    '''SQL expression for min(tasks_done / total_tasks, 1), or 0 when the total is unknown.'''
+    return case(
+        (or_(total_tasks.is_(None), total_tasks <= 0), literal(0.0)),
+        (tasks_done >= total_tasks, literal(1.0)),
+        else_=cast(tasks_done, Float) / total_tasks,
+    )
+
+
+def _class_students(class_id):
+    return and_(User.student_class_id == class_id, User.role == RoleEnum.STUDENT)
+
+
+def class_overview_stamp(teacher_id):
+    teacher_classes = select(Class.id).where(Class.teacher_id == teacher_id)
+    teacher_assignments = Assignment.class_id.in_(teacher_classes)
+    row = db.session.execute(select(
+        func.count(Class.id), func.max(Class.id), func.sum(Class.version),
+        select(func.count(User.id)).where(User.student_class_id.in_(teacher_classes), User.role == RoleEnum.STUDENT)
+        .scalar_subquery(),
+        # Active counts change as due dates pass, with no write at all
+        select(func.count(Assignment.id)).where(teacher_assignments, active_assignment_condition()).scalar_subquery(),
+        select(func.sum(AssignmentStats.progress_rows)).join(Assignment, Assignment.id == AssignmentStats.assignment_id)
+        .where(teacher_assignments).scalar_subquery(),
+    ).where(Class.teacher_id == teacher_id)).one()
+    return (teacher_id, *row)
+
+
+def class_details_stamp(class_id, teacher_id):
+    row = db.session.execute(select(
+        Class.version,
+        select(func.count(User.id)).where(_class_students(class_id)).scalar_subquery(),
+        select(func.max(User.id)).where(_class_students(class_id)).scalar_subquery(),
+        select(func.count(Assignment.id)).where(Assignment.class_id == class_id).scalar_subquery(),
+        select(func.max(Assignment.id)).where(Assignment.class_id == class_id).scalar_subquery(),
+    ).where(Class.id == class_id, Class.teacher_id == teacher_id)).first()
+    return None if row is None else (class_id, *row)
+
+
+def assignment_progress_stamp(class_id, assignment_id, teacher_id):
+    # last_activity moves on every save, which covers the per-task last_updated in the view
+    row = db.session.execute(
+        select(Class.version,
+               select(func.count(User.id)).where(_class_students(class_id)).scalar_subquery(),
+               AssignmentStats.progress_rows, AssignmentStats.scored_count, AssignmentStats.score_sum,
+               AssignmentStats.last_activity)
+        .select_from(Assignment)
+        .join(Class, Class.id == Assignment.class_id)
+        .outerjoin(AssignmentStats, AssignmentStats.assignment_id == Assignment.id)
+        .where(Assignment.id == assignment_id, Assignment.class_id == class_id, Class.teacher_id == teacher_id)
+    ).first()
+    return None if row is None else (class_id, assignment_id, *row)
+
+
+def class_overview(teacher_id):
+    '''
+    One statement returning, per class of the teacher: student count, active assignment count and
+    the average completion over active assignments. Completion is read from AssignmentStats
+    (saved tasks / (task count x students)), so no progress rows are scanned.
+    '''
+    teacher_classes = select(Class.id).where(Class.teacher_id == teacher_id)
+    student_counts = (
+        select(User.student_class_id.label('class_id'), func.count(User.id).label('students'))
+        .where(User.role == RoleEnum.STUDENT, User.student_class_id.in_(teacher_classes))
+        .group_by(User.student_class_id)
+        .subquery()
+    )
+    total_tasks = func.coalesce(Worksheet.task_count, AssignmentStats.distinct_tasks)
+    assignment_totals = (
+        select(Assignment.class_id,
+               func.count(Assignment.id).label('assignments'),
+               func.sum(completion_fraction(func.coalesce(AssignmentStats.progress_rows, 0),
+                                            total_tasks * student_counts.c.students)).label('completed'))
+        .join(Worksheet, Worksheet.id == Assignment.worksheet_id)
+        .outerjoin(AssignmentStats, AssignmentStats.assignment_id == Assignment.id)
+        .outerjoin(student_counts, student_counts.c.class_id == Assignment.class_id)
+        .where(Assignment.class_id.in_(teacher_classes), active_assignment_condition())
+        .group_by(Assignment.class_id)
+        .subquery()
+    )
+
+    rows = db.session.execute(
+        select(Class.id, Class.name,
+               func.coalesce(student_counts.c.students, 0).label('students'),
+               func.coalesce(assignment_totals.c.assignments, 0).label('assignments'),
+               func.coalesce(assignment_totals.c.completed, 0.0).label('completed'))
+        .outerjoin(student_counts, student_counts.c.class_id == Class.id)
+        .outerjoin(assignment_totals, assignment_totals.c.class_id == Class.id)
+        .where(Class.teacher_id == teacher_id)
+        .order_by(Class.name)
+    ).all()
+
+    overview = []
+    for row in rows:
+        has_pairs = row.students and row.assignments # Students with no progress count as 0% complete
+        overview.append({
+            "id": row.id,
+            "name": row.name,
+            "student_count": row.students,
+            "active_assignment_count": row.assignments,
+            "average_completion_rate": round(row.completed / row.assignments, 4) if has_pairs else None,
+        })
+    return overview
+
+
+def assignment_progress_by_student(class_id, assignment_id):
+    '''
+    Every student in the class with their progress rows for one assignment, from one outer-joined
+    projection. answer_data is never selected. Students without progress get an empty list.
+    '''
+    rows = db.session.execute(
+        select(User.id, User.username, User.firebase_uid,
+               WorksheetProgress.task_identifier, WorksheetProgress.score, WorksheetProgress.last_updated)
+        .outerjoin(WorksheetProgress, and_(WorksheetProgress.student_id == User.id,
+                                           WorksheetProgress.assignment_id == assignment_id))
+        .where(User.student_class_id == class_id, User.role == RoleEnum.STUDENT)
+        .order_by(User.id, WorksheetProgress.task_identifier)
+    ).all()
+
+    students = {}
+    for student_id, username, firebase_uid, task_identifier, score, last_updated in rows:
+        student = students.get(student_id)
+        if student is None:
+            student = students[student_id] = {
+                "student_db_id": student_id, "student_username": username, "firebase_uid": firebase_uid,
+                "has_progress": False, "progress_details": [],
+            }
+        if task_identifier is not None:
+            student["has_progress"] = True
+            student["progress_details"].append({
+                "task_identifier": task_identifier, "score": score,
+                "last_updated": last_updated.isoformat() if last_updated else None,
+            })
+    return list(students.values())
+
+
+def _median(sorted_values):
+    n = len(sorted_values)
+    if not n:
+        return None
+    mid = n // 2
+    return sorted_values[mid] if n % 2 else (sorted_values[mid - 1] + sorted_values[mid]) / 2
+
+
+def _nan_to_none(values):
+    return [None if math.isnan(value) else value for value in values]
+
+
+def class_gradebook(class_id):
+    '''
+    Students x (assignment, task) score matrix for a class with summary statistics, built from one
+    bulk fetch of the class's progress rows (plus one query each for students and assignments).
+
+    The matrix is held as flat typed arrays (array('d') scores with NaN for "no score", a bytearray
+    of attempted flags), so memory is a few bytes per cell rather than a dict per record. The result
+    is columnar: parallel lists per axis, and the matrix as one list per student.
+    '''
+    students = db.session.execute(
+        select(User.id, User.username)
+        .where(_class_students(class_id))
+        .order_by(User.username)
+    ).all()
+    assignments = db.session.execute(
+        select(Assignment.id, Worksheet.title, Worksheet.task_count)
+        .join(Worksheet, Worksheet.id == Assignment.worksheet_id)
+        .where(Assignment.class_id == class_id)
+        .order_by(Assignment.assigned_date, Assignment.id)
+    ).all()
+    progress = db.session.execute(
+        select(WorksheetProgress.student_id, WorksheetProgress.assignment_id,
+               WorksheetProgress.task_identifier, WorksheetProgress.score)
+        .join(User, User.id == WorksheetProgress.student_id)
+        .join(Assignment, Assignment.id == WorksheetProgress.assignment_id)
+        .where(_class_students(class_id), Assignment.class_id == class_id) # Same students as the rows above
+    ).all()
+
+    # Columns: the tasks seen for each assignment, grouped by assignment and sorted by identifier
+    tasks_by_assignment = {assignment_id: set() for assignment_id, _, _ in assignments}
+    for _, assignment_id, task_identifier, _ in progress:
+        tasks_by_assignment[assignment_id].add(task_identifier)
+    column_assignment_ids, column_tasks, column_index = [], [], {}
+    for assignment_id, _, _ in assignments:
+        for task_identifier in sorted(tasks_by_assignment[assignment_id]):
+            column_index[(assignment_id, task_identifier)] = len(column_tasks)
+            column_assignment_ids.append(assignment_id)
+            column_tasks.append(task_identifier)
+
+    num_students, num_columns = len(students), len(column_tasks)
+    row_index = {student_id: i for i, (student_id, _) in enumerate(students)}
+    scores = array('d', [math.nan]) * (num_students * num_columns)
+    attempted = bytearray(num_students * num_columns)
+    for student_id, assignment_id, task_identifier, score in progress:
+        cell = row_index[student_id] * num_columns + column_index[(assignment_id, task_identifier)]
+        attempted[cell] = 1
+        if score is not None:
+            scores[cell] = score
+
+    # Per-student totals and per-assignment completion (tasks attempted / task count, capped at 1)
+    assignment_columns = {}
+    for column, assignment_id in enumerate(column_assignment_ids):
+        assignment_columns.setdefault(assignment_id, []).append(column)
+    assignment_totals = [task_count or len(tasks_by_assignment[assignment_id]) for assignment_id, _, task_count in assignments]
+    student_totals, student_completion, completion_matrix = array('d'), array('d'), []
+    for row in range(num_students):
+        start = row * num_columns
+        row_scores = scores[start:start + num_columns]
+        student_totals.append(sum(value for value in row_scores if not math.isnan(value)))
+        fractions = []
+        for (assignment_id, _, _), total in zip(assignments, assignment_totals):
+            done = sum(attempted[start + column] for column in assignment_columns.get(assignment_id, ()))
+            fractions.append(min(done / total, 1.0) if total else 0.0)
+        completion_matrix.append([round(fraction, 4) for fraction in fractions])
+        student_completion.append(sum(fractions) / len(fractions) if fractions else math.nan)
+
+    # Per-task mean, median and completion (share of students who attempted it)
+    task_means, task_medians, task_completion = array('d'), array('d'), array('d')
+    for column in range(num_columns):
+        column_scores = sorted(value for value in scores[column::num_columns] if not math.isnan(value))
+        task_means.append(sum(column_scores) / len(column_scores) if column_scores else math.nan)
+        median = _median(column_scores)
+        task_medians.append(math.nan if median is None else median)
+        task_completion.append(sum(attempted[column::num_columns]) / num_students if num_students else math.nan)
+
+    return {
+        "students": {
+            "id": [student_id for student_id, _ in students],
+            "username": [username for _, username in students],
+            "total_score": list(student_totals),
+            "completion": _nan_to_none(round(value, 4) for value in student_completion),
+        },
+        "assignments": {
+            "id": [assignment_id for assignment_id, _, _ in assignments],
+            "worksheet_title": [title for _, title, _ in assignments],
+            "task_count": assignment_totals,
+        },
+        "tasks": {
+            "assignment_id": column_assignment_ids,
+            "task_identifier": column_tasks,
+            "mean": _nan_to_none(task_means),
+            "median": _nan_to_none(task_medians),
+            "completion": _nan_to_none(round(value, 4) for value in task_completion),
+        },
+        # One row per student, one entry per task column; null = no score
+        "scores": [_nan_to_none(scores[row * num_columns:(row + 1) * num_columns]) for row in range(num_students)],
+        "attempted": [list(attempted[row * num_columns:(row + 1) * num_columns]) for row in range(num_students)],
+        # One row per student, one entry per assignment
+        "assignment_completion": completion_matrix,
+    }
@@ -0,0 +1,145 @@
+# MGSCompSciHub/backend/project/teacher/roster.py
+'''
+CSV roster import.
+
+The upload is read as a text stream and parsed chunk by chunk, so memory use is bounded by the
+chunk size rather than the file size. Each chunk is validated, deduplicated against the rest of the
+upload and against existing users with a single `username IN (...) OR email IN (...)` query, and
+provisioned through the bulk import_users path.
+
+Recognised columns (header row required, names case-insensitive): `username` and `email`, both
+optional per row; blanks are generated as for random students.
+'''
+import csv
+import io
+import re
+from itertools import islice
+
+from sqlalchemy import or_, select
+
+from ..models import db, User
+from .provisioning import plan_student_accounts, import_student_accounts
+
+USERNAME_PATTERN = re.compile(r"[a-z0-9][a-z0-9_.-]{2,79}")
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+MAX_EMAIL_LENGTH = 120 # User.email column size
+
+
+class RosterFormatError(ValueError):
+    pass
+
+
+def iter_roster_chunks(binary_stream, chunk_size):
+    '''Yields lists of (line_number, {"username": str|None, "email": str|None}) from a CSV byte stream.'''
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='') # utf-8-sig drops Excel's BOM
+    try:
+        reader = csv.reader(text)
+        try:
+            header = [column.strip().lower() for column in next(reader)]
+        except StopIteration:
+            raise RosterFormatError("The roster file is empty.")
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise RosterFormatError(f"Could not read the roster header: {e}")
+        username_col = header.index('username') if 'username' in header else None
+        email_col = header.index('email') if 'email' in header else None
+
+        def cell(row, col):
+            if col is None or col >= len(row):
+                return None
+            return row[col].strip() or None
+
+        while True:
+            try:
+                chunk = [(reader.line_num, row) for row in islice(reader, chunk_size)]
+            except (csv.Error, UnicodeDecodeError) as e:
+                raise RosterFormatError(f"Could not parse the roster near line {reader.line_num}: {e}")
+            if not chunk:
+                return
+            yield [(line_number, {"username": cell(row, username_col), "email": cell(row, email_col)})
+                   for line_number, row in chunk if any(value.strip() for value in row)]
+    finally:
+        text.detach() # Leave the underlying request stream for Werkzeug to close
+
+
+def validate_roster_chunk(rows, seen_usernames, seen_emails):
+    '''
+    Normalises and checks one chunk. Returns (accepted, rejected) where accepted is a list of
+    (line_number, username|None, email|None) and rejected a list of (line_number, row, reason).
+    `seen_usernames` / `seen_emails` carry values from earlier chunks and are updated in place.
+    '''
+    accepted, rejected = [], []
+    for line_number, row in rows:
+        username = row["username"].lower() if row["username"] else None
+        email = row["email"].lower() if row["email"] else None
+        if username is not None and not USERNAME_PATTERN.fullmatch(username):
+            rejected.append((line_number, row, "Usernames must be 3-80 letters, digits, '.', '_' or '-'."))
+        elif email is not None and (len(email) > MAX_EMAIL_LENGTH or not EMAIL_PATTERN.fullmatch(email)):
+            rejected.append((line_number, row, "Invalid email address."))
+        elif username is not None and username in seen_usernames:
+            rejected.append((line_number, row, "Duplicate username in the roster."))
+        elif email is not None and email in seen_emails:
+            rejected.append((line_number, row, "Duplicate email in the roster."))
+        else:
+            accepted.append((line_number, username, email))
+        if username is not None:
+            seen_usernames.add(username)
+        if email is not None:
+            seen_emails.add(email)
+
+    usernames = [username for _, username, _ in accepted if username is not None]
+    emails = [email for _, _, email in accepted if email is not None]
+    if not (usernames or emails):
+        return accepted, rejected
+    conditions = []
+    if usernames:
+        conditions.append(User.username.in_(usernames))
+    if emails:
+        conditions.append(User.email.in_(emails))
+    taken_usernames, taken_emails = set(), set()
+    for existing_username, existing_email in db.session.execute(select(User.username, User.email).where(or_(*conditions))):
+        taken_usernames.add(existing_username)
+        if existing_email:
+            taken_emails.add(existing_email.lower())
+    still_accepted = []
+    for line_number, username, email in accepted:
+        row = {"username": username, "email": email}
+        if username is not None and username in taken_usernames:
+            rejected.append((line_number, row, "Username is already in use."))
+        elif email is not None and email in taken_emails:
+            rejected.append((line_number, row, "A user with this email already exists."))
+        else:
+            still_accepted.append((line_number, username, email))
+    return still_accepted, rejected
+
+
+def import_roster(binary_stream, class_id, chunk_size=200, max_rows=2000):
+    '''
+    Provisions one student per roster row into `class_id`. Returns (report, truncated): one report
+    row per data row, in file order, each with its CSV "line"; truncated is True if rows beyond
+    `max_rows` were ignored. Raises RosterFormatError if the file cannot be parsed at all.
+    '''
+    report = []
+    seen_usernames, seen_emails = set(), set()
+    rows_read = 0
+    truncated = False
+    for rows in iter_roster_chunks(binary_stream, chunk_size):
+        if not rows:
+            continue
+        if rows_read + len(rows) > max_rows:
+            rows = rows[:max_rows - rows_read]
+            truncated = True
+        if not rows:
+            break
+        rows_read += len(rows)
+        accepted, rejected = validate_roster_chunk(rows, seen_usernames, seen_emails)
+        chunk_report = [(line_number, {
+            "app_username": row["username"], "firebase_login_email": row["email"], "success": False, "error": reason,
+        }) for line_number, row, reason in rejected]
+        if accepted:
+            specs = plan_student_accounts(len(accepted), [username for _, username, _ in accepted], [email for _, _, email in accepted])
+            chunk_report.extend(zip([line_number for line_number, _, _ in accepted], import_student_accounts(specs, class_id)))
+        for line_number, row in sorted(chunk_report, key=lambda item: item[0]):
+            report.append({"line": line_number, **row})
+        if truncated:
+            break
+    return report, truncated
@@ -1,11 +1,34 @@
 # MGSCompSciHub/backend/project/teacher/routes.py
-from flask import request, jsonify, current_app, g
+from flask import request, jsonify, current_app, g, Response, stream_with_context, url_for, abort
+from sqlalchemy import select
 from . import teacher_bp
-from ..models import db, User, Class, RoleEnum, Worksheet, Assignment
-from ..auth.utils import firebase_teacher_required, generate_unique_app_username, generate_random_password
+from ..models import db, User, Class, RoleEnum, Worksheet, Assignment, AssignmentStats, Job
+from ..auth.utils import firebase_teacher_required, generate_random_password, revoke_firebase_user_tokens
+from ..auth.usernames import username_pool
+from ..auth.token_cache import verified_token_cache
+from ..auth.local_verify import signing_key_store
+from ..auth.revocation import revocation_index
+from ..auth.principal_cache import principal_cache
+from ..auth.routes import verify_session_flights
+from ..metrics import counters
+from ..hashing import password_hasher
+from ..jobs import job_runner
+from ..etags import bump_class_version, conditional_response
+from ..pubsub import pubsub_hub, RESYNC
+from ..student.progress import progress_channel
+from ..student.write_behind import progress_buffer
+from .queries import class_overview, assignment_progress_by_student, class_gradebook, \
+    class_overview_stamp, class_details_stamp, assignment_progress_stamp
+from .roster import import_roster, RosterFormatError
+from .credentials import store_credentials, get_credential_batch, delete_credential_batch, \
+    iter_credentials_csv, iter_login_slips_html
+from .provisioning import plan_student_accounts, import_student_accounts, create_student_accounts_parallel, \
+    allocate_student_email_numbers, student_firebase_email, PROVISION_JOB_TYPE
 import firebase_admin
 from firebase_admin import auth as firebase_auth_admin # Alias
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -38,14 +61,19 @@ def create_class():
 @teacher_bp.route('/classes', methods=['GET'])
 @firebase_teacher_required
 def get_teacher_classes():
+    '''Classes with student counts, active assignments and average completion, from one aggregate query.'''
     teacher = g.current_user
-    classes = Class.query.filter_by(teacher_id=teacher.id).order_by(Class.name).all()
-    return jsonify(success=True, classes=[{"id": c.id, "name": c.name, "student_count": c.students.count()} for c in classes])
+    return conditional_response('teacher_classes', class_overview_stamp(teacher.id),
+                                lambda: jsonify(success=True, classes=class_overview(teacher.id)))
 
 @teacher_bp.route('/classes/<int:class_id>', methods=['GET'])
 @firebase_teacher_required
 def get_class_details(class_id):
     teacher = g.current_user
+    return conditional_response('class_details', class_details_stamp(class_id, teacher.id),
+                                lambda: _class_details_response(class_id, teacher))
+
+def _class_details_response(class_id, teacher):
     target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first_or_404("Class not found or not managed by you.")
     # Students in local DB linked to this class
     students_in_db = User.query.filter_by(student_class_id=target_class.id, role=RoleEnum.STUDENT).all()
@@ -85,16 +113,35 @@ def create_firebase_student_account_route():
     if not target_class:
         return jsonify(success=False, message="Class not found or not managed by this teacher."), 404
 
+    if data.get('parallel', current_app.config.get('PROVISION_PARALLEL_DEFAULT', False)):
+        # create_user calls run concurrently on a bounded pool; local rows are committed once and
+        # every student gets a report row, failed or not.
+        specs = plan_student_accounts(num_students_to_create)
+        report = create_student_accounts_parallel(specs, target_class.id, current_app.config.get('PROVISION_MAX_WORKERS', 8))
+        created = [row for row in report if row["success"]]
+        logger.info(f"Teacher {teacher.username} created {len(created)}/{len(report)} student(s) in parallel for class {target_class.name}.")
+        if not created:
+            return jsonify(success=False, message="No student accounts were created.", report=report), 500
+        # Passwords are exported from the credential batch rather than returned for every row
+        report, credentials = store_credentials(report, teacher.id, target_class.id)
+        return jsonify({
+            "success": True,
+            "message": f"{len(created)} of {len(report)} student account(s) created successfully.",
+            "report": report,
+            "credentials": credentials
+        }), 201
+
     created_accounts_info = []
-    for i in range(num_students_to_create):
-        app_display_username = generate_unique_app_username() # Uses the util
+    app_display_usernames = username_pool.allocate(num_students_to_create) # One query for the whole batch
+    email_numbers = allocate_student_email_numbers(num_students_to_create) # One statement for the whole batch
+    initial_passwords = [generate_random_password(10) for _ in range(num_students_to_create)]
+    password_hashes = password_hasher.hash_many(initial_passwords) # Hashed across cores, not inline per student
+    for app_display_username, email_number, initial_password, password_hash in zip(app_display_usernames, email_numbers, initial_passwords, password_hashes):
         
         # Construct a unique, non-real email for Firebase. Domain should be controlled by you or a placeholder.
-        # Using a count or random element to help ensure uniqueness if app_display_username isn't globally unique enough.
-        # This email is primarily an identifier for Firebase Auth.
-        firebase_user_count = User.query.count() # Simple way to add a unique number
-        firebase_email = f"{app_display_username.replace('_', '')}{firebase_user_count + i + 1}@mgscompscihub-students.firebase".lower() # Example domain
-        initial_password = generate_random_password(10)
+        # The number comes from a reserved block of the 'student_email' sequence, so it is unique across
+        # concurrent requests. This email is primarily an identifier for Firebase Auth.
+        firebase_email = student_firebase_email(app_display_username, email_number)
 
         try:
             fb_user_record = firebase_auth_admin.create_user(
@@ -111,10 +158,9 @@ def create_firebase_student_account_route():
                 email=firebase_email, # Store the generated email used for Firebase login
                 role=RoleEnum.STUDENT,
                 student_class_id=target_class.id,
-                # Set password hash locally if you want a backup, using the User model's method
-                # This ensures it's hashed with pbkdf2_sha256 if models.py is set up for that
+                # Password hash stored locally as a backup, pre-computed for the whole batch above
+                password_hash=password_hash,
             )
-            local_user.set_password(initial_password) # Hash and store password locally
             db.session.add(local_user)
             # db.session.commit() # Commit per student or batch commit later
 
@@ -122,7 +168,8 @@ def create_firebase_student_account_route():
                 "app_username": app_display_username,
                 "firebase_login_email": firebase_email,
                 "initial_password": initial_password,
-                "firebase_uid": fb_user_record.uid
+                "firebase_uid": fb_user_record.uid,
+                "success": True
             })
 
         except firebase_admin.auth.EmailAlreadyExistsError:
@@ -138,17 +185,202 @@ def create_firebase_student_account_route():
         return jsonify(success=False, message="No student accounts were created. Check logs for errors like email conflicts."), 500
         
     try:
+        bump_class_version(target_class.id)
         db.session.commit() # Commit all successfully created local DB users
+        for account in created_accounts_info:
+            principal_cache.invalidate(account["firebase_uid"])
         logger.info(f"Teacher {teacher.username} committed {len(created_accounts_info)} student(s) to local DB for class {target_class.name}.")
-        return jsonify({
-            "success": True,
-            "message": f"{len(created_accounts_info)} student account(s) created successfully.",
-            "created_students": created_accounts_info
-        }), 201
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error committing local student DB records: {e}", exc_info=True)
         return jsonify(success=False, message="Error saving student records to local database after Firebase creation."), 500
+    # Passwords are exported from the credential batch rather than returned for every row
+    report, credentials = store_credentials(created_accounts_info, teacher.id, target_class.id)
+    return jsonify({
+        "success": True,
+        "message": f"{len(created_accounts_info)} student account(s) created successfully.",
+        "report": report,
+        "credentials": credentials
+    }), 201
+
+
+@teacher_bp.route('/classes/<int:class_id>/roster_import', methods=['POST'])
+@firebase_teacher_required
+def import_class_roster(class_id):
+    '''
+    Creates one student per row of an uploaded CSV roster (optional `username` / `email` columns).
+    Accepts multipart form data with a `file` field or a raw text/csv body; either way the upload
+    is parsed as a stream, chunk by chunk. Returns a per-row report keyed by CSV line number and a
+    credential batch for downloading the initial passwords.
+    '''
+    teacher = g.current_user
+    target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first()
+    if not target_class:
+        return jsonify(success=False, message="Class not found or not managed by this teacher."), 404
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify(success=False, message="Attach the roster as a 'file' field."), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+
+    try:
+        report, truncated = import_roster(stream, target_class.id,
+                                          chunk_size=current_app.config.get('ROSTER_IMPORT_CHUNK_SIZE', 200),
+                                          max_rows=current_app.config.get('ROSTER_IMPORT_MAX_ROWS', 2000))
+    except RosterFormatError as e:
+        return jsonify(success=False, message=str(e)), 400
+    created = [row for row in report if row["success"]]
+    logger.info(f"Teacher {teacher.username} imported a roster for class {target_class.name}: {len(created)}/{len(report)} row(s) created.")
+    message = f"{len(created)} of {len(report)} roster row(s) created."
+    if truncated:
+        message += f" Rows after the first {current_app.config.get('ROSTER_IMPORT_MAX_ROWS', 2000)} were ignored."
+    if report and not created:
+        return jsonify(success=False, message="No student accounts were created.", report=report, truncated=truncated), 422
+    # Passwords are exported from the credential batch rather than returned for every row
+    report, credentials = store_credentials(report, teacher.id, target_class.id)
+    return jsonify(success=True, message=message, report=report, truncated=truncated, credentials=credentials), 201
+
+@teacher_bp.route('/create_firebase_students/bulk', methods=['POST'])
+@firebase_teacher_required
+def bulk_create_firebase_students_route():
+    '''
+    Provisions a whole year group at once: accounts are imported into Firebase with import_users
+    (pre-hashed passwords, up to 1000 per call) and the local rows inserted in one statement.
+    Returns a per-student report; failed rows carry an "error". Initial passwords are not in the
+    report: download them from the returned credential batch (CSV or login slips).
+    '''
+    teacher = g.current_user
+    data = request.get_json() or {}
+    max_students = current_app.config.get('BULK_PROVISION_MAX_STUDENTS', 1000)
+    try:
+        class_id = int(data.get('classId'))
+        num_students_to_create = int(data.get('numStudents', 1))
+        if not (0 < num_students_to_create <= max_students):
+            raise ValueError(f"Number of students must be between 1 and {max_students}.")
+    except (TypeError, ValueError):
+        return jsonify(success=False, message=f"Invalid Class ID or number of students (1-{max_students})."), 400
+
+    target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first()
+    if not target_class:
+        return jsonify(success=False, message="Class not found or not managed by this teacher."), 404
+
+    specs = plan_student_accounts(num_students_to_create)
+    report = import_student_accounts(specs, target_class.id)
+    created = [row for row in report if row["success"]]
+    logger.info(f"Teacher {teacher.username} bulk-provisioned {len(created)}/{len(report)} student(s) for class {target_class.name}.")
+    if not created:
+        return jsonify(success=False, message="No student accounts were created.", report=report), 500
+    # Passwords are exported from the credential batch rather than returned for every row
+    report, credentials = store_credentials(report, teacher.id, target_class.id)
+    return jsonify({
+        "success": True,
+        "message": f"{len(created)} of {len(report)} student account(s) created successfully.",
+        "report": report,
+        "credentials": credentials
+    }), 201
+
+@teacher_bp.route('/credential_batches/<batch_id>/csv', methods=['GET'])
+@firebase_teacher_required
+def export_credential_batch_csv(batch_id):
+    teacher = g.current_user
+    batch = get_credential_batch(batch_id, teacher.id)
+    if batch is None:
+        return jsonify(success=False, message="Credential batch not found or expired."), 404
+    return Response(stream_with_context(iter_credentials_csv(batch.id)), mimetype='text/csv', headers={
+        "Content-Disposition": f'attachment; filename="student-logins-{batch.created_at:%Y%m%d-%H%M}.csv"',
+        "Cache-Control": "no-store",
+    })
+
+@teacher_bp.route('/credential_batches/<batch_id>/slips', methods=['GET'])
+@firebase_teacher_required
+def export_credential_batch_slips(batch_id):
+    '''Printable HTML page with one cut-out login slip per student.'''
+    teacher = g.current_user
+    batch = get_credential_batch(batch_id, teacher.id)
+    if batch is None:
+        return jsonify(success=False, message="Credential batch not found or expired."), 404
+    return Response(stream_with_context(iter_login_slips_html(batch.id, batch.target_class.name if batch.target_class else None)), mimetype='text/html', headers={"Cache-Control": "no-store"})
+
+@teacher_bp.route('/credential_batches/<batch_id>', methods=['DELETE'])
+@firebase_teacher_required
+def discard_credential_batch(batch_id):
+    '''Deletes the stored passwords once the teacher has what they need, before the batch expires.'''
+    teacher = g.current_user
+    batch = get_credential_batch(batch_id, teacher.id)
+    if batch is None:
+        return jsonify(success=False, message="Credential batch not found or expired."), 404
+    delete_credential_batch(batch)
+    return jsonify(success=True, message="Credential batch deleted.")
+
+def _provision_job_params(teacher, data):
+    max_students = current_app.config.get('PROVISION_JOB_MAX_STUDENTS', 10000)
+    try:
+        class_id = int(data.get('classId'))
+        num_students = int(data.get('numStudents', 1))
+        if not (0 < num_students <= max_students):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid Class ID or number of students (1-{max_students}).")
+    if not Class.query.filter_by(id=class_id, teacher_id=teacher.id).first():
+        raise LookupError("Class not found or not managed by this teacher.")
+    parallel = bool(data.get('parallel', current_app.config.get('PROVISION_PARALLEL_DEFAULT', False)))
+    return {"class_id": class_id, "num_students": num_students, "parallel": parallel}
+
+# job type -> fn(teacher, request data) -> params; raises ValueError (400) or LookupError (404)
+JOB_PARAM_PARSERS = {
+    PROVISION_JOB_TYPE: _provision_job_params,
+}
+
+@teacher_bp.route('/jobs', methods=['POST'])
+@firebase_teacher_required
+def enqueue_job():
+    '''Queues a long-running operation and returns 202 with the job; poll GET /jobs/<id> for progress.'''
+    teacher = g.current_user
+    data = request.get_json() or {}
+    job_type = data.get('type')
+    parse_params = JOB_PARAM_PARSERS.get(job_type)
+    if parse_params is None:
+        return jsonify(success=False, message=f"Unknown job type. Expected one of: {', '.join(sorted(JOB_PARAM_PARSERS))}."), 400
+    try:
+        params = parse_params(teacher, data)
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+    except LookupError as e:
+        return jsonify(success=False, message=str(e.args[0])), 404
+    try:
+        job = job_runner.enqueue(job_type, params, teacher.id)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error queueing {job_type} job for {teacher.username}: {e}", exc_info=True)
+        return jsonify(success=False, message="Failed to queue the job."), 500
+    logger.info(f"Teacher {teacher.username} queued job {job.id} ({job_type}).")
+    return jsonify(success=True, job=job.to_dict()), 202
+
+@teacher_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@firebase_teacher_required
+def get_job(job_id):
+    teacher = g.current_user
+    job = Job.query.filter_by(id=job_id, created_by_id=teacher.id).first_or_404("Job not found.")
+    job_info = job.to_dict()
+    credentials = (job_info["result"] or {}).get("credentials")
+    if credentials:
+        # Workers store only the batch id; the export URLs need a request to be built
+        job_info["result"] = dict(job_info["result"], credentials=dict(credentials,
+            csv_url=url_for('teacher.export_credential_batch_csv', batch_id=credentials["batch_id"]),
+            slips_url=url_for('teacher.export_credential_batch_slips', batch_id=credentials["batch_id"])))
+    return jsonify(success=True, job=job_info)
+
+@teacher_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@firebase_teacher_required
+def cancel_job(job_id):
+    '''Queued jobs are cancelled at once; running jobs stop at their next checkpoint.'''
+    teacher = g.current_user
+    job = Job.query.filter_by(id=job_id, created_by_id=teacher.id).first_or_404("Job not found.")
+    job_runner.cancel(job)
+    return jsonify(success=True, job=job.to_dict())
 
 # Update other teacher routes (assign_worksheet, get_assignment_progress_for_class)
 # to use @firebase_teacher_required and g.current_user
@@ -166,7 +398,7 @@ def assign_worksheet_to_class(class_id):
         return jsonify(success=False, message="Worksheet already assigned to this class."), 409
     try:
         assignment = Assignment(class_id=class_id, worksheet_id=worksheet_id)
-        db.session.add(assignment); db.session.commit()
+        db.session.add(assignment); bump_class_version(class_id); db.session.commit()
         logger.info(f"Worksheet {worksheet.title} assigned to class {target_class.name} by {teacher.username}")
         return jsonify(success=True, message=f"Worksheet '{worksheet.title}' assigned."), 201
     except Exception as e:
@@ -176,18 +408,104 @@ def assign_worksheet_to_class(class_id):
 @teacher_bp.route('/classes/<int:class_id>/assignments/<int:assignment_id>/progress', methods=['GET'])
 @firebase_teacher_required
 def get_assignment_progress_for_class(class_id, assignment_id):
+    '''Per-student progress on one assignment, in a constant number of queries whatever the class size.'''
     teacher = g.current_user
+    return conditional_response('assignment_progress', assignment_progress_stamp(class_id, assignment_id, teacher.id),
+                                lambda: _assignment_progress_response(class_id, assignment_id, teacher))
+
+def _assignment_progress_response(class_id, assignment_id, teacher):
     target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first_or_404("Class not found.")
-    assignment = Assignment.query.filter_by(id=assignment_id, class_id=target_class.id).first_or_404("Assignment not found.")
-    
-    students_in_class = User.query.filter_by(student_class_id=target_class.id, role=RoleEnum.STUDENT).all()
-    student_progress_data = []
-    for student in students_in_class:
-        progress_records = [{"task_identifier": pr.task_identifier, "score": pr.score, "last_updated": pr.last_updated.isoformat()}
-                            for pr in student.progress_records.filter_by(assignment_id=assignment.id).all()]
-        student_progress_data.append({
-            "student_db_id": student.id, "student_username": student.username, "firebase_uid": student.firebase_uid,
-            "has_progress": bool(progress_records), "progress_details": progress_records
-        })
-    return jsonify(success=True, assignment_progress=student_progress_data, worksheet_title=assignment.worksheet.title)
+    assignment = db.session.execute(
+        select(Assignment.id, Worksheet.title, Worksheet.task_count)
+        .join(Worksheet, Worksheet.id == Assignment.worksheet_id)
+        .where(Assignment.id == assignment_id, Assignment.class_id == target_class.id)
+    ).first()
+    if assignment is None:
+        abort(404, "Assignment not found.")
+    student_progress_data = assignment_progress_by_student(target_class.id, assignment.id)
+    stats = db.session.get(AssignmentStats, assignment.id) or AssignmentStats.empty(assignment.id) # O(1) summary, no scan
+    summary = stats.to_dict(assignment.task_count)
+    return jsonify(success=True, assignment_progress=student_progress_data, worksheet_title=assignment.title, summary=summary)
+
+
+def _progress_event_stream(subscription, heartbeat_seconds, max_stream_seconds):
+    # Plain values only: this runs after the view has returned and its DB session is gone
+    try:
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + max_stream_seconds
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=min(heartbeat_seconds, max(deadline - time.monotonic(), 0.1)))
+            if message is None:
+                yield ": keep-alive\n\n" # Keeps proxies from closing the idle connection and detects gone clients
+            elif message.get("type") == RESYNC["type"]:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(message)}\n\n"
+    finally:
+        subscription.close()
+
+
+@teacher_bp.route('/classes/<int:class_id>/assignments/<int:assignment_id>/events', methods=['GET'])
+@firebase_teacher_required
+def stream_assignment_progress(class_id, assignment_id):
+    '''
+    Server-sent events with a small delta for every progress save on the assignment, so the progress
+    view can update in place instead of polling. Sends "event: resync" when the client fell too far
+    behind and should refetch /progress. Authenticated like every other route (Authorization header),
+    so browsers read it with fetch() rather than EventSource. Streams end after SSE_MAX_STREAM_SECONDS
+    and the client reconnects, which re-checks the token.
+    '''
+    teacher = g.current_user
+    target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first_or_404("Class not found.")
+    Assignment.query.filter_by(id=assignment_id, class_id=target_class.id).first_or_404("Assignment not found.")
+    subscription = pubsub_hub.subscribe(progress_channel(class_id, assignment_id))
+    stream = _progress_event_stream(subscription, current_app.config.get('SSE_HEARTBEAT_SECONDS', 15),
+                                    current_app.config.get('SSE_MAX_STREAM_SECONDS', 300))
+    response = Response(stream, mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(subscription.close) # Also covers a client gone before the generator started
+    return response
+
 
+@teacher_bp.route('/classes/<int:class_id>/gradebook', methods=['GET'])
+@firebase_teacher_required
+def get_class_gradebook(class_id):
+    '''Scores for every student, assignment and task in the class, with per-student and per-task statistics.'''
+    teacher = g.current_user
+    target_class = Class.query.filter_by(id=class_id, teacher_id=teacher.id).first_or_404("Class not found.")
+    return jsonify(success=True, class_id=target_class.id, gradebook=class_gradebook(target_class.id))
+
+
+@teacher_bp.route('/students/<int:student_id>/revoke_sessions', methods=['POST'])
+@firebase_teacher_required
+def revoke_student_sessions(student_id):
+    '''Signs a student out everywhere, e.g. after their credentials were shared.'''
+    teacher = g.current_user
+    student = User.query.join(Class, User.student_class_id == Class.id)\
+                        .filter(User.id == student_id, User.role == RoleEnum.STUDENT, Class.teacher_id == teacher.id)\
+                        .first_or_404("Student not found in your classes.")
+    if not student.firebase_uid:
+        return jsonify(success=False, message="Student has no Firebase account."), 400
+    try:
+        revoke_firebase_user_tokens(student.firebase_uid)
+        logger.info(f"Teacher {teacher.username} revoked sessions for student {student.username} (Firebase UID: {student.firebase_uid})")
+        return jsonify(success=True, message=f"Sessions revoked for '{student.username}'.")
+    except Exception as e:
+        logger.error(f"Error revoking sessions for student {student.username}: {e}", exc_info=True)
+        return jsonify(success=False, message="Failed to revoke student sessions."), 500
+
+@teacher_bp.route('/metrics', methods=['GET'])
+@firebase_teacher_required
+def get_backend_metrics():
+    '''In-process counters for the caches and fast paths in front of Firebase and the DB.'''
+    return jsonify(success=True, metrics={
+        "token_cache": verified_token_cache.stats(),
+        "signing_keys": signing_key_store.stats(),
+        "revocation_index": revocation_index.stats(),
+        "principal_cache": principal_cache.stats(),
+        "verify_session_single_flight": verify_session_flights.stats(),
+        "jobs": job_runner.stats(),
+        "pubsub": pubsub_hub.stats(),
+        "progress_write_behind": progress_buffer.stats(),
+        "counters": counters.snapshot(),
+    })
@@ -1,6 +1,8 @@
 # MGSCompSciHub/backend/project/worksheets/routes.py
 from flask import jsonify, request
 from ..models import Worksheet, db
+from ..etags import conditional_response
+from sqlalchemy import func, select
 from ..auth.utils import firebase_teacher_required # Corrected import
 from . import worksheets_bp
 import logging
@@ -10,9 +12,15 @@ logger = logging.getLogger(__name__)
 @worksheets_bp.route('', methods=['GET'])
 @firebase_teacher_required # Corrected decorator
 def list_all_worksheets():
+    # Worksheets are only ever added, so the count and highest id identify the list
+    stamp = tuple(db.session.execute(select(func.count(Worksheet.id), func.max(Worksheet.id))).one())
+    return conditional_response('worksheets', stamp, _worksheet_list_response)
+
+def _worksheet_list_response():
     worksheets = Worksheet.query.order_by(Worksheet.title).all()
     return jsonify(success=True, worksheets=[
-        {"id": ws.id, "title": ws.title, "description": ws.description, "component_identifier": ws.component_identifier}
+        {"id": ws.id, "title": ws.title, "description": ws.description, "component_identifier": ws.component_identifier,
+         "task_count": ws.task_count}
         for ws in worksheets
     ])
 
@@ -24,9 +32,12 @@ def create_worksheet_metadata():
     title = data.get('title')
     description = data.get('description')
     component_identifier = data.get('component_identifier')
+    task_count = data.get('task_count') # Used for completion rates; optional
 
     if not all([title, component_identifier]):
         return jsonify(success=False, message="Title and component_identifier are required."), 400
+    if task_count is not None and (not isinstance(task_count, int) or isinstance(task_count, bool) or task_count <= 0):
+        return jsonify(success=False, message="task_count must be a positive integer."), 400
 
     if Worksheet.query.filter_by(title=title).first() or \
        Worksheet.query.filter_by(component_identifier=component_identifier).first():
@@ -36,14 +47,16 @@ def create_worksheet_metadata():
         new_worksheet = Worksheet(
             title=title, 
             description=description, 
-            component_identifier=component_identifier
+            component_identifier=component_identifier,
+            task_count=task_count
         )
         db.session.add(new_worksheet)
         db.session.commit()
         logger.info(f"New worksheet metadata created: {title} ({component_identifier})")
         return jsonify(success=True, message="Worksheet metadata created successfully.", 
                        worksheet={"id": new_worksheet.id, "title": new_worksheet.title, 
-                                  "component_identifier": new_worksheet.component_identifier}), 201
+                                  "component_identifier": new_worksheet.component_identifier,
+                                  "task_count": new_worksheet.task_count}), 201
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error creating worksheet metadata {title}: {str(e)}")
@@ -0,0 +1,88 @@
+# MGSCompSciHub/backend/tests/conftest.py
+'''
+Shared fixtures: an app on an in-memory SQLite database with the schema created, and a teacher
+signed in through a stand-in for Firebase token verification, so the tests run offline.
+'''
+import os
+import sys
+import time
+
+import pytest
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from project import create_app, db
+from project.models import User, Class, RoleEnum, Worksheet, Assignment
+import project.auth.utils as auth_utils
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    # One shared connection, so every session and thread sees the same in-memory database
+    SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    PASSWORD_HASH_ROUNDS = 1000
+    PASSWORD_HASH_WORKERS = 1
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove() # The in-memory database goes away with the app's engine
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def teacher(app, monkeypatch):
+    '''A teacher row; requests with `Authorization: Bearer <anything>` are authenticated as them.'''
+    user = User(firebase_uid='teacher-uid', username='test_teacher', role=RoleEnum.TEACHER)
+    db.session.add(user)
+    db.session.commit()
+    monkeypatch.setattr(auth_utils, 'verify_firebase_id_token',
+                        lambda token: {"uid": user.firebase_uid, "exp": time.time() + 3600})
+    return user
+
+
+@pytest.fixture
+def teacher_headers(teacher):
+    return {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture
+def assignment(teacher):
+    '''A class of the teacher with one assignment of a four-task worksheet.'''
+    worksheet = Worksheet(title='Fixture', component_identifier='FixtureWorksheet', task_count=4)
+    target_class = Class(name='Fixture class', teacher_id=teacher.id)
+    db.session.add_all([worksheet, target_class])
+    db.session.flush()
+    assignment = Assignment(class_id=target_class.id, worksheet_id=worksheet.id)
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment
+
+
+@pytest.fixture
+def student(assignment):
+    user = User(username='fixture_student', role=RoleEnum.STUDENT, student_class_id=assignment.class_id)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def student_client(app, student):
+    '''A test client with a Flask-Login session for `student`.'''
+    app.login_manager.session_protection = None
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student.id)
+    return client
@@ -0,0 +1,68 @@
+# MGSCompSciHub/backend/tests/helpers.py
+'''
+Test doubles and data builders shared by the tests and the benchmarks (which import this module
+as tests.helpers), so both exercise the same setup.
+'''
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth_admin
+from sqlalchemy import insert, select
+
+from project.models import db, User, Class, RoleEnum, Assignment, WorksheetProgress
+
+
+class FakeFirebaseAuth:
+    '''Stands in for the create_user/delete_users calls of firebase_admin.auth.'''
+
+    def __init__(self, rejected_emails=(), latency=0.0):
+        self.rejected_emails = set(rejected_emails)
+        self.latency = latency # Seconds each create_user call sleeps, to simulate network wait
+        self.calls = 0
+        self.created = []
+        self.deleted = []
+        self._lock = threading.Lock()
+
+    def create_user(self, uid=None, email=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if email in self.rejected_emails:
+            raise firebase_auth_admin.EmailAlreadyExistsError('EMAIL_EXISTS', None, None)
+        with self._lock:
+            self.created.append(uid)
+        return uid
+
+    def delete_users(self, uids, app=None):
+        self.deleted.extend(uids)
+
+    def install(self, setattr):
+        '''Patches firebase_admin through `setattr(obj, name, value)`, e.g. pytest's monkeypatch.setattr.'''
+        setattr(firebase_auth_admin, 'create_user', self.create_user)
+        setattr(firebase_auth_admin, 'delete_users', self.delete_users)
+        setattr(firebase_admin, 'get_app', lambda *args, **kwargs: None)
+
+
+def seed_class_progress(teacher_id, worksheet_id, class_size, tasks, answer_size=1):
+    '''
+    Adds a class of `class_size` students with one assignment of the worksheet, where every other
+    student has saved all `tasks` tasks (answer_data of about `answer_size` characters each).
+    Commits, and returns the URL of the teacher's progress view for that assignment.
+    '''
+    target_class = Class(name=f'Class of {class_size}', teacher_id=teacher_id)
+    db.session.add(target_class)
+    db.session.flush()
+    assignment = Assignment(class_id=target_class.id, worksheet_id=worksheet_id)
+    db.session.add(assignment)
+    db.session.flush()
+    db.session.execute(insert(User), [{"username": f"student{target_class.id}_{i}", "role": RoleEnum.STUDENT,
+                                       "student_class_id": target_class.id} for i in range(class_size)])
+    student_ids = db.session.scalars(select(User.id).where(User.student_class_id == target_class.id)).all()
+    db.session.execute(insert(WorksheetProgress), [{
+        "student_id": student_id, "assignment_id": assignment.id, "task_identifier": f"task{t}",
+        "answer_data": {"answer": "x" * answer_size}, "score": 1.0,
+    } for student_id in student_ids[::2] for t in range(tasks)])
+    db.session.commit()
+    return f'/api/teacher/classes/{target_class.id}/assignments/{assignment.id}/progress'
@@ -0,0 +1,66 @@
+# MGSCompSciHub/backend/tests/test_credentials.py
+'''Provisioning responses carry a credential batch instead of inline passwords, and expired batches go away.'''
+import itertools
+from datetime import datetime
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth_admin
+from sqlalchemy import func, select, update
+
+from project.jobs import job_runner
+from project.models import db, Class, CredentialBatch, CredentialBatchEntry
+from project.teacher.credentials import create_credential_batch, get_credential_batch, iter_credentials_csv
+
+
+def test_sequential_provisioning_returns_a_credential_batch(client, teacher, teacher_headers, monkeypatch):
+    uids = itertools.count()
+    monkeypatch.setattr(firebase_auth_admin, 'create_user',
+                        lambda **kwargs: type('UserRecord', (), {'uid': f'student-{next(uids)}'})())
+    monkeypatch.setattr(firebase_admin, 'get_app', lambda *args, **kwargs: None)
+    target_class = Class(name='Credentials', teacher_id=teacher.id)
+    db.session.add(target_class)
+    db.session.commit()
+
+    response = client.post('/api/teacher/create_firebase_student', headers=teacher_headers,
+                           json={'classId': target_class.id, 'numStudents': 3})
+
+    assert response.status_code == 201
+    assert b'initial_password' not in response.data
+    assert len(response.json['report']) == response.json['credentials']['count'] == 3
+    csv = client.get(response.json['credentials']['csv_url'], headers=teacher_headers)
+    assert csv.status_code == 200
+    assert len(csv.get_data(as_text=True).strip().splitlines()) == 4 # Header plus one row per student
+
+
+def _expire(batch_id):
+    db.session.execute(update(CredentialBatch).where(CredentialBatch.id == batch_id)
+                       .values(expires_at=datetime(2000, 1, 1)))
+    db.session.commit()
+
+
+def test_expired_batches_are_unreadable_and_purged(app, teacher):
+    live = create_credential_batch([_row('live')], teacher.id, None)
+    expired = create_credential_batch([_row('old')], teacher.id, None)
+    live_id, expired_id = live.id, expired.id
+    _expire(expired_id)
+
+    assert list(iter_credentials_csv(expired_id)) == ["username,login_email,initial_password\r\n"]
+    assert get_credential_batch(expired_id, teacher.id) is None # Also purges
+    assert db.session.get(CredentialBatch, expired_id) is None
+    assert db.session.scalar(select(func.count()).select_from(CredentialBatchEntry)
+                             .where(CredentialBatchEntry.batch_id == expired_id)) == 0
+    assert get_credential_batch(live_id, teacher.id) is not None
+
+
+def test_jobs_worker_purges_expired_batches(app, teacher):
+    batch_id = create_credential_batch([_row('old')], teacher.id, None).id
+    _expire(batch_id)
+
+    job_runner.run_due_periodic()
+
+    db.session.expire_all()
+    assert db.session.get(CredentialBatch, batch_id) is None
+
+
+def _row(name):
+    return {"success": True, "app_username": name, "firebase_login_email": f"{name}@example.com", "initial_password": "pw"}
@@ -0,0 +1,16 @@
+# MGSCompSciHub/backend/tests/test_db_utils.py
+from project.db_utils import reserve_id_block, SEQUENCE_START_MARGIN
+from project.models import db, User, RoleEnum
+
+
+def test_reserve_id_block_hands_out_consecutive_blocks(app):
+    first = reserve_id_block('test_sequence', 5)
+    assert first == SEQUENCE_START_MARGIN # No users yet, no seed row
+    assert reserve_id_block('test_sequence', 3) == first + 5
+
+
+def test_reserve_id_block_does_not_commit_the_callers_session(app):
+    db.session.add(User(username='pending_user', role=RoleEnum.STUDENT))
+    reserve_id_block('test_sequence', 1)
+    db.session.rollback()
+    assert db.session.query(User).filter_by(username='pending_user').count() == 0
@@ -0,0 +1,29 @@
+# MGSCompSciHub/backend/tests/test_gradebook.py
+'''The gradebook covers the class's current students only.'''
+from project.models import db, User, Class, RoleEnum, Worksheet, Assignment, WorksheetProgress
+
+
+def test_gradebook_ignores_progress_of_a_user_promoted_to_teacher(client, teacher, teacher_headers):
+    worksheet = Worksheet(title='Gradebook', component_identifier='GradebookWorksheet', task_count=1)
+    target_class = Class(name='Gradebook', teacher_id=teacher.id)
+    db.session.add_all([worksheet, target_class])
+    db.session.flush()
+    assignment = Assignment(class_id=target_class.id, worksheet_id=worksheet.id)
+    student = User(username='still_student', role=RoleEnum.STUDENT, student_class_id=target_class.id)
+    # verify_session promotes by role only: the old class id and progress rows stay behind
+    promoted = User(username='now_teacher', role=RoleEnum.TEACHER, student_class_id=target_class.id)
+    db.session.add_all([assignment, student, promoted])
+    db.session.flush()
+    db.session.add_all([
+        WorksheetProgress(student_id=user.id, assignment_id=assignment.id, task_identifier='task1',
+                          answer_data={}, score=1.0)
+        for user in (student, promoted)
+    ])
+    db.session.commit()
+
+    response = client.get(f'/api/teacher/classes/{target_class.id}/gradebook', headers=teacher_headers)
+
+    assert response.status_code == 200
+    gradebook = response.json['gradebook']
+    assert gradebook['students']['username'] == ['still_student']
+    assert gradebook['scores'] == [[1.0]]
@@ -0,0 +1,78 @@
+# MGSCompSciHub/backend/tests/test_jsonpatch.py
+'''RFC 6902 edge cases in project/jsonpatch.py, and JSON Patch saves of student progress.'''
+import pytest
+
+from project.jsonpatch import apply_patch, JsonPatchError, JsonPatchTestFailed
+
+
+def test_failed_test_operation_leaves_the_input_untouched():
+    document = {"a": [1, 2]}
+    with pytest.raises(JsonPatchTestFailed):
+        apply_patch(document, [{"op": "remove", "path": "/a/0"}, {"op": "test", "path": "/a", "value": [1, 2]}])
+    assert document == {"a": [1, 2]}
+
+
+def test_test_compares_whole_values():
+    assert apply_patch({"a": {"b": [1]}}, [{"op": "test", "path": "/a", "value": {"b": [1]}}]) == {"a": {"b": [1]}}
+    with pytest.raises(JsonPatchTestFailed):
+        apply_patch({"a": 1}, [{"op": "test", "path": "/a", "value": "1"}])
+
+
+@pytest.mark.parametrize("document, path", [
+    ({"a": 1}, "/b"),       # Missing member
+    ({"a": [1]}, "/a/1"),   # Past the end of an array
+    ({"a": [1]}, "/a/-"),   # "-" only names a position to add at
+    ({"a": [1, 2]}, "/a/01"), # Leading zeros are not array indices
+    ({"a": 1}, ""),         # The whole document
+])
+def test_remove_rejects_paths_that_do_not_exist(document, path):
+    with pytest.raises(JsonPatchError):
+        apply_patch(document, [{"op": "remove", "path": path}])
+
+
+def test_remove_unescapes_pointer_tokens():
+    assert apply_patch({"a/b": 1, "c~d": 2}, [{"op": "remove", "path": "/a~1b"}, {"op": "remove", "path": "/c~0d"}]) == {}
+
+
+def test_move_within_an_array_and_between_members():
+    assert apply_patch({"a": [1, 2, 3]}, [{"op": "move", "from": "/a/0", "path": "/a/-"}]) == {"a": [2, 3, 1]}
+    assert apply_patch({"a": {"x": 1}, "b": {}}, [{"op": "move", "from": "/a/x", "path": "/b/y"}]) == {"a": {}, "b": {"y": 1}}
+    assert apply_patch({"a": 1}, [{"op": "move", "from": "/a", "path": "/a"}]) == {"a": 1}
+
+
+def test_move_into_own_child_is_rejected():
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": {"b": {}}}, [{"op": "move", "from": "/a", "path": "/a/b/c"}])
+
+
+def test_move_from_missing_path_is_rejected():
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1}, [{"op": "move", "from": "/missing", "path": "/b"}])
+
+
+def _save(client, assignment, **body):
+    return client.post(f'/api/student/assignments/{assignment.id}/progress', json={"task_identifier": "task1", **body})
+
+
+def test_patch_against_a_stale_version_gets_409(student_client, assignment):
+    assert _save(student_client, assignment, answer_data={"lines": ["a"]}, score=None).json["progress_update"]["version"] == 1
+    patched = _save(student_client, assignment, patch=[{"op": "add", "path": "/lines/-", "value": "b"}], base_version=1)
+    assert patched.status_code == 200
+    assert patched.json["progress_update"]["version"] == 2
+
+    stale = _save(student_client, assignment, patch=[{"op": "add", "path": "/lines/-", "value": "c"}], base_version=1)
+
+    assert stale.status_code == 409
+    assert stale.json["current_version"] == 2
+    progress = student_client.get(f'/api/student/assignments/{assignment.id}/progress').json["progress"]
+    assert progress["task1"]["answer_data"] == {"lines": ["a", "b"]}
+
+
+def test_failed_test_operation_gets_409_and_invalid_patch_400(student_client, assignment):
+    _save(student_client, assignment, answer_data={"lines": ["a"]}, score=None)
+
+    failed_test = _save(student_client, assignment, patch=[{"op": "test", "path": "/lines/0", "value": "z"}], base_version=1)
+    invalid = _save(student_client, assignment, patch=[{"op": "remove", "path": "/missing"}], base_version=1)
+
+    assert failed_test.status_code == 409
+    assert invalid.status_code == 400
@@ -0,0 +1,28 @@
+# MGSCompSciHub/backend/tests/test_parallel_provisioning.py
+'''
+create_student_accounts_parallel against a local fake of firebase_admin.auth: every student is
+attempted once, every failure is reported, and exactly the reported successes are committed.
+'''
+from project.models import db, User, Class
+from project.teacher.provisioning import plan_student_accounts, create_student_accounts_parallel
+from tests.helpers import FakeFirebaseAuth
+
+
+def test_parallel_provisioning_reports_failures_and_commits_successes(app, teacher, monkeypatch):
+    target_class = Class(name='Provisioning', teacher_id=teacher.id)
+    db.session.add(target_class)
+    db.session.commit()
+    specs = plan_student_accounts(12)
+    rejected = {spec.firebase_email for spec in specs[::3]}
+    fake = FakeFirebaseAuth(rejected)
+    fake.install(monkeypatch.setattr)
+
+    report = create_student_accounts_parallel(specs, target_class.id, max_workers=4)
+
+    assert [row["firebase_uid"] for row in report] == [spec.firebase_uid for spec in specs]
+    failed = [row for row in report if not row["success"]]
+    assert {row["firebase_login_email"] for row in failed} == rejected
+    assert all(row["error"] and "initial_password" not in row for row in failed)
+    committed = set(db.session.scalars(db.select(User.firebase_uid).where(User.student_class_id == target_class.id)))
+    assert committed == set(fake.created) == {row["firebase_uid"] for row in report if row["success"]}
+    assert fake.calls == len(specs) and not fake.deleted
@@ -0,0 +1,37 @@
+# MGSCompSciHub/backend/tests/test_progress_queries.py
+'''The per-assignment progress view must not issue more SQL statements for a bigger class (N+1).'''
+from sqlalchemy import event
+
+from project.models import db, Worksheet
+from tests.helpers import seed_class_progress
+
+TASKS = 4
+
+
+def _count_statements(client, headers, url, class_size):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client.get(url, headers=headers) # Warm the principal cache, as on a real dashboard
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    assert len(response.json["assignment_progress"]) == class_size
+    return len(statements)
+
+
+def test_assignment_progress_query_count_is_constant(client, teacher, teacher_headers):
+    worksheet = Worksheet(title='Queries', component_identifier='QueriesWorksheet', task_count=TASKS)
+    db.session.add(worksheet)
+    db.session.commit()
+    small, large = 3, 40
+    small_url = seed_class_progress(teacher.id, worksheet.id, small, TASKS)
+    large_url = seed_class_progress(teacher.id, worksheet.id, large, TASKS)
+
+    assert _count_statements(client, teacher_headers, small_url, small) == \
+        _count_statements(client, teacher_headers, large_url, large)
@@ -0,0 +1,63 @@
+# MGSCompSciHub/backend/tests/test_revocation.py
+'''RevocationIndex: merging a bulk refresh with revocations and disables the app records itself.'''
+from types import SimpleNamespace
+
+import pytest
+from firebase_admin import auth as firebase_auth_admin
+
+from project.auth import revocation
+from project.auth.revocation import RevocationIndex
+
+
+def _user(uid, valid_after_ms=0, disabled=False):
+    return SimpleNamespace(uid=uid, tokens_valid_after_timestamp=valid_after_ms, disabled=disabled)
+
+
+def _list_users(monkeypatch, iterate_all):
+    monkeypatch.setattr(revocation.firebase_auth_admin, 'list_users', lambda: SimpleNamespace(iterate_all=iterate_all))
+
+
+def test_updates_recorded_during_a_refresh_survive_the_stale_listing(monkeypatch):
+    index = RevocationIndex()
+
+    def iterate_all():
+        yield _user('disabled-meanwhile')
+        index.record_disabled('disabled-meanwhile', True) # The listing above is already stale
+        index.record_revocation('revoked-meanwhile', 5_000_000)
+        yield _user('revoked-meanwhile')
+
+    _list_users(monkeypatch, iterate_all)
+    index.refresh()
+
+    with pytest.raises(firebase_auth_admin.UserDisabledError):
+        index.check({'uid': 'disabled-meanwhile', 'iat': 10_000})
+    with pytest.raises(firebase_auth_admin.RevokedIdTokenError):
+        index.check({'uid': 'revoked-meanwhile', 'iat': 10})
+    index.check({'uid': 'revoked-meanwhile', 'iat': 10_000}) # Signed in again after the revocation
+
+
+def test_listing_wins_for_updates_made_before_the_refresh(monkeypatch):
+    index = RevocationIndex()
+    index.record_disabled('re-enabled', True)
+    index.record_revocation('lagging', 5_000_000)
+    _list_users(monkeypatch, lambda: iter([_user('re-enabled'), _user('lagging', valid_after_ms=1_000)]))
+
+    index.refresh()
+
+    index.check({'uid': 're-enabled', 'iat': 10_000}) # Re-enabled outside the app since
+    with pytest.raises(firebase_auth_admin.RevokedIdTokenError):
+        index.check({'uid': 'lagging', 'iat': 10}) # The newer app-side revocation is kept
+
+
+def test_failed_refresh_stops_collecting_pending_updates(monkeypatch):
+    index = RevocationIndex()
+
+    def iterate_all():
+        raise ConnectionError("Firebase unreachable")
+        yield
+
+    _list_users(monkeypatch, iterate_all)
+    with pytest.raises(ConnectionError):
+        index.refresh()
+    assert index._pending is None
+    assert index.last_refreshed is None
@@ -0,0 +1,58 @@
+# MGSCompSciHub/backend/tests/test_singleflight.py
+import threading
+import time
+
+import pytest
+
+from project.auth.singleflight import SingleFlight
+
+
+def _run_concurrently(flights, key, fn, callers):
+    '''Starts `callers` threads on flights.do(key, fn) once the leader is inside fn; returns their outcomes.'''
+    outcomes = [None] * callers
+
+    def call(i):
+        try:
+            outcomes[i] = ('result', flights.do(key, fn))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_waiters_receive_the_leaders_exception():
+    flights = SingleFlight(wait_timeout=5)
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+    error = ValueError("token rejected")
+
+    def fail():
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        raise error
+
+    leader, leader_outcome = _run_concurrently(flights, 'key', fail, 1)
+    assert entered.wait(5)
+    waiters, waiter_outcomes = _run_concurrently(flights, 'key', fail, 3)
+    deadline = time.monotonic() + 5
+    while flights._calls['key'].waiters < 3 and time.monotonic() < deadline: # All three wait on the leader
+        time.sleep(0.01)
+    release.set()
+    for thread in leader + waiters:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert leader_outcome == [('error', error)]
+    assert waiter_outcomes == [('error', error)] * 3
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "shared": 3}
+
+
+def test_a_failed_call_is_not_cached():
+    flights = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flights.do('key', lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert flights.do('key', lambda: 42) == (42, False)
@@ -0,0 +1,45 @@
+# MGSCompSciHub/backend/tests/test_verify_session.py
+'''First-login user creation in /auth/firebase/verify_session.'''
+import time
+
+from sqlalchemy import event
+
+import project.auth.routes as auth_routes
+from project.metrics import counters
+from project.models import db, User, RoleEnum
+
+
+def _sign_in_as(monkeypatch, uid, name):
+    monkeypatch.setattr(auth_routes, 'verify_firebase_id_token', lambda token: {
+        "uid": uid, "name": name, "exp": time.time() + 3600, "firebase": {"sign_in_provider": "password"}})
+
+
+def _verify_session(client):
+    return client.post('/auth/firebase/verify_session', json={"firebase_token": "test-token"})
+
+
+def test_new_user_is_created_with_one_insert_and_counted_once(app, client, monkeypatch):
+    _sign_in_as(monkeypatch, 'new-uid', 'new_student')
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    writes = counters.get('verify_session.writes')
+
+    response = _verify_session(client)
+
+    assert response.status_code == 200
+    assert response.json['user']['username'] == 'new_student'
+    assert response.json['user']['role'] == 'student'
+    assert [statement.split()[0] for statement in statements] == ['SELECT', 'INSERT'] # Lookup, then INSERT ... RETURNING
+    assert counters.get('verify_session.writes') == writes + 1
+
+
+def test_conflicting_username_is_not_counted_as_a_write(app, client, monkeypatch):
+    db.session.add(User(firebase_uid='someone-else', username='taken_name', role=RoleEnum.STUDENT))
+    db.session.commit()
+    _sign_in_as(monkeypatch, 'new-uid', 'taken_name')
+    writes = counters.get('verify_session.writes')
+
+    response = _verify_session(client)
+
+    assert response.status_code == 409
+    assert counters.get('verify_session.writes') == writes
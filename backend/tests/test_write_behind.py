@@ -0,0 +1,73 @@
+# MGSCompSciHub/backend/tests/test_write_behind.py
+'''ProgressWriteBuffer: coalescing (last write wins), flushing, and retrying failed flushes.'''
+import pytest
+
+from project.models import db, WorksheetProgress
+from project.student import write_behind
+from project.student.write_behind import ProgressWriteBuffer, MAX_FLUSH_ATTEMPTS
+
+
+@pytest.fixture
+def buffer(app):
+    buffer = ProgressWriteBuffer(interval_ms=60_000) # The flusher thread stays idle; tests flush by hand
+    buffer.init_app(app)
+    return buffer
+
+
+def _put(buffer, student, assignment, task_identifier, answer_data, score):
+    buffer.put(student.id, student.username, assignment.class_id, assignment.id, task_identifier, answer_data, score)
+
+
+def _stored(student, assignment):
+    return {row.task_identifier: (row.answer_data, row.score) for row in
+            db.session.query(WorksheetProgress).filter_by(student_id=student.id, assignment_id=assignment.id)}
+
+
+def test_last_write_wins_and_a_none_score_keeps_the_buffered_one(buffer, student, assignment):
+    _put(buffer, student, assignment, 'task1', {"v": 1}, 0.5)
+    _put(buffer, student, assignment, 'task1', {"v": 2}, None)
+    _put(buffer, student, assignment, 'task2', {"v": 1}, 1.0)
+
+    assert buffer.pending_for(student.id, assignment.id) == {
+        'task1': {"answer_data": {"v": 2}, "score": 0.5},
+        'task2': {"answer_data": {"v": 1}, "score": 1.0},
+    }
+    assert _stored(student, assignment) == {}
+
+    assert buffer.flush() == 2
+    assert _stored(student, assignment) == {'task1': ({"v": 2}, 0.5), 'task2': ({"v": 1}, 1.0)}
+    assert buffer.pending_for(student.id, assignment.id) == {}
+    assert buffer.stats()["coalesced"] == 1
+
+
+def test_failed_flush_is_retried_and_newer_saves_win(buffer, student, assignment, monkeypatch):
+    real_save = write_behind.save_task_progress_batch
+    failures = []
+
+    def failing_save(*args):
+        failures.append(1)
+        # A newer save arrives while the failing flush is in progress
+        _put(buffer, student, assignment, 'task1', {"v": "newer"}, 1.0)
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(write_behind, 'save_task_progress_batch', failing_save)
+    _put(buffer, student, assignment, 'task1', {"v": "older"}, 0.0)
+    assert buffer.flush() == 0
+    assert buffer.stats()["flush_errors"] == 1
+
+    monkeypatch.setattr(write_behind, 'save_task_progress_batch', real_save)
+    assert buffer.flush() == 1
+    assert _stored(student, assignment) == {'task1': ({"v": "newer"}, 1.0)}
+
+
+def test_a_save_that_keeps_failing_is_dropped(buffer, student, assignment, monkeypatch):
+    def failing_save(*args):
+        raise RuntimeError("student was deleted")
+
+    monkeypatch.setattr(write_behind, 'save_task_progress_batch', failing_save)
+    _put(buffer, student, assignment, 'task1', {"v": 1}, None)
+    for _ in range(MAX_FLUSH_ATTEMPTS):
+        buffer.flush()
+
+    assert buffer.pending_for(student.id, assignment.id) == {}
+    assert buffer.stats()["flush_errors"] == MAX_FLUSH_ATTEMPTS
@@ -5,10 +5,28 @@ import {
   createClass, 
   listAllWorksheets, 
   assignWorksheetToClass, 
-  getClassDetails 
+  getClassDetails,
+  getCredentialBatchCsv
 } from '../services/api'; 
 import { useAuth } from '../contexts/AuthContext'; 
 
+// Rows of a credential batch CSV (username, login_email, initial_password). Generated usernames,
+// emails and passwords never contain commas or quotes, so a plain split is enough.
+const parseCredentialsCsv = (csvText) => csvText.trim().split(/\r?\n/).slice(1).map(line => {
+  const [app_username, firebase_login_email, initial_password] = line.split(',');
+  return { app_username, firebase_login_email, initial_password };
+});
+
+// The created students with their passwords: from the credential batch, or inline in the report
+// if the backend could not store a batch.
+const loadCreatedCredentials = async (response) => {
+  if (response.credentials && response.credentials.csv_url) {
+    const csvResponse = await getCredentialBatchCsv(response.credentials.csv_url);
+    return parseCredentialsCsv(csvResponse.data);
+  }
+  return (response.report || []).filter(row => row.success && row.initial_password);
+};
+
 // Modal component for displaying credentials
 const CredentialsDisplayModal = ({ credentials, onClose }) => {
   console.log("[MODAL LOG] CredentialsDisplayModal received credentials:", credentials); 
@@ -199,9 +217,10 @@ function TeacherDashboardPage() {
       });
       console.log("Response from createStudentAccountByTeacher:", response); 
       
-      if (response.success && response.created_students && response.created_students.length > 0) {
-        console.log("Data being passed to setCreatedStudentCredentials:", response.created_students); 
-        setCreatedStudentCredentials([...response.created_students]);        
+      const createdCredentials = response.success ? await loadCreatedCredentials(response) : [];
+      if (createdCredentials.length > 0) {
+        console.log("Data being passed to setCreatedStudentCredentials:", createdCredentials); 
+        setCreatedStudentCredentials(createdCredentials);        
         setShouldShowCredentialsModal(true); // Explicitly set to show the modal
         console.log("Student credentials state set, shouldShowCredentialsModal set to true. Modal should appear.");
         // Optionally, refresh class details if student counts need to be updated immediately in the UI
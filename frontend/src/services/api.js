@@ -29,6 +29,8 @@ export const assignWorksheetToClass = (classId, worksheetId, dueDate = null) =>
   if (dueDate) payload.due_date = dueDate;
   return apiClient.post(`/api/teacher/classes/${classId}/assign_worksheet`, payload);
 };
+// Initial passwords of newly created students: a short-lived credential batch, downloaded as CSV
+export const getCredentialBatchCsv = (csvUrl) => apiClient.get(csvUrl, { responseType: 'text' });
 export const getAssignmentProgressForClass = (classId, assignmentId) => apiClient.get(`/api/teacher/classes/<span class="math-inline">\{classId\}/assignments/</span>{assignmentId}/progress`);
 
 